@@ -6,7 +6,12 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets')],
-    hiddenimports=['customtkinter', 'PIL.Image', 'PIL.ImageTk', 'reportlab'],
+    hiddenimports=['customtkinter', 'PIL.Image', 'PIL.ImageTk', 'reportlab', 'pypdf',
+                   # Pages importées à la demande par MainApp
+                   'ui.pages.home_page', 'ui.pages.unite_page', 'ui.pages.article_page',
+                   'ui.pages.rapport_page', 'ui.pages.entrepot_page', 'ui.pages.inventaire_page',
+                   # Module chargé par le processus d'impression
+                   'utils.pdf_generator', 'utils.export_factures'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Mesure du débit de génération des factures PDF
+
+    python benchmarks/bench_facture_pdf.py [--lignes 5 20] [--repetitions 200]
+
+Compare, en mémoire (BytesIO) :
+  - ancien    : platypus avec feuille de styles reconstruite à chaque facture
+  - platypus  : platypus avec styles partagés (chemin des factures longues)
+  - canvas    : generer_facture, dessin direct sur le canvas
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate
+
+from utils import pdf_generator
+
+
+def facture_exemple(nb_lignes):
+    """Facture et lignes au format de get_facture_by_id / get_facture_details"""
+    facture_info = (1, "Client Exemple", "2024-01-15", 0)
+    details = [
+        (i, 1, i, 1, 2.0 + i, 1500.0, (2.0 + i) * 1500.0,
+         f"Article {i}", "Pièce", "Entrepôt Central")
+        for i in range(1, nb_lignes + 1)
+    ]
+    return facture_info, details
+
+
+def ancien(facture_info, details):
+    getSampleStyleSheet()
+    lignes, total = pdf_generator.lignes_facture(details)
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4, rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=72)
+    doc.build(pdf_generator._story_facture(facture_info, lignes, total))
+
+
+def platypus(facture_info, details):
+    lignes, total = pdf_generator.lignes_facture(details)
+    c = Canvas(io.BytesIO(), pagesize=A4, pageCompression=0)
+    pdf_generator._construire_facture(c, facture_info, lignes, total)
+    c.save()
+
+
+def canvas(facture_info, details):
+    pdf_generator.generer_facture(facture_info, details, io.BytesIO())
+
+
+def mesurer(fonction, facture_info, details, repetitions):
+    fonction(facture_info, details)  # échauffement
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction(facture_info, details)
+    return repetitions / (time.perf_counter() - debut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Débit de génération des factures PDF")
+    parser.add_argument("--lignes", type=int, nargs="+", default=[5, 20],
+                        help="Nombres de lignes de facture à tester")
+    parser.add_argument("--repetitions", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Lignes max. sur le chemin canvas : {pdf_generator._lignes_max_page_facture()}")
+    for nb_lignes in args.lignes:
+        facture_info, details = facture_exemple(nb_lignes)
+        resultats = {
+            nom: mesurer(fonction, facture_info, details, args.repetitions)
+            for nom, fonction in (("ancien", ancien), ("platypus", platypus), ("canvas", canvas))
+        }
+        print(f"\n{nb_lignes} lignes :")
+        for nom, debit in resultats.items():
+            print(f"   {nom:<10} {debit:8.1f} factures/s   x{debit / resultats['ancien']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
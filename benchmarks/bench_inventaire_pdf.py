@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Mesure du temps de génération de l'inventaire PDF
+
+    python benchmarks/bench_inventaire_pdf.py [--articles 10000 50000] [--par-entrepot]
+
+Compare, en mémoire (BytesIO) :
+  - ancien    : un seul Table platypus pour tout le catalogue (SimpleDocTemplate)
+  - flux      : generer_inventaire, une LongTable par page au fil des articles
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table
+
+from utils import pdf_generator
+
+
+def articles_exemple(nb_articles, par_entrepot):
+    """Articles au format de DatabaseManager.iter_inventaire, produits à la demande"""
+    cles = range(nb_articles)
+    if par_entrepot:
+        cles = sorted(cles, key=lambda i: (i % 10, i))
+    for i in cles:
+        entrepot_id = i % 10 or None
+        yield (i, f"Article {i:06d}", f"REF{i}", entrepot_id,
+               f"Entrepôt {entrepot_id}" if entrepot_id else None)
+
+
+def ancien(articles, par_entrepot):
+    table_data = [pdf_generator.ENTETE_INVENTAIRE]
+    for article_id, nom, _reference, _entrepot_id, entrepot_nom in articles:
+        table_data.append([str(article_id), nom, entrepot_nom or "Non assigné"])
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=A4)
+    doc.build([Table(table_data, colWidths=pdf_generator.COLONNES_INVENTAIRE, repeatRows=1,
+                     style=pdf_generator.TABLE_INVENTAIRE)])
+
+
+def flux(articles, par_entrepot):
+    pdf_generator.generer_inventaire(articles, io.BytesIO(), par_entrepot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de génération de l'inventaire PDF")
+    parser.add_argument("--articles", type=int, nargs="+", default=[2000, 10000],
+                        help="Tailles de catalogue à tester")
+    parser.add_argument("--par-entrepot", action="store_true",
+                        help="Regrouper par entrepôt (flux uniquement)")
+    args = parser.parse_args()
+
+    for nb_articles in args.articles:
+        print(f"\n{nb_articles} articles :")
+        methodes = [("flux", flux)] if args.par_entrepot else [("ancien", ancien), ("flux", flux)]
+        for nom, fonction in methodes:
+            debut = time.perf_counter()
+            fonction(articles_exemple(nb_articles, args.par_entrepot), args.par_entrepot)
+            print(f"   {nom:<8} {time.perf_counter() - debut:7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Mesure de la latence d'un scan en caisse juste après une vente
+
+    python benchmarks/bench_scan.py [--articles 20000] [--scans 1000]
+
+Sur une base temporaire de N articles, avec le catalogue déjà en mémoire :
+  - premier scan     : le premier resoudre_scan qui suit record_sale
+  - scans suivants   : médiane et maximum sur les scans suivants
+  - rechargement     : un chargement complet du catalogue, pour comparaison
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from utils.scanner import resoudre_scan
+
+
+def base_exemple(dossier, nb_articles):
+    db = DatabaseManager(os.path.join(dossier, "vente.db"))
+    with db.writer() as conn:
+        conn.executemany(
+            "INSERT INTO article (nom, reference, entrepot_id) VALUES (?, ?, 1)",
+            [(f"Article {i}", f"REF{i}") for i in range(nb_articles)]
+        )
+        conn.execute("""
+            INSERT OR IGNORE INTO prix_article (article_id, unite_id, prix_unitaire)
+            SELECT id, 1, 100 FROM article
+        """)
+    return db
+
+
+def mesurer_ms(fonction, *args):
+    debut = time.perf_counter()
+    fonction(*args)
+    return (time.perf_counter() - debut) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence d'un scan après une vente")
+    parser.add_argument("--articles", type=int, default=20000, help="Taille du catalogue")
+    parser.add_argument("--scans", type=int, default=1000, help="Nombre de scans mesurés")
+    args = parser.parse_args()
+
+    dossier = tempfile.mkdtemp()
+    try:
+        db = base_exemple(dossier, args.articles)
+        db.catalog.warm_up()
+
+        article, unite, _ = resoudre_scan(db.catalog, "REF42")
+        db.record_sale("Client", "2024-01-15", [(article['id'], unite[0], 2, unite[3])])
+
+        premier = mesurer_ms(resoudre_scan, db.catalog, "3*REF43")
+        durees = [
+            mesurer_ms(resoudre_scan, db.catalog, f"REF{i % args.articles}")
+            for i in range(args.scans)
+        ]
+        rechargement = mesurer_ms(db.catalog._load)
+
+        print(f"\n{args.articles} articles :")
+        print(f"   premier scan      {premier:8.3f} ms")
+        print(f"   scans (médiane)   {statistics.median(durees):8.3f} ms")
+        print(f"   scans (maximum)   {max(durees):8.3f} ms")
+        print(f"   rechargement      {rechargement:8.3f} ms")
+        db.close()
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
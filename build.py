@@ -20,6 +20,17 @@ def build_exe():
         "--hidden-import=PIL.Image",
         "--hidden-import=PIL.ImageTk",
         "--hidden-import=reportlab",
+        "--hidden-import=pypdf",
+        # Pages importées à la demande par MainApp (invisibles pour l'analyse)
+        "--hidden-import=ui.pages.home_page",
+        "--hidden-import=ui.pages.unite_page",
+        "--hidden-import=ui.pages.article_page",
+        "--hidden-import=ui.pages.rapport_page",
+        "--hidden-import=ui.pages.entrepot_page",
+        "--hidden-import=ui.pages.inventaire_page",
+        # Module chargé par le processus d'impression
+        "--hidden-import=utils.pdf_generator",
+        "--hidden-import=utils.export_factures",
         "main.py"
     ]
 
@@ -0,0 +1,145 @@
+import threading
+import time
+
+# Intervalle minimal entre deux vérifications de PRAGMA data_version (secondes)
+DATA_VERSION_INTERVAL = 1.0
+
+# Tables dont dépend le catalogue : les ventes ne l'invalident pas
+TABLES_CATALOGUE = frozenset({"article", "prix_article", "unite", "entrepot"})
+
+# Tables dont dépend la vue d'ensemble des entrepôts (statistiques tenues par triggers)
+TABLES_ENTREPOTS = frozenset({"entrepot", "entrepot_stats", "entrepot_unite_stats"})
+
+
+class CatalogCache:
+    """Cache mémoire du catalogue : articles, unités, matrice des prix et entrepôts.
+
+    Invalidé par les écritures de ce processus sur les tables du catalogue et
+    par PRAGMA data_version pour les écritures venant d'autres processus. La
+    vue d'ensemble des entrepôts a son propre jeton : une vente l'invalide
+    sans toucher au catalogue, et inversement.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.connections = db.connections
+        self._lock = threading.Lock()
+        self._overview_lock = threading.Lock()
+        # Couples (jeton, données) remplacés d'un seul bloc : un thread ne voit
+        # jamais les données d'une version avec le jeton d'une autre
+        self._etat = (None, None)
+        self._etat_overview = (None, None)
+        self._verification = (0.0, None)  # (instant, version_externe)
+
+    def _jeton(self, tables):
+        """Jeton de validité des données lues dans `tables`"""
+        now = time.monotonic()
+        checked_at, version_externe = self._verification
+        if version_externe is None or now - checked_at >= DATA_VERSION_INTERVAL:
+            version_externe = self.connections.verifier_externe()
+            self._verification = (now, version_externe)
+        return self.connections.generation(tables), version_externe
+
+    def _snapshot(self):
+        """Retourne les données à jour, en rechargeant si nécessaire"""
+        jeton_data, data = self._etat
+        if data is not None and self._jeton(TABLES_CATALOGUE) == jeton_data:
+            return data
+
+        with self._lock:
+            # Jeton relevé avant la lecture : une écriture concurrente
+            # provoquera un nouveau rechargement au prochain accès
+            jeton = self._jeton(TABLES_CATALOGUE)
+            jeton_data, data = self._etat
+            if data is None or jeton != jeton_data:
+                data = self._load()
+                self._etat = (jeton, data)
+            return data
+
+    def _load(self):
+        catalogue = self.db.load_catalog()
+        articles = {article['id']: article for article in catalogue}
+        unites = {unite[0]: unite for unite in self.db.get_all_unites()}
+        return {
+            'catalogue': catalogue,
+            'articles': articles,
+            'references': {article['reference'].upper(): article for article in catalogue},
+            'prix': {
+                (article['id'], unite[0]): unite[3]
+                for article in catalogue
+                for unite in article['unites']
+            },
+            'unites': unites,
+            'unites_par_code': {unite[1].upper(): unite for unite in unites.values()},
+            'entrepots': {entrepot[0]: entrepot for entrepot in self.db.get_all_entrepots()},
+        }
+
+    def invalidate(self):
+        """Force le rechargement au prochain accès"""
+        with self._lock, self._overview_lock:
+            self._etat = (None, None)
+            self._etat_overview = (None, None)
+
+    def warm_up(self):
+        """Charge le catalogue s'il ne l'est pas déjà"""
+        self._snapshot()
+
+    # =============== ACCÈS ===============
+
+    def articles(self):
+        """Articles actifs triés par nom"""
+        return self._snapshot()['catalogue']
+
+    def article(self, article_id):
+        return self._snapshot()['articles'].get(int(article_id))
+
+    def article_par_reference(self, reference):
+        return self._snapshot()['references'].get(reference.strip().upper())
+
+    def unites_article(self, article_id):
+        """Tuples (unite_id, code, libelle, prix_unitaire) d'un article"""
+        article = self.article(article_id)
+        return article['unites'] if article else []
+
+    def prix(self, article_id, unite_id):
+        return self._snapshot()['prix'].get((int(article_id), int(unite_id)))
+
+    def unite(self, unite_id):
+        return self._snapshot()['unites'].get(int(unite_id))
+
+    def unite_par_code(self, code):
+        return self._snapshot()['unites_par_code'].get(code.strip().upper())
+
+    def entrepot(self, entrepot_id):
+        return self._snapshot()['entrepots'].get(int(entrepot_id))
+
+    def entrepots(self):
+        return list(self._snapshot()['entrepots'].values())
+
+    def entrepots_overview(self):
+        """Statistiques de tous les entrepôts, conservées indépendamment du catalogue"""
+        jeton_overview, overview = self._etat_overview
+        if overview is not None and self._jeton(TABLES_ENTREPOTS) == jeton_overview:
+            return overview
+
+        with self._overview_lock:
+            jeton = self._jeton(TABLES_ENTREPOTS)
+            jeton_overview, overview = self._etat_overview
+            if overview is None or jeton != jeton_overview:
+                overview = self.db.get_entrepots_overview()
+                self._etat_overview = (jeton, overview)
+            return overview
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(db):
+    """Retourne le cache de catalogue partagé pour la base de ce gestionnaire"""
+    with _caches_lock:
+        cache = _caches.get(db.db_path)
+        if cache is None:
+            cache = CatalogCache(db)
+            _caches[db.db_path] = cache
+        return cache
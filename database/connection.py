@@ -0,0 +1,174 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# PRAGMAs appliqués une seule fois à l'ouverture de chaque connexion
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",       # ~16 Mo de cache de pages
+    "PRAGMA mmap_size = 134217728",     # 128 Mo mappés en mémoire
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+# Actions de l'autorisateur SQLite qui modifient une table
+_ECRITURES = (sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE)
+
+
+def open_connection(db_path, cached_statements=128):
+    """Ouvre une connexion SQLite avec les PRAGMAs de performance"""
+    # check_same_thread=False : les connexions de lecture restent propres à leur
+    # thread, mais doivent pouvoir être fermées depuis le thread principal
+    conn = sqlite3.connect(db_path, timeout=5.0, check_same_thread=False,
+                           cached_statements=cached_statements)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionManager:
+    """Garde une connexion d'écriture unique et une connexion de lecture par thread"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        # Écritures validées par ce processus, par table (y compris via les triggers)
+        self._generations = {}
+        # Écritures validées par d'autres connexions ou processus (PRAGMA data_version)
+        self.version_externe = 0
+        self._data_version = None
+        self._version_lock = threading.Lock()
+        self._probe = None
+        self._probe_lock = threading.Lock()
+        # Tables modifiées par la transaction en cours, et abonnés aux changements
+        self._tables_modifiees = set()
+        self._profondeur = 0
+        self._listeners = []
+
+    def _get_writer(self):
+        if self._writer is None:
+            # Sans cache de requêtes : l'autorisateur n'est appelé qu'à la
+            # préparation, il faut donc préparer chaque écriture
+            self._writer = open_connection(self.db_path, cached_statements=0)
+            self._writer.set_authorizer(self._autoriser)
+        return self._writer
+
+    def _autoriser(self, action, table, *args):
+        """Relève les tables modifiées (y compris par les triggers)"""
+        if action in _ECRITURES:
+            self._tables_modifiees.add(table)
+        return sqlite3.SQLITE_OK
+
+    def add_listener(self, callback):
+        """Abonne callback(tables) aux écritures validées de ce processus.
+
+        Le callback est appelé dans le thread qui a écrit : il doit se
+        contenter de noter le changement.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _get_reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_connection(self.db_path)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def reader(self):
+        """Prête la connexion de lecture du thread courant"""
+        yield self._get_reader()
+
+    @contextmanager
+    def writer(self):
+        """Prête la connexion d'écriture : commit en sortie, rollback en cas d'erreur"""
+        with self._writer_lock:
+            conn = self._get_writer()
+            if self._profondeur == 0:
+                self._tables_modifiees = set()
+            self._profondeur += 1
+            try:
+                yield conn
+                with self._version_lock:
+                    # Ce qui a changé avant notre commit vient d'ailleurs ;
+                    # le changement dû au commit lui-même n'est pas compté
+                    self._relever_version(externe=True)
+                    conn.commit()
+                    self._relever_version(externe=False)
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._profondeur -= 1
+            tables = frozenset(self._tables_modifiees)
+            if tables and self._profondeur == 0:
+                for table in tables:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                for callback in list(self._listeners):
+                    callback(tables)
+
+    def generation(self, tables):
+        """Compteur des écritures validées par ce processus sur l'une des `tables`"""
+        return sum(self._generations.get(table, 0) for table in tables)
+
+    def _relever_version(self, externe):
+        version = self.data_version()
+        if externe and self._data_version is not None and version != self._data_version:
+            self.version_externe += 1
+        self._data_version = version
+
+    def verifier_externe(self):
+        """Relève les écritures des autres processus ; retourne version_externe"""
+        with self._version_lock:
+            self._relever_version(externe=True)
+        return self.version_externe
+
+    def data_version(self):
+        """PRAGMA data_version d'une connexion dédiée : change quand une autre
+        connexion (ou un autre processus) valide une écriture"""
+        with self._probe_lock:
+            if self._probe is None:
+                self._probe = open_connection(self.db_path)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes"""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._probe_lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path):
+    """Retourne le gestionnaire de connexions partagé pour ce fichier"""
+    with _managers_lock:
+        manager = _managers.get(db_path)
+        if manager is None:
+            manager = ConnectionManager(db_path)
+            _managers[db_path] = manager
+        return manager
@@ -1,134 +1,292 @@
 import sqlite3
 from datetime import datetime
 import os
+import re
+from database.connection import get_connection_manager, open_connection
+
+# Tris autorisés pour les recherches de factures (jamais de SQL fourni par
+# l'appelant) : colonne de tri, sens, et rang de la colonne dans la ligne
+# facture (clé de pagination avec l'id)
+TRIS_FACTURES = {
+    'date_desc': ('date_facture', 'DESC', 2),
+    'date_asc': ('date_facture', 'ASC', 2),
+    'montant_desc': ('montant_total', 'DESC', 3),
+    'montant_asc': ('montant_total', 'ASC', 3),
+    'client': ('nom_client COLLATE NOCASE', 'ASC', 1),
+}
 
 class DatabaseManager:
-    def __init__(self):
-        self.db_path = 'database/vente.db'
+    def __init__(self, db_path='database/vente.db'):
+        self.db_path = db_path
         self.ensure_db_exists()
+        self.connections = get_connection_manager(self.db_path)
     
     def ensure_db_exists(self):
         """Assure que la base de données existe"""
         if not os.path.exists(self.db_path):
             from database.init_db import init_database
-            init_database()
+            init_database(self.db_path)
     
     def get_connection(self):
-        """Retourne une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
+        """Retourne une nouvelle connexion indépendante (à fermer par l'appelant)"""
+        return open_connection(self.db_path)
+    
+    def reader(self):
+        """Emprunte la connexion de lecture du thread courant"""
+        return self.connections.reader()
+    
+    def writer(self):
+        """Emprunte la connexion d'écriture (transaction validée en sortie)"""
+        return self.connections.writer()
+    
+    def close(self):
+        """Ferme les connexions partagées"""
+        self.connections.close()
+    
+    @property
+    def catalog(self):
+        """Cache mémoire du catalogue partagé par tout le processus"""
+        from database.catalog_cache import get_catalog_cache
+        return get_catalog_cache(self)
     
     # =============== GESTION DES UNITÉS ===============
     
     def get_all_unites(self):
         """Récupère toutes les unités"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM unite ORDER BY libelle")
-        unites = cursor.fetchall()
-        conn.close()
-        return unites
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM unite ORDER BY libelle").fetchall()
     
     def create_unite(self, code, libelle):
         """Crée une nouvelle unité"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO unite (code, libelle) VALUES (?, ?)", (code, libelle))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("INSERT INTO unite (code, libelle) VALUES (?, ?)", (code, libelle))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def update_unite(self, id, code, libelle):
         """Met à jour une unité"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("UPDATE unite SET code = ?, libelle = ? WHERE id = ?", (code, libelle, id))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("UPDATE unite SET code = ?, libelle = ? WHERE id = ?", (code, libelle, id))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def delete_unite(self, id):
         """Supprime une unité"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("DELETE FROM unite WHERE id = ?", (id,))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("DELETE FROM unite WHERE id = ?", (id,))
             return True
         except:
             return False
-        finally:
-            conn.close()
     
     # =============== GESTION DES ARTICLES ===============
     
     def get_all_articles(self):
         """Récupère tous les articles actifs"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM article WHERE actif = 1 ORDER BY nom")
-        articles = cursor.fetchall()
-        conn.close()
-        return articles
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM article WHERE actif = 1 ORDER BY nom").fetchall()
+    
+    def load_catalog(self, article_ids=None):
+        """Charge les articles actifs avec leurs unités/prix et leur entrepôt en une requête.
+
+        Retourne une liste de dictionnaires triée par nom ; `unites` contient des
+        tuples (unite_id, code, libelle, prix_unitaire) triés par libellé.
+        `article_ids` restreint le chargement à ces articles.
+        """
+        condition = ""
+        params = []
+        if article_ids is not None:
+            article_ids = list(article_ids)
+            condition = f"AND a.id IN ({', '.join('?' * len(article_ids))})"
+            params = article_ids
+        with self.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT a.id, a.nom, a.reference, a.entrepot_id, e.nom,
+                       GROUP_CONCAT(
+                           pa.unite_id || char(31) || u.code || char(31) || u.libelle || char(31) || pa.prix_unitaire,
+                           char(30)
+                       )
+                FROM article a
+                LEFT JOIN entrepot e ON e.id = a.entrepot_id
+                LEFT JOIN prix_article pa ON pa.article_id = a.id
+                LEFT JOIN unite u ON u.id = pa.unite_id
+                WHERE a.actif = 1 {condition}
+                GROUP BY a.id
+                ORDER BY a.nom
+            """, params).fetchall()
+        
+        catalogue = []
+        for article_id, nom, reference, entrepot_id, entrepot_nom, unites_concat in rows:
+            unites = []
+            if unites_concat:
+                for unite in unites_concat.split('\x1e'):
+                    unite_id, code, libelle, prix = unite.split('\x1f')
+                    unites.append((int(unite_id), code, libelle, float(prix)))
+                unites.sort(key=lambda u: u[2])
+            catalogue.append({
+                'id': article_id,
+                'nom': nom,
+                'reference': reference,
+                'entrepot_id': entrepot_id,
+                'entrepot_nom': entrepot_nom,
+                'unites': unites,
+            })
+        return catalogue
+
+    def iter_inventaire(self, par_entrepot=False, taille_lot=1000):
+        """Parcourt les articles actifs pour l'inventaire sans charger tout le catalogue.
+
+        Produit des tuples (id, nom, reference, entrepot_id, entrepot_nom) lus
+        par lots de `taille_lot` sur le curseur ; triés par nom, ou par
+        entrepôt puis nom avec `par_entrepot` (articles non assignés à la fin).
+        """
+        if par_entrepot:
+            ordre = "e.nom IS NULL, e.nom, a.entrepot_id, a.nom, a.id"
+        else:
+            ordre = "a.nom, a.id"
+        with self.reader() as conn:
+            cursor = conn.execute(f"""
+                SELECT a.id, a.nom, a.reference, a.entrepot_id, e.nom
+                FROM article a
+                LEFT JOIN entrepot e ON e.id = a.entrepot_id
+                WHERE a.actif = 1
+                ORDER BY {ordre}
+            """)
+            try:
+                while True:
+                    lot = cursor.fetchmany(taille_lot)
+                    if not lot:
+                        break
+                    yield from lot
+            finally:
+                cursor.close()
+
+    def search_articles(self, query, limit=20):
+        """Recherche les articles actifs par nom ou référence, classés par pertinence.
+
+        Chaque mot saisi est cherché en préfixe, sans tenir compte des accents.
+        Les articles dont le nom ou la référence contient les mots saisis
+        (« 001 » pour RIZ001) complètent ensuite les résultats. Retourne des tuples (id, nom, reference) ;
+        `limit=None` pour tout retourner.
+        """
+        termes = re.findall(r"\w+", query)
+        if not termes:
+            return []
+        limite = -1 if limit is None else limit
+        
+        with self.reader() as conn:
+            if self._fts_disponible(conn):
+                correspondance = " ".join(f'"{terme}"*' for terme in termes)
+                articles = conn.execute("""
+                    SELECT a.id, a.nom, a.reference
+                    FROM article_fts
+                    JOIN article a ON a.id = article_fts.rowid
+                    WHERE article_fts MATCH ? AND a.actif = 1
+                    ORDER BY bm25(article_fts, 2.0, 1.0)
+                    LIMIT ?
+                """, (correspondance, limite)).fetchall()
+                if limit is None or len(articles) < limit:
+                    articles += self._search_infixes(conn, termes, articles, limit)
+                return articles
+            
+            # Sans FTS5 : chaque mot doit apparaître dans le nom ou la référence
+            conditions = " AND ".join("(nom LIKE ? OR reference LIKE ?)" for _ in termes)
+            params = [motif for terme in termes for motif in (f"%{terme}%", f"%{terme}%")]
+            return conn.execute(
+                f"SELECT id, nom, reference FROM article WHERE actif = 1 AND {conditions} ORDER BY nom LIMIT ?",
+                params + [limite]
+            ).fetchall()
+    
+    def _search_infixes(self, conn, termes, trouves, limit):
+        """Articles dont le nom ou la référence contient chaque mot, hors ceux déjà `trouves`.
+
+        Passe par l'index trigramme, sinon par LIKE. Seuls les mots de 3
+        caractères ou plus sont cherchés : les plus courts sont déjà couverts
+        par la recherche en préfixe.
+        """
+        termes = [terme for terme in termes if len(terme) >= 3]
+        if not termes:
+            return []
+        exclus = [article[0] for article in trouves]
+        restant = -1 if limit is None else limit - len(exclus)
+        exclusion = f"AND a.id NOT IN ({', '.join('?' * len(exclus))})" if exclus else ""
+        
+        if self._fts_disponible(conn, 'article_trigram_fts'):
+            correspondance = " ".join(f'"{terme}"' for terme in termes)
+            return conn.execute(f"""
+                SELECT a.id, a.nom, a.reference
+                FROM article_trigram_fts
+                JOIN article a ON a.id = article_trigram_fts.rowid
+                WHERE article_trigram_fts MATCH ? AND a.actif = 1 {exclusion}
+                ORDER BY length(a.reference), a.reference
+                LIMIT ?
+            """, [correspondance] + exclus + [restant]).fetchall()
+        
+        conditions = " AND ".join("(a.nom LIKE ? OR a.reference LIKE ?)" for _ in termes)
+        params = [motif for terme in termes for motif in (f"%{terme}%", f"%{terme}%")]
+        return conn.execute(f"""
+            SELECT a.id, a.nom, a.reference
+            FROM article a
+            WHERE a.actif = 1 AND {conditions} {exclusion}
+            ORDER BY length(a.reference), a.reference
+            LIMIT ?
+        """, params + exclus + [restant]).fetchall()
+    
+    def _fts_disponible(self, conn, table='article_fts'):
+        if not hasattr(self, '_fts'):
+            self._fts = {}
+        if table not in self._fts:
+            self._fts[table] = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone() is not None
+        return self._fts[table]
     
     def create_article(self, nom, reference, entrepot_id=None):
         """Crée un nouveau article"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO article (nom, reference, entrepot_id) VALUES (?, ?, ?)", (nom, reference, entrepot_id))
-            conn.commit()
+            with self.writer() as conn:
+                cursor = conn.execute("INSERT INTO article (nom, reference, entrepot_id) VALUES (?, ?, ?)", (nom, reference, entrepot_id))
             return cursor.lastrowid
         except sqlite3.IntegrityError:
             return None
-        finally:
-            conn.close()
     
     def update_article(self, id, nom, reference, entrepot_id=None):
         """Met à jour un article"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("UPDATE article SET nom = ?, reference = ?, entrepot_id = ? WHERE id = ?", (nom, reference, entrepot_id, id))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("UPDATE article SET nom = ?, reference = ?, entrepot_id = ? WHERE id = ?", (nom, reference, entrepot_id, id))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def delete_article(self, article_id):
         """Désactive un article au lieu de le supprimer"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            # Vérifier si l'article existe
-            cursor.execute("SELECT * FROM article WHERE id = ?", (article_id,))
-            article = cursor.fetchone()
-            if not article:
-                print(f"Erreur : Article avec ID {article_id} non trouvé.")
-                return False
-
-            # Vérifier le statut actuel de l'article
-            cursor.execute("SELECT actif FROM article WHERE id = ?", (article_id,))
-            statut_actuel = cursor.fetchone()[0]
-            print(f"Statut actuel de l'article : {statut_actuel}")
-
-            # Mettre à jour le statut de l'article à inactif
-            cursor.execute("UPDATE article SET actif = 0 WHERE id = ?", (article_id,))
-            conn.commit()
-            
-            # Vérifier que la mise à jour a bien été effectuée
-            cursor.execute("SELECT actif FROM article WHERE id = ?", (article_id,))
-            nouveau_statut = cursor.fetchone()[0]
-            print(f"Nouveau statut de l'article : {nouveau_statut}")
+            with self.writer() as conn:
+                cursor = conn.cursor()
+                # Vérifier si l'article existe
+                cursor.execute("SELECT * FROM article WHERE id = ?", (article_id,))
+                article = cursor.fetchone()
+                if not article:
+                    print(f"Erreur : Article avec ID {article_id} non trouvé.")
+                    return False
+
+                # Vérifier le statut actuel de l'article
+                cursor.execute("SELECT actif FROM article WHERE id = ?", (article_id,))
+                statut_actuel = cursor.fetchone()[0]
+                print(f"Statut actuel de l'article : {statut_actuel}")
+
+                # Mettre à jour le statut de l'article à inactif
+                cursor.execute("UPDATE article SET actif = 0 WHERE id = ?", (article_id,))
+                
+                # Vérifier que la mise à jour a bien été effectuée
+                cursor.execute("SELECT actif FROM article WHERE id = ?", (article_id,))
+                nouveau_statut = cursor.fetchone()[0]
+                print(f"Nouveau statut de l'article : {nouveau_statut}")
             
             return True
         except Exception as e:
@@ -136,417 +294,569 @@ class DatabaseManager:
             import traceback
             traceback.print_exc()
             return False
-        finally:
-            conn.close()
     
     # =============== GESTION DES PRIX ===============
     
     def get_prix_by_article(self, article_id):
         """Récupère les prix d'un article avec les détails des unités"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT pa.id, pa.article_id, pa.unite_id, pa.prix_unitaire, u.code, u.libelle 
-            FROM prix_article pa
-            JOIN unite u ON pa.unite_id = u.id
-            WHERE pa.article_id = ?
-            ORDER BY u.libelle
-        """, (article_id,))
-        prix = cursor.fetchall()
-        conn.close()
-        return prix
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT pa.id, pa.article_id, pa.unite_id, pa.prix_unitaire, u.code, u.libelle 
+                FROM prix_article pa
+                JOIN unite u ON pa.unite_id = u.id
+                WHERE pa.article_id = ?
+                ORDER BY u.libelle
+            """, (article_id,)).fetchall()
     
     def get_unites_by_article(self, article_id):
         """Récupère les unités disponibles pour un article"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT u.id, u.code, u.libelle, pa.prix_unitaire
-            FROM unite u
-            JOIN prix_article pa ON u.id = pa.unite_id
-            WHERE pa.article_id = ?
-            ORDER BY u.libelle
-        """, (article_id,))
-        unites = cursor.fetchall()
-        conn.close()
-        return unites
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT u.id, u.code, u.libelle, pa.prix_unitaire
+                FROM unite u
+                JOIN prix_article pa ON u.id = pa.unite_id
+                WHERE pa.article_id = ?
+                ORDER BY u.libelle
+            """, (article_id,)).fetchall()
     
     def get_prix_unitaire(self, article_id, unite_id):
         """Récupère le prix unitaire d'un article pour une unité donnée"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT prix_unitaire 
-            FROM prix_article 
-            WHERE article_id = ? AND unite_id = ?
-        """, (article_id, unite_id))
-        result = cursor.fetchone()
-        conn.close()
+        with self.reader() as conn:
+            result = conn.execute("""
+                SELECT prix_unitaire 
+                FROM prix_article 
+                WHERE article_id = ? AND unite_id = ?
+            """, (article_id, unite_id)).fetchone()
         return result[0] if result else None
     
     def create_prix(self, article_id, unite_id, prix_unitaire):
         """Crée un nouveau prix pour un article/unité"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("""
-                INSERT INTO prix_article (article_id, unite_id, prix_unitaire) 
-                VALUES (?, ?, ?)
-            """, (article_id, unite_id, prix_unitaire))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("""
+                    INSERT INTO prix_article (article_id, unite_id, prix_unitaire) 
+                    VALUES (?, ?, ?)
+                """, (article_id, unite_id, prix_unitaire))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
     
     def update_prix(self, article_id, unite_id, prix_unitaire):
         """Met à jour le prix d'un article/unité"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("""
-                UPDATE prix_article 
-                SET prix_unitaire = ? 
-                WHERE article_id = ? AND unite_id = ?
-            """, (prix_unitaire, article_id, unite_id))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("""
+                    UPDATE prix_article 
+                    SET prix_unitaire = ? 
+                    WHERE article_id = ? AND unite_id = ?
+                """, (prix_unitaire, article_id, unite_id))
             return True
         except:
             return False
-        finally:
-            conn.close()
     
     def delete_prix(self, article_id, unite_id):
         """Supprime un prix"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("DELETE FROM prix_article WHERE article_id = ? AND unite_id = ?", (article_id, unite_id))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("DELETE FROM prix_article WHERE article_id = ? AND unite_id = ?", (article_id, unite_id))
             return True
         except:
             return False
-        finally:
-            conn.close()
+    
+    def delete_all_prix_article(self, article_id):
+        """Supprime tous les prix d'un article"""
+        with self.writer() as conn:
+            conn.execute("DELETE FROM prix_article WHERE article_id = ?", (article_id,))
     
     # =============== GESTION DES FACTURES ===============
     
     def create_facture(self, nom_client, date_facture, montant_total):
         """Crée une nouvelle facture"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("""
-                INSERT INTO facture (nom_client, date_facture, montant_total) 
-                VALUES (?, ?, ?)
-            """, (nom_client, date_facture, montant_total))
-            conn.commit()
+            with self.writer() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO facture (nom_client, date_facture, montant_total) 
+                    VALUES (?, ?, ?)
+                """, (nom_client, date_facture, montant_total))
             return cursor.lastrowid
         except:
             return None
-        finally:
-            conn.close()
     
     def add_article_to_facture(self, facture_id, article_id, unite_id, quantite, prix_unitaire):
         """Ajoute un article à une facture"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
             prix_total = quantite * prix_unitaire
-            cursor.execute("""
-                INSERT INTO facture_detail (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("""
+                    INSERT INTO facture_detail (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total))
             return True
         except:
             return False
-        finally:
-            conn.close()
     
     def get_facture_details(self, facture_id):
         """Récupère les détails d'une facture"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT fd.*, 
-                   a.nom as article_nom, 
-                   u.libelle as unite_libelle,
-                   e.nom as entrepot_nom
-            FROM facture_detail fd
-            JOIN article a ON fd.article_id = a.id
-            JOIN unite u ON fd.unite_id = u.id
-            LEFT JOIN entrepot e ON a.entrepot_id = e.id
-            WHERE fd.facture_id = ?
-        """, (facture_id,))
-        details = cursor.fetchall()
-        conn.close()
-        return details
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT fd.*, 
+                       a.nom as article_nom, 
+                       u.libelle as unite_libelle,
+                       e.nom as entrepot_nom
+                FROM facture_detail fd
+                JOIN article a ON fd.article_id = a.id
+                JOIN unite u ON fd.unite_id = u.id
+                LEFT JOIN entrepot e ON a.entrepot_id = e.id
+                WHERE fd.facture_id = ?
+            """, (facture_id,)).fetchall()
+    
+    def get_factures_export(self, facture_ids=None, **filtres):
+        """Factures et leurs lignes pour un export par lot, en deux requêtes.
+
+        Sélection par `facture_ids` ou par les filtres de search_factures_page
+        (date_from, date_to, client_like...). Retourne une liste de tuples
+        (facture, details) triée par date puis numéro, au format de
+        get_facture_by_id / get_facture_details.
+        """
+        if facture_ids is not None:
+            facture_ids = [int(facture_id) for facture_id in facture_ids]
+            if not facture_ids:
+                return []
+            conditions = [f"id IN ({', '.join('?' * len(facture_ids))})"]
+            params = facture_ids
+        else:
+            conditions, params = self._filtres_factures(**filtres)
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        
+        with self.reader() as conn:
+            factures = conn.execute(
+                f"SELECT * FROM facture{where} ORDER BY date_facture, id", params
+            ).fetchall()
+            details = conn.execute(f"""
+                SELECT fd.*, 
+                       a.nom as article_nom, 
+                       u.libelle as unite_libelle,
+                       e.nom as entrepot_nom
+                FROM facture_detail fd
+                JOIN article a ON fd.article_id = a.id
+                JOIN unite u ON fd.unite_id = u.id
+                LEFT JOIN entrepot e ON a.entrepot_id = e.id
+                WHERE fd.facture_id IN (SELECT id FROM facture{where})
+                ORDER BY fd.facture_id, fd.id
+            """, params).fetchall()
+        
+        par_facture = {}
+        for detail in details:
+            par_facture.setdefault(detail[1], []).append(detail)
+        return [(facture, par_facture.get(facture[0], [])) for facture in factures]
     
     def get_all_factures(self):
         """Récupère toutes les factures"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM facture ORDER BY date_facture DESC")
-        factures = cursor.fetchall()
-        conn.close()
-        return factures
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM facture ORDER BY date_facture DESC").fetchall()
+    
+    def _filtres_factures(self, client_like=None, date_from=None, date_to=None,
+                          montant_min=None, montant_max=None):
+        """Construit les conditions WHERE communes aux recherches de factures"""
+        conditions = []
+        params = []
+        if client_like:
+            conditions.append("nom_client LIKE ? ESCAPE '\\'")
+            echappe = client_like.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{echappe}%")
+        if date_from:
+            conditions.append("date_facture >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("date_facture <= ?")
+            params.append(date_to)
+        if montant_min is not None:
+            conditions.append("montant_total >= ?")
+            params.append(montant_min)
+        if montant_max is not None:
+            conditions.append("montant_total <= ?")
+            params.append(montant_max)
+        return conditions, params
+    
+    def search_factures(self, client_like=None, date_from=None, date_to=None,
+                        montant_min=None, montant_max=None, order_by='date_desc',
+                        limit=None, offset=0):
+        """Recherche les factures avec filtres, tri et pagination en une requête.
+
+        Les bornes de dates sont inclusives (format AAAA-MM-JJ) et utilisent
+        l'index sur facture(date_facture). `order_by` est une clé de TRIS_FACTURES.
+        """
+        conditions, params = self._filtres_factures(client_like, date_from, date_to, montant_min, montant_max)
+        colonne, sens, _ = TRIS_FACTURES[order_by]
+        
+        sql = "SELECT * FROM facture"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {colonne} {sens}, id {sens}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+    
+    def count_factures(self, **filtres):
+        """Nombre de factures correspondant aux filtres de search_factures_page"""
+        conditions, params = self._filtres_factures(**filtres)
+        sql = "SELECT COUNT(*) FROM facture"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+    
+    @staticmethod
+    def cle_facture(facture, order_by='date_desc'):
+        """Clé de pagination d'une ligne facture pour le tri `order_by`"""
+        return facture[TRIS_FACTURES[order_by][2]], facture[0]
+    
+    def search_factures_page(self, apres=None, avant=None, limit=200, order_by='date_desc',
+                             offset=0, **filtres):
+        """Page de factures triées selon `order_by` (clé de TRIS_FACTURES), par clé.
+
+        `apres` : clé (valeur triée, id) de la dernière ligne affichée -> page suivante.
+        `avant` : clé de la première ligne affichée -> page précédente.
+        `offset` : sans clé, saute ce nombre de lignes (accès direct par la barre
+        de défilement, le défilement normal reste par clé).
+        Les clés sont celles de cle_facture. Les lignes sont toujours
+        retournées dans l'ordre du tri.
+        """
+        colonne, sens, _ = TRIS_FACTURES[order_by]
+        suivant, inverse = ("<", "ASC") if sens == "DESC" else (">", "DESC")
+        precedent = ">" if suivant == "<" else "<"
+        
+        conditions, params = self._filtres_factures(**filtres)
+        ordre = sens
+        if apres is not None:
+            conditions.append(f"({colonne}, id) {suivant} (?, ?)")
+            params.extend(apres)
+        elif avant is not None:
+            conditions.append(f"({colonne}, id) {precedent} (?, ?)")
+            params.extend(avant)
+            ordre = inverse
+        
+        sql = "SELECT * FROM facture"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {colonne} {ordre}, id {ordre} LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        
+        with self.reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        if ordre != sens:
+            rows.reverse()
+        return rows
     
+    # =============== STATISTIQUES DE VENTES ===============
+    def _filtres_periode(self, date_from=None, date_to=None):
+        """Conditions WHERE sur le jour de ventes_journalieres"""
+        conditions = []
+        params = []
+        if date_from:
+            conditions.append("jour >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("jour <= ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def get_totaux_periode(self, date_from=None, date_to=None):
+        """Quantité vendue, chiffre d'affaires et nombre de lignes sur une période"""
+        where, params = self._filtres_periode(date_from, date_to)
+        with self.reader() as conn:
+            quantite, chiffre_affaires, nb_lignes = conn.execute(f"""
+                SELECT ROUND(COALESCE(SUM(quantite), 0), 2),
+                       ROUND(COALESCE(SUM(chiffre_affaires), 0), 2),
+                       COALESCE(SUM(nb_lignes), 0)
+                FROM ventes_journalieres
+                {where}
+            """, params).fetchone()
+        return {
+            'quantite': quantite,
+            'chiffre_affaires': chiffre_affaires,
+            'nb_lignes': nb_lignes
+        }
+
+    def get_meilleures_ventes(self, date_from=None, date_to=None, limit=10):
+        """Articles les plus vendus (en chiffre d'affaires) sur une période"""
+        where, params = self._filtres_periode(date_from, date_to)
+        with self.reader() as conn:
+            return conn.execute(f"""
+                SELECT v.article_id, a.nom, a.reference,
+                       ROUND(SUM(v.quantite), 2) AS quantite,
+                       ROUND(SUM(v.chiffre_affaires), 2) AS chiffre_affaires
+                FROM ventes_journalieres v
+                JOIN article a ON a.id = v.article_id
+                {where}
+                GROUP BY v.article_id
+                ORDER BY chiffre_affaires DESC
+                LIMIT ?
+            """, params + [limit]).fetchall()
+
+    def get_ventes_par_entrepot(self, date_from=None, date_to=None):
+        """Chiffre d'affaires par entrepôt sur une période (entrepot_id 0 : sans entrepôt)"""
+        where, params = self._filtres_periode(date_from, date_to)
+        with self.reader() as conn:
+            return conn.execute(f"""
+                SELECT v.entrepot_id, COALESCE(e.nom, 'Sans entrepôt'),
+                       ROUND(SUM(v.quantite), 2) AS quantite,
+                       ROUND(SUM(v.chiffre_affaires), 2) AS chiffre_affaires
+                FROM ventes_journalieres v
+                LEFT JOIN entrepot e ON e.id = v.entrepot_id
+                {where}
+                GROUP BY v.entrepot_id
+                ORDER BY chiffre_affaires DESC
+            """, params).fetchall()
+
     def get_facture_by_id(self, facture_id):
         """Récupère une facture par son ID"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM facture WHERE id = ?", (facture_id,))
-        facture = cursor.fetchone()
-        conn.close()
-        return facture
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM facture WHERE id = ?", (facture_id,)).fetchone()
+    
+    def get_facture_complete(self, facture_id):
+        """Retourne (facture, lignes) pour l'impression ; ValueError si la facture est introuvable ou vide"""
+        facture_info = self.get_facture_by_id(facture_id)
+        details = self.get_facture_details(facture_id)
+        if not facture_info or not details:
+            raise ValueError("Données de facture introuvables.")
+        return facture_info, details
     
     def get_prix_article_unite(self, article_id, unite_id):
         """Récupère le prix unitaire d'un article pour une unité donnée"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT prix_unitaire 
-            FROM prix_article 
-            WHERE article_id = ? AND unite_id = ?
-        """, (article_id, unite_id))
-        result = cursor.fetchone()
-        conn.close()
+        with self.reader() as conn:
+            result = conn.execute("""
+                SELECT prix_unitaire 
+                FROM prix_article 
+                WHERE article_id = ? AND unite_id = ?
+            """, (article_id, unite_id)).fetchone()
         return result[0] if result else None
     
     def add_unite(self, code, libelle):
         """Ajoute une nouvelle unité à la base de données"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO unite (code, libelle) VALUES (?, ?)", (code, libelle))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("INSERT INTO unite (code, libelle) VALUES (?, ?)", (code, libelle))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
 
     def get_all_articles_with_unite(self):
         """Récupère tous les articles avec leurs unités associées"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.id, a.nom, a.reference, a.unite_id, u.libelle
-            FROM article a
-            LEFT JOIN unite u ON a.unite_id = u.id
-            ORDER BY a.nom
-        """)
-        articles = cursor.fetchall()
-        conn.close()
-        return articles
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT a.id, a.nom, a.reference, a.unite_id, u.libelle
+                FROM article a
+                LEFT JOIN unite u ON a.unite_id = u.id
+                ORDER BY a.nom
+            """).fetchall()
     
     def add_article(self, nom, reference):
         """Ajoute un nouvel article dans la base de données."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO article (nom, reference) VALUES (?, ?)", (nom, reference))
-        conn.commit()
-        article_id = cursor.lastrowid  # Récupérer l'ID de l'article inséré
-        conn.close()
-        return article_id
+        with self.writer() as conn:
+            cursor = conn.execute("INSERT INTO article (nom, reference) VALUES (?, ?)", (nom, reference))
+        return cursor.lastrowid  # Récupérer l'ID de l'article inséré
 
     def add_prix_article(self, article_id, unite_id, prix):
         """Ajoute un prix pour un article et une unité donnée."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO prix_article (article_id, unite_id, prix_unitaire) VALUES (?, ?, ?)", (article_id, unite_id, prix))
-        conn.commit()
-        conn.close()
+        with self.writer() as conn:
+            conn.execute("INSERT INTO prix_article (article_id, unite_id, prix_unitaire) VALUES (?, ?, ?)", (article_id, unite_id, prix))
 
 
     def create_facture(self, nom_client, date_facture, montant_total):
         """Crée une nouvelle facture et retourne son ID."""
-        conn = self.get_connection()  # Utiliser get_connection
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO facture (nom_client, date_facture, montant_total) VALUES (?, ?, ?)",
-                        (nom_client, date_facture, montant_total))
-            conn.commit()
+            with self.writer() as conn:
+                cursor = conn.execute("INSERT INTO facture (nom_client, date_facture, montant_total) VALUES (?, ?, ?)",
+                            (nom_client, date_facture, montant_total))
             return cursor.lastrowid  # Retourne l'ID de la facture ajoutée
         except Exception as e:
             print(f"Erreur lors de la création de la facture: {e}")
             return None
-        finally:
-            conn.close()  # Fermer la connexion
 
     def add_facture_detail(self, facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total):
         """Enregistre les détails d'une facture."""
-        conn = self.get_connection()  # Utiliser get_connection
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO facture_detail (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total) VALUES (?, ?, ?, ?, ?, ?)",
-                        (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("INSERT INTO facture_detail (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total) VALUES (?, ?, ?, ?, ?, ?)",
+                            (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total))
         except Exception as e:
             print(f"Erreur lors de l'ajout des détails de la facture: {e}")
-        finally:
-            conn.close()  # Fermer la connexion
+
+    def record_sale(self, nom_client, date_facture, lignes):
+        """Enregistre une vente complète (en-tête + lignes) en une seule transaction.
+
+        `lignes` est une liste de tuples (article_id, unite_id, quantite, prix_unitaire).
+        Les totaux sont calculés par SQLite. Retourne l'ID de la facture.
+        """
+        with self.writer() as conn:
+            cursor = conn.execute(
+                "INSERT INTO facture (nom_client, date_facture, montant_total) VALUES (?, ?, 0)",
+                (nom_client, date_facture)
+            )
+            facture_id = cursor.lastrowid
+            conn.executemany("""
+                INSERT INTO facture_detail (facture_id, article_id, unite_id, quantite, prix_unitaire, prix_total)
+                VALUES (:facture_id, :article_id, :unite_id, :quantite, :prix_unitaire, :quantite * :prix_unitaire)
+            """, (
+                {
+                    'facture_id': facture_id,
+                    'article_id': article_id,
+                    'unite_id': unite_id,
+                    'quantite': quantite,
+                    'prix_unitaire': prix_unitaire,
+                }
+                for article_id, unite_id, quantite, prix_unitaire in lignes
+            ))
+            conn.execute("""
+                UPDATE facture
+                SET montant_total = (SELECT COALESCE(SUM(prix_total), 0) FROM facture_detail WHERE facture_id = ?)
+                WHERE id = ?
+            """, (facture_id, facture_id))
+        return facture_id
 
     def get_all_articles_inactifs(self):
         """Récupère tous les articles inactifs"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM article WHERE actif = 0 ORDER BY nom")
-        articles = cursor.fetchall()
-        conn.close()
-        return articles
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM article WHERE actif = 0 ORDER BY nom").fetchall()
 
     def reactivate_article(self, article_id):
         """Réactive un article"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("UPDATE article SET actif = 1 WHERE id = ?", (article_id,))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("UPDATE article SET actif = 1 WHERE id = ?", (article_id,))
             return True
         except Exception as e:
             print(f"Erreur lors de la réactivation de l'article : {e}")
             return False
-        finally:
-            conn.close()
 
     def delete_article_permanently(self, article_id):
         """Supprime définitivement un article et ses références"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            conn.execute('BEGIN')
-            
-            cursor.execute("DELETE FROM prix_article WHERE article_id = ?", (article_id,))
-            
-            cursor.execute("DELETE FROM facture_detail WHERE article_id = ?", (article_id,))
-            
-            cursor.execute("DELETE FROM article WHERE id = ?", (article_id,))
-            
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("DELETE FROM prix_article WHERE article_id = ?", (article_id,))
+                
+                conn.execute("DELETE FROM facture_detail WHERE article_id = ?", (article_id,))
+                
+                conn.execute("DELETE FROM article WHERE id = ?", (article_id,))
             return True
         except Exception as e:
-            conn.rollback()
             print(f"Erreur lors de la suppression définitive de l'article : {e}")
             return False
-        finally:
-            conn.close()
 
     # =============== GESTION DES ENTREPÔTS ===============
     def get_all_entrepots(self):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM entrepot ORDER BY nom")
-        entrepots = cursor.fetchall()
-        conn.close()
-        return entrepots
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM entrepot ORDER BY nom").fetchall()
 
     def create_entrepot(self, nom, localisation):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("INSERT INTO entrepot (nom, localisation) VALUES (?, ?)", (nom, localisation))
-            conn.commit()
+            with self.writer() as conn:
+                cursor = conn.execute("INSERT INTO entrepot (nom, localisation) VALUES (?, ?)", (nom, localisation))
             return cursor.lastrowid
         except sqlite3.IntegrityError:
             return None
-        finally:
-            conn.close()
 
     def update_entrepot(self, id, nom, localisation):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("UPDATE entrepot SET nom = ?, localisation = ? WHERE id = ?", (nom, localisation, id))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("UPDATE entrepot SET nom = ?, localisation = ? WHERE id = ?", (nom, localisation, id))
             return True
         except sqlite3.IntegrityError:
             return False
-        finally:
-            conn.close()
 
     def delete_entrepot(self, id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
         try:
-            cursor.execute("DELETE FROM entrepot WHERE id = ?", (id,))
-            conn.commit()
+            with self.writer() as conn:
+                conn.execute("DELETE FROM entrepot WHERE id = ?", (id,))
             return True
         except:
             return False
-        finally:
-            conn.close()
 
     def get_entrepot_by_id(self, id):
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM entrepot WHERE id = ?", (id,))
-        entrepot = cursor.fetchone()
-        conn.close()
-        return entrepot
+        with self.reader() as conn:
+            return conn.execute("SELECT * FROM entrepot WHERE id = ?", (id,)).fetchone()
+
+    def get_articles_entrepot(self, entrepot_id):
+        """Récupère les articles actifs d'un entrepôt avec leurs unités et prix"""
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT a.id, a.nom, a.reference, 
+                       GROUP_CONCAT(u.libelle || ' (' || pa.prix_unitaire || ' Ar)') as unites
+                FROM article a
+                LEFT JOIN prix_article pa ON a.id = pa.article_id
+                LEFT JOIN unite u ON pa.unite_id = u.id
+                WHERE a.entrepot_id = ? AND a.actif = 1
+                GROUP BY a.id, a.nom, a.reference
+            """, (entrepot_id,)).fetchall()
+
+    def get_entrepots_overview(self):
+        """Statistiques de tous les entrepôts en une seule requête.
+
+        Tuples (id, nom, localisation, nb_articles, pourcentage_articles,
+        quantite_vendue, total_ventes), triés par nom.
+        """
+        with self.reader() as conn:
+            return conn.execute("""
+                SELECT e.id, e.nom, e.localisation,
+                       COALESCE(s.nb_articles, 0),
+                       COALESCE(ROUND(s.nb_articles * 100.0 / NULLIF(t.total, 0), 2), 0),
+                       ROUND(COALESCE(s.quantite_vendue, 0), 2),
+                       ROUND(COALESCE(s.total_ventes, 0), 2)
+                FROM entrepot e
+                LEFT JOIN entrepot_stats s ON s.entrepot_id = e.id
+                CROSS JOIN (SELECT SUM(nb_articles) AS total FROM entrepot_stats) t
+                ORDER BY e.nom
+            """).fetchall()
 
     def get_entrepot_stats(self, entrepot_id):
-        """Récupère les statistiques détaillées pour un entrepôt"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        # Nombre total d'articles dans l'entrepôt
-        cursor.execute("""
-            SELECT COUNT(*) as total_articles
-            FROM article 
-            WHERE entrepot_id = ? AND actif = 1
-        """, (entrepot_id,))
-        total_articles = cursor.fetchone()[0]
-        
-        # Nombre total d'articles actifs dans tous les entrepôts
-        cursor.execute("""
-            SELECT COUNT(*) as total_articles_actifs
-            FROM article 
-            WHERE actif = 1
-        """)
-        total_articles_actifs = cursor.fetchone()[0]
+        """Récupère les statistiques détaillées pour un entrepôt (tables entrepot_stats)"""
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            
+            # Compteurs de l'entrepôt et total des articles actifs de tous les entrepôts
+            cursor.execute("""
+                SELECT s.nb_articles, s.nb_articles_sans_prix,
+                       ROUND(s.quantite_vendue, 2), ROUND(s.total_ventes, 2),
+                       (SELECT SUM(nb_articles) FROM entrepot_stats)
+                FROM entrepot_stats s
+                WHERE s.entrepot_id = ?
+            """, (entrepot_id,))
+            ligne = cursor.fetchone()
+            total_articles, sans_prix, total_quantite_vendue, total_ventes, total_articles_actifs = ligne or (0, 0, 0, 0, 0)
+            
+            # Répartition des articles par unité de vente
+            cursor.execute("""
+                SELECT u.libelle as unite, SUM(s.nb_articles) as nb_articles
+                FROM entrepot_unite_stats s
+                LEFT JOIN unite u ON u.id = s.unite_id
+                WHERE s.entrepot_id = ?
+                GROUP BY u.libelle
+            """, (entrepot_id,))
+            repartition = cursor.fetchall()
         
         # Pourcentage d'articles dans cet entrepôt
-        pourcentage_articles = (total_articles / total_articles_actifs * 100) if total_articles_actifs > 0 else 0
-        
-        # Répartition des articles par catégorie
-        cursor.execute("""
-            SELECT 
-                u.libelle as unite, 
-                COUNT(DISTINCT a.id) as nb_articles,
-                ROUND(COUNT(DISTINCT a.id) * 100.0 / (
-                    SELECT COUNT(DISTINCT id) 
-                    FROM article 
-                    WHERE entrepot_id = ? AND actif = 1
-                ), 2) as pourcentage
-            FROM article a
-            LEFT JOIN prix_article pa ON a.id = pa.article_id
-            LEFT JOIN unite u ON pa.unite_id = u.id
-            WHERE a.entrepot_id = ? AND a.actif = 1
-            GROUP BY u.libelle
-            ORDER BY nb_articles DESC
-        """, (entrepot_id, entrepot_id))
-        repartition_unites = cursor.fetchall()
-        
-        # Statistiques de vente
-        cursor.execute("""
-            SELECT 
-                ROUND(SUM(fd.quantite), 2) as total_quantite_vendue,
-                ROUND(SUM(fd.prix_total), 2) as total_ventes
-            FROM facture_detail fd
-            JOIN article a ON fd.article_id = a.id
-            WHERE a.entrepot_id = ?
-        """, (entrepot_id,))
-        stats_ventes = cursor.fetchone()
+        pourcentage_articles = (total_articles / total_articles_actifs * 100) if total_articles_actifs else 0
         
-        conn.close()
+        if sans_prix:
+            repartition.append((None, sans_prix))
+        repartition_unites = sorted(
+            (
+                (unite, nb_articles, round(nb_articles * 100.0 / total_articles, 2) if total_articles else None)
+                for unite, nb_articles in repartition
+            ),
+            key=lambda unite: unite[1],
+            reverse=True
+        )
         
         return {
             'total_articles': total_articles,
             'pourcentage_articles': round(pourcentage_articles, 2),
             'repartition_unites': repartition_unites,
-            'total_quantite_vendue': stats_ventes[0] or 0,
-            'total_ventes': stats_ventes[1] or 0
+            'total_quantite_vendue': total_quantite_vendue or 0,
+            'total_ventes': total_ventes or 0
         }
\ No newline at end of file
@@ -1,15 +1,11 @@
 import sqlite3
 import os
 
-def init_database():
-    """Initialise la base de données avec les tables nécessaires"""
-    
-    # Créer le dossier database s'il n'existe pas
-    os.makedirs('database', exist_ok=True)
-    
-    # Connexion à la base de données
-    conn = sqlite3.connect('database/vente.db')
-    cursor = conn.cursor()
+DB_PATH = 'database/vente.db'
+
+
+def _create_base_schema(cursor):
+    """Crée les tables de base et les données de test (schéma version 0)"""
     
     # Table des unités de mesure
     cursor.execute('''
@@ -99,11 +95,417 @@ def init_database():
     cursor.execute("INSERT OR IGNORE INTO prix_article (article_id, unite_id, prix_unitaire) VALUES (1, 1, 4000)")  # Riz Kg
     cursor.execute("INSERT OR IGNORE INTO prix_article (article_id, unite_id, prix_unitaire) VALUES (1, 2, 150000)")  # Riz Sac
     cursor.execute("INSERT OR IGNORE INTO prix_article (article_id, unite_id, prix_unitaire) VALUES (2, 1, 3500)")  # Sucre Kg
+
+
+def _migration_001_index(cursor):
+    """Index utilisés par les rapports, les détails de facture et le catalogue"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facture_detail_facture ON facture_detail(facture_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facture_detail_article ON facture_detail(article_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facture_date ON facture(date_facture)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_actif_nom ON article(actif, nom)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_article_entrepot ON article(entrepot_id)")
+    # prix_article(article_id) est déjà couvert par l'index de UNIQUE(article_id, unite_id)
+
+
+def _migration_002_recherche_articles(cursor):
+    """Index plein texte FTS5 sur article.nom et article.reference, tenu à jour par triggers"""
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5(
+                nom, reference,
+                content='article', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite compilé sans FTS5 : la recherche se rabat sur LIKE
+        print("⚠️ FTS5 indisponible, recherche d'articles sans index plein texte")
+        return
+    
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_ai AFTER INSERT ON article BEGIN
+            INSERT INTO article_fts (rowid, nom, reference) VALUES (new.id, new.nom, new.reference);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_ad AFTER DELETE ON article BEGIN
+            INSERT INTO article_fts (article_fts, rowid, nom, reference) VALUES ('delete', old.id, old.nom, old.reference);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_au AFTER UPDATE OF nom, reference ON article BEGIN
+            INSERT INTO article_fts (article_fts, rowid, nom, reference) VALUES ('delete', old.id, old.nom, old.reference);
+            INSERT INTO article_fts (rowid, nom, reference) VALUES (new.id, new.nom, new.reference);
+        END
+    """)
+    cursor.execute("INSERT INTO article_fts (article_fts) VALUES ('rebuild')")
+
+
+# Agrégat des lignes de facture par jour : une ligne par (jour, article, unité,
+# entrepôt). L'entrepôt est celui de l'article, 0 pour un article sans entrepôt.
+REBUILD_VENTES_JOURNALIERES_SQL = """
+    DELETE FROM ventes_journalieres;
+    INSERT INTO ventes_journalieres (jour, article_id, unite_id, entrepot_id, quantite, chiffre_affaires, nb_lignes)
+    SELECT substr(f.date_facture, 1, 10), fd.article_id, fd.unite_id, COALESCE(a.entrepot_id, 0),
+           SUM(fd.quantite), SUM(fd.prix_total), COUNT(*)
+    FROM facture_detail fd
+    JOIN facture f ON f.id = fd.facture_id
+    LEFT JOIN article a ON a.id = fd.article_id
+    GROUP BY 1, 2, 3, 4;
+"""
+
+
+def _migration_003_ventes_journalieres(cursor):
+    """Table ventes_journalieres maintenue par triggers sur facture_detail"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ventes_journalieres (
+            jour TEXT NOT NULL,
+            article_id INTEGER NOT NULL,
+            unite_id INTEGER NOT NULL,
+            entrepot_id INTEGER NOT NULL,
+            quantite REAL NOT NULL DEFAULT 0,
+            chiffre_affaires REAL NOT NULL DEFAULT 0,
+            nb_lignes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (jour, article_id, unite_id, entrepot_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ventes_journalieres_entrepot ON ventes_journalieres(entrepot_id, jour)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_ventes_journalieres_article ON ventes_journalieres(article_id)")
+    
+    # Nouvelle ligne de facture : ajout au cumul du jour
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS ventes_journalieres_ai AFTER INSERT ON facture_detail BEGIN
+            INSERT INTO ventes_journalieres (jour, article_id, unite_id, entrepot_id, quantite, chiffre_affaires, nb_lignes)
+            VALUES (
+                (SELECT substr(date_facture, 1, 10) FROM facture WHERE id = new.facture_id),
+                new.article_id, new.unite_id,
+                COALESCE((SELECT entrepot_id FROM article WHERE id = new.article_id), 0),
+                new.quantite, new.prix_total, 1
+            )
+            ON CONFLICT (jour, article_id, unite_id, entrepot_id) DO UPDATE SET
+                quantite = quantite + excluded.quantite,
+                chiffre_affaires = chiffre_affaires + excluded.chiffre_affaires,
+                nb_lignes = nb_lignes + 1;
+        END
+    """)
+    
+    # Ligne supprimée : retrait du cumul, la ligne d'agrégat disparaît à zéro
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS ventes_journalieres_ad AFTER DELETE ON facture_detail BEGIN
+            UPDATE ventes_journalieres SET
+                quantite = quantite - old.quantite,
+                chiffre_affaires = chiffre_affaires - old.prix_total,
+                nb_lignes = nb_lignes - 1
+            WHERE jour = (SELECT substr(date_facture, 1, 10) FROM facture WHERE id = old.facture_id)
+              AND article_id = old.article_id
+              AND unite_id = old.unite_id
+              AND entrepot_id = COALESCE((SELECT entrepot_id FROM article WHERE id = old.article_id), 0);
+            DELETE FROM ventes_journalieres
+            WHERE nb_lignes <= 0 AND article_id = old.article_id AND unite_id = old.unite_id;
+        END
+    """)
+    
+    # Article déplacé : ses cumuls suivent l'article dans son nouvel entrepôt
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS ventes_journalieres_article_au
+        AFTER UPDATE OF entrepot_id ON article
+        WHEN COALESCE(old.entrepot_id, 0) <> COALESCE(new.entrepot_id, 0) BEGIN
+            INSERT INTO ventes_journalieres (jour, article_id, unite_id, entrepot_id, quantite, chiffre_affaires, nb_lignes)
+            SELECT jour, article_id, unite_id, COALESCE(new.entrepot_id, 0), quantite, chiffre_affaires, nb_lignes
+            FROM ventes_journalieres
+            WHERE article_id = new.id AND entrepot_id = COALESCE(old.entrepot_id, 0)
+            ON CONFLICT (jour, article_id, unite_id, entrepot_id) DO UPDATE SET
+                quantite = quantite + excluded.quantite,
+                chiffre_affaires = chiffre_affaires + excluded.chiffre_affaires,
+                nb_lignes = nb_lignes + excluded.nb_lignes;
+            DELETE FROM ventes_journalieres
+            WHERE article_id = new.id AND entrepot_id = COALESCE(old.entrepot_id, 0);
+        END
+    """)
+    
+    for instruction in REBUILD_VENTES_JOURNALIERES_SQL.split(';'):
+        if instruction.strip():
+            cursor.execute(instruction)
+
+
+def rebuild_ventes_journalieres(db_path=DB_PATH):
+    """Recalcule entièrement ventes_journalieres à partir des lignes de facture"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.executescript(f"BEGIN; {REBUILD_VENTES_JOURNALIERES_SQL} COMMIT;")
+        nb_lignes = conn.execute("SELECT COUNT(*) FROM ventes_journalieres").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"✅ Ventes journalières reconstruites ({nb_lignes} lignes)")
+    return nb_lignes
+
+
+# Statistiques par entrepôt (0 : articles sans entrepôt). Les articles comptés
+# sont les articles actifs ; les ventes suivent l'entrepôt actuel de l'article.
+REBUILD_ENTREPOT_STATS_SQL = """
+    DELETE FROM entrepot_unite_stats;
+    DELETE FROM entrepot_stats;
+    INSERT INTO entrepot_stats (entrepot_id, nb_articles, nb_articles_sans_prix, quantite_vendue, total_ventes)
+    SELECT entrepot_id, SUM(nb_articles), SUM(sans_prix), SUM(quantite), SUM(total)
+    FROM (
+        SELECT id AS entrepot_id, 0 AS nb_articles, 0 AS sans_prix, 0 AS quantite, 0 AS total
+        FROM entrepot
+        UNION ALL
+        SELECT COALESCE(a.entrepot_id, 0), COUNT(*),
+               SUM(NOT EXISTS (SELECT 1 FROM prix_article pa WHERE pa.article_id = a.id)), 0, 0
+        FROM article a
+        WHERE a.actif = 1
+        GROUP BY 1
+        UNION ALL
+        SELECT COALESCE(a.entrepot_id, 0), 0, 0, SUM(fd.quantite), SUM(fd.prix_total)
+        FROM facture_detail fd
+        JOIN article a ON a.id = fd.article_id
+        GROUP BY 1
+    )
+    GROUP BY entrepot_id;
+    INSERT INTO entrepot_unite_stats (entrepot_id, unite_id, nb_articles)
+    SELECT COALESCE(a.entrepot_id, 0), pa.unite_id, COUNT(*)
+    FROM article a
+    JOIN prix_article pa ON pa.article_id = a.id
+    WHERE a.actif = 1
+    GROUP BY 1, 2;
+"""
+
+
+def _stats_article(ref, signe):
+    """Instructions ajoutant (+) ou retirant (-) un article des statistiques de son entrepôt"""
+    entrepot = f"COALESCE({ref}.entrepot_id, 0)"
+    return f"""
+        INSERT OR IGNORE INTO entrepot_stats (entrepot_id) SELECT {entrepot} WHERE {ref}.actif = 1;
+        UPDATE entrepot_stats SET
+            nb_articles = nb_articles {signe} 1,
+            nb_articles_sans_prix = nb_articles_sans_prix {signe}
+                NOT EXISTS (SELECT 1 FROM prix_article WHERE article_id = {ref}.id)
+        WHERE entrepot_id = {entrepot} AND {ref}.actif = 1;
+        INSERT INTO entrepot_unite_stats (entrepot_id, unite_id, nb_articles)
+        SELECT {entrepot}, unite_id, {signe}1 FROM prix_article
+        WHERE article_id = {ref}.id AND {ref}.actif = 1
+        ON CONFLICT (entrepot_id, unite_id) DO UPDATE SET nb_articles = nb_articles + excluded.nb_articles;
+        DELETE FROM entrepot_unite_stats WHERE nb_articles <= 0;
+    """
+
+
+def _stats_prix(ref, signe, condition_sans_prix="1"):
+    """Instructions ajoutant (+) ou retirant (-) un prix des statistiques d'unités"""
+    # Entrepôt de l'article s'il est actif (aucune ligne sinon)
+    entrepot = f"SELECT COALESCE(entrepot_id, 0) FROM article WHERE id = {ref}.article_id AND actif = 1"
+    # Premier prix ajouté ou dernier prix retiré : l'article change de catégorie « sans prix »
+    nb_prix = 1 if signe == '+' else 0
+    return f"""
+        INSERT OR IGNORE INTO entrepot_stats (entrepot_id) {entrepot};
+        UPDATE entrepot_stats SET nb_articles_sans_prix = nb_articles_sans_prix - ({signe}1)
+        WHERE entrepot_id = ({entrepot})
+          AND (SELECT COUNT(*) FROM prix_article WHERE article_id = {ref}.article_id) = {nb_prix}
+          AND {condition_sans_prix};
+        INSERT INTO entrepot_unite_stats (entrepot_id, unite_id, nb_articles)
+        SELECT COALESCE(entrepot_id, 0), {ref}.unite_id, {signe}1 FROM article
+        WHERE id = {ref}.article_id AND actif = 1
+        ON CONFLICT (entrepot_id, unite_id) DO UPDATE SET nb_articles = nb_articles + excluded.nb_articles;
+        DELETE FROM entrepot_unite_stats WHERE nb_articles <= 0;
+    """
+
+
+def _stats_vente(ref, signe):
+    """Instructions ajoutant (+) ou retirant (-) une ligne de facture des ventes de l'entrepôt"""
+    entrepot = f"COALESCE((SELECT entrepot_id FROM article WHERE id = {ref}.article_id), 0)"
+    return f"""
+        INSERT OR IGNORE INTO entrepot_stats (entrepot_id) VALUES ({entrepot});
+        UPDATE entrepot_stats SET
+            quantite_vendue = quantite_vendue {signe} {ref}.quantite,
+            total_ventes = total_ventes {signe} {ref}.prix_total
+        WHERE entrepot_id = {entrepot};
+    """
+
+
+def _migration_004_entrepot_stats(cursor):
+    """Tables entrepot_stats et entrepot_unite_stats maintenues par triggers"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entrepot_stats (
+            entrepot_id INTEGER PRIMARY KEY,
+            nb_articles INTEGER NOT NULL DEFAULT 0,
+            nb_articles_sans_prix INTEGER NOT NULL DEFAULT 0,
+            quantite_vendue REAL NOT NULL DEFAULT 0,
+            total_ventes REAL NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS entrepot_unite_stats (
+            entrepot_id INTEGER NOT NULL,
+            unite_id INTEGER NOT NULL,
+            nb_articles INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (entrepot_id, unite_id)
+        ) WITHOUT ROWID
+    """)
     
-    conn.commit()
-    conn.close()
+    triggers = {
+        # Articles : création, suppression, activation/désactivation, changement d'entrepôt
+        "entrepot_stats_article_ai": ("AFTER INSERT ON article", _stats_article("new", "+")),
+        "entrepot_stats_article_ad": ("AFTER DELETE ON article", _stats_article("old", "-")),
+        "entrepot_stats_article_au": (
+            "AFTER UPDATE OF actif, entrepot_id ON article "
+            "WHEN old.actif IS NOT new.actif OR COALESCE(old.entrepot_id, 0) <> COALESCE(new.entrepot_id, 0)",
+            _stats_article("old", "-") + _stats_article("new", "+")
+        ),
+        # Les ventes d'un article déplacé le suivent dans son nouvel entrepôt
+        "entrepot_stats_article_ventes_au": (
+            "AFTER UPDATE OF entrepot_id ON article "
+            "WHEN COALESCE(old.entrepot_id, 0) <> COALESCE(new.entrepot_id, 0)",
+            """
+            INSERT OR IGNORE INTO entrepot_stats (entrepot_id) VALUES (COALESCE(new.entrepot_id, 0));
+            UPDATE entrepot_stats SET
+                quantite_vendue = quantite_vendue + CASE entrepot_id WHEN COALESCE(new.entrepot_id, 0) THEN 1 ELSE -1 END
+                    * (SELECT COALESCE(SUM(quantite), 0) FROM facture_detail WHERE article_id = new.id),
+                total_ventes = total_ventes + CASE entrepot_id WHEN COALESCE(new.entrepot_id, 0) THEN 1 ELSE -1 END
+                    * (SELECT COALESCE(SUM(prix_total), 0) FROM facture_detail WHERE article_id = new.id)
+            WHERE entrepot_id IN (COALESCE(old.entrepot_id, 0), COALESCE(new.entrepot_id, 0));
+            """
+        ),
+        # Prix : répartition par unité et articles sans prix
+        "entrepot_stats_prix_ai": ("AFTER INSERT ON prix_article", _stats_prix("new", "+")),
+        "entrepot_stats_prix_ad": ("AFTER DELETE ON prix_article", _stats_prix("old", "-")),
+        "entrepot_stats_prix_au": (
+            "AFTER UPDATE OF article_id, unite_id ON prix_article",
+            _stats_prix("old", "-", "old.article_id <> new.article_id")
+            + _stats_prix("new", "+", "old.article_id <> new.article_id")
+        ),
+        # Lignes de facture : quantités et montants vendus
+        "entrepot_stats_vente_ai": ("AFTER INSERT ON facture_detail", _stats_vente("new", "+")),
+        "entrepot_stats_vente_ad": ("AFTER DELETE ON facture_detail", _stats_vente("old", "-")),
+    }
+    for nom, (evenement, corps) in triggers.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {nom} {evenement} BEGIN {corps} END")
+    
+    for instruction in REBUILD_ENTREPOT_STATS_SQL.split(';'):
+        if instruction.strip():
+            cursor.execute(instruction)
+
+
+def rebuild_entrepot_stats(db_path=DB_PATH):
+    """Recalcule entièrement les statistiques d'entrepôts"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.executescript(f"BEGIN; {REBUILD_ENTREPOT_STATS_SQL} COMMIT;")
+    finally:
+        conn.close()
+    print("✅ Statistiques des entrepôts reconstruites")
+
+
+def _migration_005_tris_factures(cursor):
+    """Index des tris du rapport des ventes par montant et par client"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facture_montant ON facture(montant_total)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facture_client ON facture(nom_client COLLATE NOCASE)")
+
+
+def _migration_006_recherche_trigrammes(cursor):
+    """Index trigramme sur article.nom et article.reference pour chercher à l'intérieur des mots"""
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS article_trigram_fts USING fts5(
+                nom, reference,
+                content='article', content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # FTS5 absent ou SQLite antérieur à 3.34 : la recherche se rabat sur LIKE
+        print("⚠️ Tokenizer trigram indisponible, recherche à l'intérieur des mots sans index")
+        return
     
-    print("✅ Base de données initialisée avec succès !")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_trigram_fts_ai AFTER INSERT ON article BEGIN
+            INSERT INTO article_trigram_fts (rowid, nom, reference) VALUES (new.id, new.nom, new.reference);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_trigram_fts_ad AFTER DELETE ON article BEGIN
+            INSERT INTO article_trigram_fts (article_trigram_fts, rowid, nom, reference) VALUES ('delete', old.id, old.nom, old.reference);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_trigram_fts_au AFTER UPDATE OF nom, reference ON article BEGIN
+            INSERT INTO article_trigram_fts (article_trigram_fts, rowid, nom, reference) VALUES ('delete', old.id, old.nom, old.reference);
+            INSERT INTO article_trigram_fts (rowid, nom, reference) VALUES (new.id, new.nom, new.reference);
+        END
+    """)
+    cursor.execute("INSERT INTO article_trigram_fts (article_trigram_fts) VALUES ('rebuild')")
+
+
+# Migrations appliquées dans l'ordre ; le numéro devient le PRAGMA user_version
+MIGRATIONS = [
+    (1, _migration_001_index),
+    (2, _migration_002_recherche_articles),
+    (3, _migration_003_ventes_journalieres),
+    (4, _migration_004_entrepot_stats),
+    (5, _migration_005_tris_factures),
+    (6, _migration_006_recherche_trigrammes),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Bases déjà vérifiées par ce processus (évite de rouvrir la base à chaque appel)
+_bases_a_jour = set()
+
+
+def init_database(db_path=DB_PATH):
+    """Initialise la base de données et applique les migrations manquantes.
+
+    Retourne immédiatement si le schéma est déjà à jour.
+    """
+    if db_path in _bases_a_jour:
+        return False
+    
+    # Créer le dossier database s'il n'existe pas
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    
+    # Connexion à la base de données (transactions gérées explicitement)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            _bases_a_jour.add(db_path)
+            return False
+        
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        try:
+            if version == 0:
+                _create_base_schema(cursor)
+            
+            for numero, migration in MIGRATIONS:
+                if numero > version:
+                    migration(cursor)
+                    cursor.execute(f"PRAGMA user_version = {numero}")
+            
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    
+    _bases_a_jour.add(db_path)
+    print(f"✅ Base de données initialisée avec succès ! (schéma v{SCHEMA_VERSION})")
+    return True
 
 if __name__ == "__main__":
-    init_database()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Initialisation de la base de données")
+    parser.add_argument("--db", default=DB_PATH, help="Chemin de la base SQLite")
+    parser.add_argument("--rebuild-ventes", action="store_true",
+                        help="Recalculer la table ventes_journalieres")
+    parser.add_argument("--rebuild-entrepots", action="store_true",
+                        help="Recalculer les statistiques des entrepôts")
+    args = parser.parse_args()
+    
+    init_database(args.db)
+    if args.rebuild_ventes:
+        rebuild_ventes_journalieres(args.db)
+    if args.rebuild_entrepots:
+        rebuild_entrepot_stats(args.db)
\ No newline at end of file
@@ -0,0 +1,37 @@
+from database.init_db import init_database, DB_PATH
+from utils.startup_profile import profiler
+
+
+def warm_up(db_path=DB_PATH, on_step=None):
+    """Prépare la base avant l'ouverture de la fenêtre principale.
+
+    Applique les migrations, vérifie l'intégrité (PRAGMA quick_check) et
+    charge le catalogue en mémoire. Prévu pour tourner dans un thread
+    pendant l'affichage de l'écran de démarrage ; `on_step(message)` est
+    appelé depuis ce thread à chaque étape.
+
+    Retourne (db, problemes) : le DatabaseManager prêt et la liste des
+    messages de quick_check (vide si la base est saine).
+    """
+    def etape(message):
+        if on_step:
+            on_step(message)
+
+    etape("Ouverture de la base de données...")
+    with profiler.phase("Migrations"):
+        init_database(db_path)
+
+    from database.db_manager import DatabaseManager
+    db = DatabaseManager(db_path)
+
+    etape("Vérification de la base...")
+    with profiler.phase("PRAGMA quick_check"):
+        with db.reader() as conn:
+            resultats = [ligne[0] for ligne in conn.execute("PRAGMA quick_check")]
+    problemes = [] if resultats == ["ok"] else resultats
+
+    etape("Chargement du catalogue...")
+    with profiler.phase("Préchargement du catalogue"):
+        db.catalog.warm_up()
+
+    return db, problemes
@@ -11,23 +11,64 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from database.init_db import init_database
-    from ui.main_app import MainApp
+    from utils.startup_profile import profiler
+    
+    # --startup-profile : affiche la durée de chaque phase du démarrage
+    if "--startup-profile" in sys.argv:
+        profiler.enable()
+    
+    def preparer(splash):
+        """Préchargement en arrière-plan : base et catalogue (aucun import Tk hors du thread principal)"""
+        from database.warmup import warm_up
+        return warm_up(on_step=splash.set_message)
     
     def main():
         """Fonction principale"""
         print("🚀 Démarrage de l'application de gestion de vente...")
         
-        # Initialiser la base de données
-        init_database()
+        # Écran de démarrage affiché avant tout chargement
+        with profiler.phase("Écran de démarrage"):
+            from ui.splash import SplashScreen
+            splash = SplashScreen()
+        profiler.mark("Écran de démarrage affiché")
+        
+        # Migrations, vérification de la base et catalogue pendant que l'écran reste affiché
+        db, problemes = splash.run(preparer, splash)
+        if problemes:
+            from tkinter import messagebox
+            messagebox.showwarning(
+                "Vérification de la base",
+                "La vérification de la base de données a signalé des problèmes :\n\n"
+                + "\n".join(problemes[:10]),
+                parent=splash
+            )
+        
+        # Interface importée sur le thread principal, l'écran encore affiché
+        splash.message.set("Chargement de l'interface...")
+        splash.update_idletasks()
+        with profiler.phase("Import de l'interface"):
+            from ui.main_app import MainApp
+        splash.destroy()
         
         # Lancer l'application
-        app = MainApp()
+        with profiler.phase("Création de la fenêtre"):
+            app = MainApp(db)
         app.mainloop()
         
+        # Arrêter les requêtes en arrière-plan, terminer les impressions en cours
+        # et fermer les connexions partagées
+        from utils.db_executor import get_executor
+        from utils.print_queue import get_print_queue
+        get_executor().shutdown()
+        get_print_queue().shutdown()
+        app.db.close()
+        
         print("👋 Application fermée")
     
     if __name__ == "__main__":
+        # Nécessaire au processus d'impression dans l'exécutable PyInstaller
+        import multiprocessing
+        multiprocessing.freeze_support()
         main()
         
 except ImportError as e:
@@ -0,0 +1,83 @@
+class Panier:
+    """Panier de vente indexé par (article_id, unite_id).
+
+    Ajouter un article déjà présent dans la même unité cumule la quantité sur
+    la ligne existante. Le total est tenu à jour à chaque opération et chaque
+    changement est notifié aux écouteurs par callback(evenement, cle, ligne)
+    avec evenement parmi "ajout", "modification", "suppression" et "vidage"
+    (cle et ligne valent alors None).
+    """
+
+    def __init__(self):
+        self._lignes = {}  # (article_id, unite_id) -> ligne, dans l'ordre d'ajout
+        self._listeners = []
+        self.total = 0.0
+
+    # =============== ÉCOUTEURS ===============
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notifier(self, evenement, cle=None, ligne=None):
+        for callback in list(self._listeners):
+            callback(evenement, cle, ligne)
+
+    # =============== OPÉRATIONS ===============
+
+    @staticmethod
+    def cle(article_id, unite_id):
+        return int(article_id), int(unite_id)
+
+    def ajouter(self, article_id, article_nom, unite_id, unite_nom, quantite, prix_unitaire):
+        """Ajoute une quantité ; retourne la ligne créée ou complétée"""
+        cle = self.cle(article_id, unite_id)
+        ligne = self._lignes.get(cle)
+        if ligne is None:
+            ligne = {
+                "article_id": cle[0],
+                "article_nom": article_nom,
+                "unite_id": cle[1],
+                "unite_nom": unite_nom,
+                "quantite": quantite,
+                "prix_unitaire": prix_unitaire,
+                "prix_total": quantite * prix_unitaire
+            }
+            self._lignes[cle] = ligne
+            self.total += ligne["prix_total"]
+            self._notifier("ajout", cle, ligne)
+        else:
+            # Le prix de la ligne existante est conservé
+            ancien_total = ligne["prix_total"]
+            ligne["quantite"] += quantite
+            ligne["prix_total"] = ligne["quantite"] * ligne["prix_unitaire"]
+            self.total += ligne["prix_total"] - ancien_total
+            self._notifier("modification", cle, ligne)
+        return ligne
+
+    def retirer(self, cle):
+        """Supprime la ligne `cle` ; retourne la ligne retirée ou None"""
+        ligne = self._lignes.pop(cle, None)
+        if ligne is not None:
+            self.total = self.total - ligne["prix_total"] if self._lignes else 0.0
+            self._notifier("suppression", cle, ligne)
+        return ligne
+
+    def vider(self):
+        self._lignes.clear()
+        self.total = 0.0
+        self._notifier("vidage")
+
+    # =============== ACCÈS ===============
+
+    def ligne(self, cle):
+        return self._lignes.get(cle)
+
+    def __iter__(self):
+        return iter(list(self._lignes.values()))
+
+    def __len__(self):
+        return len(self._lignes)
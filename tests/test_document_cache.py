@@ -0,0 +1,50 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.document_cache import DocumentCache
+from utils.pdf_generator import generer_facture
+
+
+def facture_exemple():
+    """Facture et lignes au format de get_facture_by_id / get_facture_details"""
+    facture_info = (7, "Client Exemple", "2024-01-15", 3000.0)
+    details = [(1, 7, 1, 1, 2.0, 1500.0, 3000.0, "Riz", "Kilogramme", "Entrepôt Principal")]
+    return facture_info, details
+
+
+class DocumentCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.cache = DocumentCache(self.dossier)
+
+    def tearDown(self):
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def test_reimpression_sans_horodatage_perime(self):
+        """Un document servi depuis le cache est identique à un nouveau rendu"""
+        facture_info, details = facture_exemple()
+        chemin = self.cache.obtenir(facture_info, details, generer_facture)
+
+        time.sleep(1.1)  # l'heure courante a changé depuis le premier rendu
+        self.assertEqual(self.cache.trouver(facture_info, details), chemin)
+        with open(chemin, "rb") as f:
+            en_cache = f.read()
+        self.assertEqual(en_cache, generer_facture(facture_info, details))
+
+    def test_contenu_modifie_nouveau_document(self):
+        facture_info, details = facture_exemple()
+        chemin = self.cache.obtenir(facture_info, details, generer_facture)
+        details = [details[0][:4] + (3.0, 1500.0, 4500.0) + details[0][7:]]
+        self.assertIsNone(self.cache.trouver(facture_info, details))
+        self.assertNotEqual(self.cache.obtenir(facture_info, details, generer_facture), chemin)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ui.components.page import PageLifecycle
+from utils.db_executor import get_executor
+
+
+class FausseRacine:
+    """Tient lieu de fenêtre Tk : after() est exécuté à la demande par le test"""
+
+    def __init__(self):
+        self.en_attente = []
+
+    def after(self, delai, callback):
+        self.en_attente.append(callback)
+
+    def traiter(self):
+        while self.en_attente:
+            self.en_attente.pop(0)()
+
+
+class FaussePage(PageLifecycle):
+    tables = frozenset({"facture"})
+
+    def __init__(self, racine):
+        self.racine = racine
+        self.rafraichissements = []
+
+    def nametowidget(self, nom):
+        return self.racine
+
+    def winfo_exists(self):
+        return True
+
+    def refresh(self, tables):
+        self.rafraichissements.append(tables)
+
+
+class AnnulationNavigationTest(unittest.TestCase):
+    """Les requêtes d'une page masquée ne livrent plus leurs résultats"""
+
+    def setUp(self):
+        self.executor = get_executor()
+        self.racine = FausseRacine()
+        self.executor._root = self.racine
+        self.page = FaussePage(self.racine)
+        self.livres = []
+        self.feu = threading.Event()
+
+    def tearDown(self):
+        self.feu.set()
+        self.executor.cancel(self.page)
+
+    def soumettre(self):
+        return self.executor.submit(
+            self.page, self.feu.wait, 5,
+            on_success=self.livres.append,
+            key="articles"
+        )
+
+    def attendre(self, future):
+        self.feu.set()
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+        self.racine.traiter()
+
+    def test_page_visible_livree(self):
+        self.attendre(self.soumettre())
+        self.assertEqual(self.livres, [True])
+        self.assertFalse(self.page.dirty)
+
+    def test_page_masquee_jamais_livree(self):
+        future = self.soumettre()
+        self.page.on_hide()
+        self.attendre(future)
+        self.assertEqual(self.livres, [])
+
+        # Le chargement interrompu est refait au retour sur la page
+        self.assertTrue(self.page.dirty)
+        self.page.on_show()
+        self.assertEqual(self.page.rafraichissements, [{"facture"}])
+
+    def test_page_masquee_sans_requete(self):
+        self.page.on_hide()
+        self.assertFalse(self.page.dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.panier import Panier
+
+
+class PanierTest(unittest.TestCase):
+    """Lignes fusionnées par (article, unité), total courant et notifications par ligne"""
+
+    def setUp(self):
+        self.panier = Panier()
+        self.evenements = []
+        self.panier.add_listener(lambda evenement, cle, ligne: self.evenements.append((evenement, cle)))
+
+    def test_meme_article_meme_unite_fusionne(self):
+        self.panier.ajouter(1, "Riz", 1, "Kg", 2, 4000)
+        ligne = self.panier.ajouter("1", "Riz", "1", "Kg", 3, 4500)
+
+        self.assertEqual(len(self.panier), 1)
+        self.assertEqual(ligne["quantite"], 5)
+        self.assertEqual(ligne["prix_total"], 20000)  # prix de la ligne existante conservé
+        self.assertEqual(self.panier.total, 20000)
+        self.assertEqual(self.evenements, [("ajout", (1, 1)), ("modification", (1, 1))])
+
+    def test_autre_unite_nouvelle_ligne(self):
+        self.panier.ajouter(1, "Riz", 1, "Kg", 2, 4000)
+        self.panier.ajouter(1, "Riz", 2, "Sac", 1, 150000)
+
+        self.assertEqual(len(self.panier), 2)
+        self.assertEqual(self.panier.total, 158000)
+        self.assertEqual([ligne["unite_nom"] for ligne in self.panier], ["Kg", "Sac"])
+
+    def test_retirer_et_vider(self):
+        self.panier.ajouter(1, "Riz", 1, "Kg", 2, 4000)
+        self.panier.ajouter(2, "Sucre", 1, "Kg", 1, 3500)
+
+        self.panier.retirer((1, 1))
+        self.assertEqual(self.panier.total, 3500)
+        self.assertIsNone(self.panier.ligne((1, 1)))
+
+        self.panier.vider()
+        self.assertEqual(self.panier.total, 0)
+        self.assertEqual(len(self.panier), 0)
+        self.assertEqual(self.evenements[-2:], [("suppression", (1, 1)), ("vidage", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
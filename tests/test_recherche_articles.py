@@ -0,0 +1,52 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+
+
+class RechercheArticlesTest(unittest.TestCase):
+    """Recherche d'articles par mot du nom ou partie de la référence"""
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.dossier, "vente.db"))
+        # La base d'exemple contient déjà Riz (RIZ001) et Sucre (SUC001)
+        with self.db.writer() as conn:
+            conn.executemany(
+                "INSERT INTO article (nom, reference) VALUES (?, ?)",
+                [("Riz rouge", "RIZ002"), ("Huile", "HUI010"), ("Café", "001CAF")]
+            )
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def references(self, query, limit=20):
+        return [article[2] for article in self.db.search_articles(query, limit)]
+
+    def test_reference_par_son_milieu(self):
+        self.assertEqual(self.references("Z00"), ["RIZ001", "RIZ002"])
+        self.assertEqual(self.references("sucre 001"), ["SUC001"])
+
+    def test_reference_par_sa_fin(self):
+        # Les références qui commencent par le mot viennent d'abord, puis celles qui le contiennent
+        self.assertEqual(self.references("001"), ["001CAF", "RIZ001", "SUC001"])
+        self.assertEqual(self.references("001", limit=2), ["001CAF", "RIZ001"])
+
+    def test_reference_modifiee(self):
+        article_id = self.db.search_articles("HUI010")[0][0]
+        self.db.update_article(article_id, "Huile", "HUI999")
+        self.assertEqual(self.references("010"), [])
+        self.assertEqual(self.references("I99"), ["HUI999"])
+
+    def test_nom_en_prefixe(self):
+        self.assertCountEqual(self.references("riz"), ["RIZ001", "RIZ002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_manager import DatabaseManager
+from utils.scanner import resoudre_scan
+
+NB_ARTICLES = 20000
+
+
+class ScanApresVenteTest(unittest.TestCase):
+    """Le premier scan après une vente doit rester servi par le cache du catalogue"""
+
+    def setUp(self):
+        self.dossier = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.dossier, "vente.db"))
+        with self.db.writer() as conn:
+            conn.executemany(
+                "INSERT INTO article (nom, reference, entrepot_id) VALUES (?, ?, 1)",
+                [(f"Article {i}", f"REF{i}") for i in range(NB_ARTICLES)]
+            )
+            conn.execute("""
+                INSERT OR IGNORE INTO prix_article (article_id, unite_id, prix_unitaire)
+                SELECT id, 1, 100 FROM article
+            """)
+        self.db.catalog.warm_up()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.dossier, ignore_errors=True)
+
+    def test_scan_apres_vente(self):
+        article, unite, _ = resoudre_scan(self.db.catalog, "REF42")
+        donnees = self.db.catalog._etat[1]
+
+        self.db.record_sale("Client", "2024-01-15", [(article['id'], unite[0], 2, unite[3])])
+
+        # Ni rechargement du catalogue ni requête : le scan passe par l'index des références
+        db = self.db.catalog.db
+        with mock.patch.object(db, "load_catalog", wraps=db.load_catalog) as load_catalog, \
+                mock.patch.object(db, "reader", side_effect=AssertionError("scan servi par la base")):
+            article, _, quantite = resoudre_scan(self.db.catalog, "3*REF43")
+
+        load_catalog.assert_not_called()
+        self.assertIs(article, donnees['references']['REF43'])
+        self.assertEqual(quantite, 3)
+        self.assertIs(self.db.catalog._etat[1], donnees, "la vente a invalidé le catalogue")
+
+    def test_modification_prix_invalide(self):
+        article, unite, _ = resoudre_scan(self.db.catalog, "REF42")
+        self.db.update_prix(article['id'], unite[0], 250)
+        _, unite, _ = resoudre_scan(self.db.catalog, "REF42")
+        self.assertEqual(unite[3], 250)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import customtkinter as ctk
+
+
+class LoadingIndicator:
+    """Libellé « Chargement... » superposé à un widget pendant une requête"""
+
+    def __init__(self, parent, text="⏳ Chargement..."):
+        self.label = ctk.CTkLabel(
+            parent,
+            text=text,
+            font=ctk.CTkFont(size=14, weight="bold"),
+            fg_color="#ffffff",
+            text_color="#495057",
+            corner_radius=8
+        )
+
+    def show(self):
+        self.label.place(relx=0.5, rely=0.5, anchor="center")
+        self.label.lift()
+
+    def hide(self):
+        self.label.place_forget()
@@ -0,0 +1,47 @@
+from utils.db_executor import get_executor
+
+
+class PageLifecycle:
+    """Cycle de vie des pages gardées en vie par MainApp.
+
+    MainApp appelle on_show() / on_hide() à chaque changement de page et
+    mark_dirty() quand des tables sont modifiées pendant que la page est
+    masquée. Une page ne se recharge à l'affichage que si l'une des tables
+    listées dans `tables` a changé, ou si un chargement a été interrompu.
+
+    Les actions qui doivent aboutir malgré la navigation (export, impression)
+    sont soumises à l'exécuteur avec la fenêtre principale comme owner.
+    """
+
+    # Tables dont dépend l'affichage de la page
+    tables = frozenset()
+
+    _tables_modifiees = None
+
+    @property
+    def dirty(self):
+        return bool(self._tables_modifiees)
+
+    def mark_dirty(self, tables=None):
+        """Signale des tables modifiées (None : changement externe, tout est à recharger)"""
+        concernees = set(self.tables) if tables is None else set(tables) & self.tables
+        if concernees:
+            self._tables_modifiees = (self._tables_modifiees or set()) | concernees
+
+    def on_show(self):
+        """Page affichée : recharge ce qui a changé depuis son masquage"""
+        if self._tables_modifiees:
+            tables, self._tables_modifiees = self._tables_modifiees, None
+            self.refresh(tables)
+
+    def on_hide(self):
+        """Page masquée (son état est conservé).
+
+        Ses requêtes en cours sont annulées : leurs résultats ne seront pas
+        livrés, la page se recharge donc à son prochain affichage.
+        """
+        if get_executor().cancel(self):
+            self.mark_dirty()
+
+    def refresh(self, tables):
+        """Recharge les données issues des tables modifiées"""
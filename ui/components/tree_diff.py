@@ -0,0 +1,73 @@
+def stripe_tag(index):
+    """Tag de couleur alternée d'une ligne selon sa position"""
+    return 'odd' if index % 2 == 0 else 'even'
+
+
+def restripe(tree, start=0):
+    """Recalcule les couleurs alternées à partir de la ligne `start`"""
+    for index, iid in enumerate(tree.get_children()[start:], start):
+        tags = [tag for tag in tree.item(iid, 'tags') if tag not in ('odd', 'even')]
+        tree.item(iid, tags=tags + [stripe_tag(index)])
+
+
+def upsert_row(tree, iid, values, index="end"):
+    """Met à jour la ligne `iid` si elle existe, sinon l'insère à `index`.
+
+    Retourne True si la ligne a été insérée.
+    """
+    if tree.exists(iid):
+        tree.item(iid, values=values)
+        return False
+    tree.insert("", index, iid=iid, values=values)
+    return True
+
+
+def remove_rows(tree, *iids):
+    """Supprime les lignes encore présentes parmi `iids`"""
+    presentes = [iid for iid in iids if tree.exists(iid)]
+    if presentes:
+        tree.delete(*presentes)
+
+
+def sync_rows(tree, rows, iid_of, values_of, striped=False):
+    """Aligne le tableau sur `rows` en ne touchant que les lignes modifiées.
+
+    Les lignes sont identifiées par iid_of(row) (la clé primaire) : celles
+    qui ont disparu sont supprimées, les nouvelles insérées, les autres mises
+    à jour seulement si leurs valeurs ont changé. La sélection et la position
+    de défilement sont conservées.
+    """
+    premier, _ = tree.yview()
+    selection = tree.selection()
+
+    voulues = [(iid_of(row), tuple(str(v) for v in values_of(row)), values_of(row)) for row in rows]
+    cles = {iid for iid, _, _ in voulues}
+    remove_rows(tree, *[iid for iid in tree.get_children() if iid not in cles])
+
+    # Les `index` premières lignes sont déjà en place ; les suivantes sont les
+    # lignes existantes non encore placées, dans leur ordre d'origine
+    actuelles = tree.get_children()
+    presentes = set(actuelles)
+    placees = set()
+    suivante = 0
+    for index, (iid, texte, values) in enumerate(voulues):
+        while suivante < len(actuelles) and actuelles[suivante] in placees:
+            suivante += 1
+        if iid in presentes:
+            if tuple(str(v) for v in tree.item(iid, 'values')) != texte:
+                tree.item(iid, values=values)
+            if suivante < len(actuelles) and actuelles[suivante] == iid:
+                suivante += 1
+            else:
+                tree.move(iid, "", index)
+            placees.add(iid)
+        else:
+            tree.insert("", index, iid=iid, values=values)
+
+    if striped:
+        restripe(tree)
+
+    restantes = [iid for iid in selection if tree.exists(iid)]
+    if restantes:
+        tree.selection_set(restantes)
+    tree.yview_moveto(premier)
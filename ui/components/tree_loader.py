@@ -0,0 +1,85 @@
+import time
+
+# Temps maximal passé à insérer des lignes avant de rendre la main à Tk (ms)
+BUDGET_MS = 12
+# Nombre de lignes insérées entre deux lectures de l'horloge
+LOT = 32
+
+
+class TreeLoader:
+    """Remplit un ttk.Treeview par tranches planifiées avec after().
+
+    Chaque tranche insère des lignes pendant au plus `budget_ms` millisecondes,
+    puis laisse Tk traiter ses événements : les grandes listes apparaissent
+    progressivement sans figer la fenêtre. Un nouveau load() annule le
+    chargement en cours.
+    """
+
+    def __init__(self, tree, values_of, iid_of=None, tags_of=None, striped=True,
+                 budget_ms=BUDGET_MS, on_done=None):
+        self.tree = tree
+        self.values_of = values_of
+        self.iid_of = iid_of
+        self.tags_of = tags_of
+        self.striped = striped
+        self.budget = budget_ms / 1000.0
+        self.on_done = on_done
+
+        self._rows = ()
+        self._index = 0
+        self._job = None
+
+    @property
+    def en_cours(self):
+        """Vrai tant que des lignes restent à insérer"""
+        return self._job is not None
+
+    def load(self, rows):
+        """Vide le tableau et commence l'insertion de `rows`"""
+        self.cancel()
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._rows = rows
+        self._index = 0
+        self._job = self.tree.after_idle(self._step)
+
+    def cancel(self):
+        """Abandonne le chargement en cours (les lignes déjà insérées restent)"""
+        if self._job is not None:
+            self.tree.after_cancel(self._job)
+            self._job = None
+
+    def _tags(self, index, row):
+        tags = tuple(self.tags_of(row)) if self.tags_of else ()
+        if self.striped:
+            tags += ('odd' if index % 2 == 0 else 'even',)
+        return tags
+
+    def _step(self):
+        rows = self._rows
+        total = len(rows)
+        index = self._index
+        limite = time.perf_counter() + self.budget
+        insert = self.tree.insert
+
+        while index < total:
+            for row in rows[index:index + LOT]:
+                if self.iid_of:
+                    insert("", "end", iid=self.iid_of(row), values=self.values_of(row),
+                           tags=self._tags(index, row))
+                else:
+                    insert("", "end", values=self.values_of(row), tags=self._tags(index, row))
+                index += 1
+            if time.perf_counter() >= limite:
+                break
+
+        self._index = index
+        if index < total:
+            # Laisser Tk redessiner et traiter les événements avant la tranche suivante
+            self._job = self.tree.after(1, self._step)
+        else:
+            self._job = None
+            self._rows = ()
+            if self.on_done:
+                self.on_done()
@@ -0,0 +1,194 @@
+from collections import deque
+from utils.db_executor import get_executor
+
+
+class KeysetTreeview:
+    """Fenêtre glissante de lignes sur un ttk.Treeview, alimentée par pages.
+
+    Seules `max_rows` lignes au plus sont matérialisées. Quand la vue approche
+    d'un bord, la page suivante ou précédente est demandée à `fetch_page`
+    (pagination par clé : fetch_page(apres=cle | avant=cle, limit=n)) et les
+    lignes les plus éloignées sont retirées de l'autre côté.
+
+    Avec le nombre total de lignes (`count` de reset), la barre de défilement
+    représente toute la liste : sa position tient compte du rang de la fenêtre
+    et un déplacement hors de la fenêtre recharge à ce rang
+    (fetch_page(offset=rang, limit=n)).
+    """
+
+    def __init__(self, owner, tree, scrollbar, key_of, values_of, iid_of=None,
+                 page_size=200, max_rows=600, margin=0.2, on_page=None, on_error=None):
+        self.owner = owner
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.key_of = key_of
+        self.values_of = values_of
+        self.iid_of = iid_of or (lambda row: str(row[0]))
+        self.page_size = page_size
+        self.max_rows = max_rows
+        self.margin = margin
+        self.on_page = on_page
+        self.on_error = on_error
+
+        self.fetch_page = None
+        self._lignes = deque()      # (cle, iid) des lignes matérialisées, dans l'ordre
+        self._index_haut = 0        # rang absolu de la première ligne matérialisée
+        self._debut = True
+        self._fin = True
+        self._en_cours = False
+        self._total = None          # nombre total de lignes, si connu
+        self._vue = (0.0, 1.0)      # partie visible de la fenêtre (yview)
+
+        self.tree.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.configure(command=self._on_scrollbar)
+
+    def reset(self, fetch_page, count=None):
+        """Repart du début avec une nouvelle source de pages (nouveaux filtres).
+
+        `count` retourne le nombre total de lignes pour les mêmes filtres.
+        """
+        self.fetch_page = fetch_page
+        self._total = None
+        self._vider(0)
+        self._charger("suivante")
+        if count is not None:
+            get_executor().submit(
+                self.owner, count,
+                on_success=self._recevoir_total,
+                key=("total", id(self))
+            )
+
+    def _vider(self, index_haut):
+        """Retire toutes les lignes ; la prochaine page commencera au rang `index_haut`"""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self._lignes.clear()
+        self._index_haut = index_haut
+        self._debut = index_haut == 0
+        self._fin = False
+        self._en_cours = False
+
+    def _recevoir_total(self, total):
+        self._total = total
+        self._maj_scrollbar()
+
+    def _charger(self, sens):
+        if self._en_cours or self.fetch_page is None:
+            return
+        if sens == "suivante":
+            if self._fin:
+                return
+            if self._lignes:
+                borne = {"apres": self._lignes[-1][0]}
+            else:
+                borne = {"offset": self._index_haut} if self._index_haut else {}
+        else:
+            if self._debut or not self._lignes:
+                return
+            borne = {"avant": self._lignes[0][0]}
+
+        self._en_cours = True
+        get_executor().submit(
+            self.owner, self.fetch_page,
+            limit=self.page_size,
+            on_success=lambda rows: self._recevoir(sens, rows),
+            on_error=self._erreur,
+            key=("page", id(self)),
+            **borne
+        )
+
+    def _erreur(self, e):
+        self._en_cours = False
+        if self.on_error:
+            self.on_error(e)
+
+    def _tag(self, index):
+        return 'odd' if index % 2 == 0 else 'even'
+
+    def _recevoir(self, sens, rows):
+        self._en_cours = False
+        premier, _ = self.tree.yview()
+        avant = len(self._lignes)
+
+        if sens == "suivante":
+            if len(rows) < self.page_size:
+                self._fin = True
+            for row in rows:
+                index = self._index_haut + len(self._lignes)
+                iid = self.iid_of(row)
+                self.tree.insert("", "end", iid=iid, values=self.values_of(row), tags=(self._tag(index),))
+                self._lignes.append((self.key_of(row), iid))
+
+            # Retirer les lignes les plus anciennes en haut
+            surplus = len(self._lignes) - self.max_rows
+            if surplus > 0:
+                retirees = [self._lignes.popleft()[1] for _ in range(surplus)]
+                self.tree.delete(*retirees)
+                self._index_haut += surplus
+                self._debut = False
+                self.tree.yview_moveto(max(0.0, (premier * avant - surplus) / len(self._lignes)))
+        else:
+            if len(rows) < self.page_size:
+                self._debut = True
+            self._index_haut = max(0, self._index_haut - len(rows))
+            for position, row in enumerate(rows):
+                iid = self.iid_of(row)
+                self.tree.insert("", position, iid=iid, values=self.values_of(row),
+                                 tags=(self._tag(self._index_haut + position),))
+            for row in reversed(rows):
+                self._lignes.appendleft((self.key_of(row), self.iid_of(row)))
+            if self._index_haut == 0:
+                self._debut = True
+
+            # Retirer les lignes les plus récentes en bas
+            surplus = len(self._lignes) - self.max_rows
+            if surplus > 0:
+                retirees = [self._lignes.pop()[1] for _ in range(surplus)]
+                self.tree.delete(*retirees)
+                self._fin = False
+            if self._lignes:
+                self.tree.yview_moveto((premier * avant + len(rows)) / len(self._lignes))
+
+        if self.on_page:
+            self.on_page(sens, rows)
+
+    def _maj_scrollbar(self):
+        """Place la barre selon la position de la vue dans toute la liste"""
+        first, last = self._vue
+        if not self._total:
+            self.scrollbar.set(first, last)
+            return
+        taille = len(self._lignes)
+        debut = (self._index_haut + first * taille) / self._total
+        fin = (self._index_haut + last * taille) / self._total
+        self.scrollbar.set(min(debut, 1.0), min(max(fin, debut), 1.0))
+
+    def _on_scrollbar(self, *args):
+        """Commande de la barre : les positions absolues portent sur toute la liste"""
+        if args[0] != "moveto" or not self._total:
+            self.tree.yview(*args)
+            return
+
+        taille = len(self._lignes)
+        visibles = max(1, round((self._vue[1] - self._vue[0]) * taille))
+        rang = max(0, min(round(float(args[1]) * self._total), self._total - visibles))
+        dans_fenetre = self._index_haut <= rang and (
+            rang + visibles <= self._index_haut + taille or self._fin)
+        if taille and dans_fenetre:
+            self.tree.yview_moveto((rang - self._index_haut) / taille)
+        else:
+            # Hors de la fenêtre : recharger à partir de ce rang
+            self._vider(rang)
+            self._maj_scrollbar()
+            self._charger("suivante")
+
+    def _on_yscroll(self, first, last):
+        self._vue = (float(first), float(last))
+        self._maj_scrollbar()
+        if self._en_cours:
+            return
+        if float(last) >= 1.0 - self.margin and not self._fin:
+            self._charger("suivante")
+        elif float(first) <= self.margin and not self._debut:
+            self._charger("precedente")
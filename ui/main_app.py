@@ -1,16 +1,21 @@
 import customtkinter as ctk
+import importlib
 from database.db_manager import DatabaseManager
-from ui.pages.home_page import HomePage
-from ui.pages.unite_page import UnitePage
-from ui.pages.article_page import ArticlePage
-from ui.pages.rapport_page import RapportPage
-from ui.pages.entrepot_page import EntrepotPage
-from ui.pages.inventaire_page import InventairePage
-from PIL import Image
+from utils.startup_profile import profiler
 import os
 
+# Pages importées à leur premier affichage : clé -> (module, classe)
+PAGES = {
+    "home": ("ui.pages.home_page", "HomePage"),
+    "unite": ("ui.pages.unite_page", "UnitePage"),
+    "article": ("ui.pages.article_page", "ArticlePage"),
+    "rapport": ("ui.pages.rapport_page", "RapportPage"),
+    "entrepot": ("ui.pages.entrepot_page", "EntrepotPage"),
+    "inventaire": ("ui.pages.inventaire_page", "InventairePage"),
+}
+
 class MainApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, db=None):
         super().__init__()
         
         # Configuration de l'apparence
@@ -25,21 +30,48 @@ class MainApp(ctk.CTk):
         # Centrer la fenêtre
         self.center_window()
         
-        # Initialiser la base de données
-        self.db = DatabaseManager()
+        # Base de données (déjà préparée par l'écran de démarrage le cas échéant)
+        self.db = db if db is not None else DatabaseManager()
         
         # Variables
         self.current_page = None
         self.current_button = None
         
+        # Pages déjà construites, gardées en vie entre deux navigations
+        self.pages = {}
+        
+        # Suivi des modifications de données pour recharger les pages masquées
+        self._version_externe = self.db.connections.verifier_externe()
+        self.db.connections.add_listener(self.on_data_change)
+        
         # Créer l'interface
-        self.create_layout()
+        with profiler.phase("Construction de la fenêtre"):
+            self.create_layout()
         
-        # Charger le logo
-        self.load_logo()
+        # La page d'accueil et le logo sont chargés une fois la fenêtre affichée
+        self.after(10, self.finish_startup)
+    
+    def finish_startup(self):
+        """Suite du démarrage après le premier affichage de la fenêtre"""
+        profiler.mark("Première fenêtre affichée")
         
         # Afficher la page d'accueil par défaut
-        self.show_home_page()
+        with profiler.phase("Page d'accueil"):
+            self.show_home_page()
+        
+        # Charger le logo
+        with profiler.phase("Logo"):
+            self.load_logo()
+        
+        profiler.mark("Application prête")
+        profiler.report()
+        
+        # Processus d'impression lancé en tâche de fond, prêt pour la première facture
+        self.after_idle(self.demarrer_impression)
+    
+    def demarrer_impression(self):
+        from utils.print_queue import get_print_queue
+        get_print_queue().demarrer()
     
     def center_window(self):
         """Centre la fenêtre sur l'écran"""
@@ -242,6 +274,8 @@ class MainApp(ctk.CTk):
             
             # Vérifier si le fichier existe
             if os.path.exists(logo_path):
+                from PIL import Image
+                
                 # Charger et redimensionner l'image
                 logo_image = Image.open(logo_path)
                 logo_image = logo_image.resize((80, 80), Image.Resampling.LANCZOS)  # Augmenté de 50x50 à 80x80
@@ -280,11 +314,45 @@ class MainApp(ctk.CTk):
         self.content_frame.grid_rowconfigure(0, weight=1)
         self.content_frame.grid_columnconfigure(0, weight=1)
     
-    def clear_content(self):
-        """Efface le contenu actuel"""
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
-        self.current_page = None
+    def on_data_change(self, tables):
+        """Écriture validée par l'application : marquer les pages masquées concernées.
+
+        Peut être appelé depuis un thread de l'exécuteur : on ne fait que noter.
+        """
+        for page in list(self.pages.values()):
+            if page is not self.current_page:
+                page.mark_dirty(tables)
+    
+    def check_external_changes(self):
+        """Base modifiée par un autre processus : toutes les pages sont à recharger"""
+        version_externe = self.db.connections.verifier_externe()
+        if version_externe != self._version_externe:
+            self._version_externe = version_externe
+            for page in self.pages.values():
+                page.mark_dirty()
+    
+    def show_page(self, nom, button):
+        """Affiche la page demandée, en important et construisant la page au premier affichage"""
+        self.set_active_button(button)
+        page = self.pages.get(nom)
+        if page is not None and page is self.current_page:
+            return
+        
+        # Masquer la page courante sans la détruire
+        if self.current_page is not None:
+            self.current_page.on_hide()
+            self.current_page.pack_forget()
+        
+        self.check_external_changes()
+        if page is None:
+            module, classe = PAGES[nom]
+            page_class = getattr(importlib.import_module(module), classe)
+            page = page_class(self.content_frame, self.db)
+            self.pages[nom] = page
+        
+        page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.current_page = page
+        page.on_show()
     
     def set_active_button(self, active_button):
         """Met en surbrillance le bouton actif"""
@@ -304,51 +372,27 @@ class MainApp(ctk.CTk):
     
     def show_home_page(self):
         """Affiche la page d'accueil (vente)"""
-        self.clear_content()
-        self.set_active_button(self.home_btn)
-        
-        self.current_page = HomePage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("home", self.home_btn)
     
     def show_unite_page(self):
         """Affiche la page de gestion des unités"""
-        self.clear_content()
-        self.set_active_button(self.unite_btn)
-        
-        self.current_page = UnitePage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("unite", self.unite_btn)
     
     def show_article_page(self):
         """Affiche la page de gestion des articles"""
-        self.clear_content()
-        self.set_active_button(self.article_btn)
-        
-        self.current_page = ArticlePage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("article", self.article_btn)
     
     def show_rapport_page(self):
         """Affiche la page des rapports"""
-        self.clear_content()
-        self.set_active_button(self.rapport_btn)
-        
-        self.current_page = RapportPage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("rapport", self.rapport_btn)
 
     def show_entrepot_page(self):
         """Affiche la page de gestion des entrepôts"""
-        self.clear_content()
-        self.set_active_button(self.entrepot_btn)
-        
-        self.current_page = EntrepotPage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("entrepot", self.entrepot_btn)
 
     def show_inventaire_page(self):
         """Affiche la page d'inventaire"""
-        self.clear_content()
-        self.set_active_button(self.inventaire_btn)
-        
-        self.current_page = InventairePage(self.content_frame, self.db)
-        self.current_page.pack(fill="both", expand=True, padx=10, pady=10)
+        self.show_page("inventaire", self.inventaire_btn)
 
 if __name__ == "__main__":
     app = MainApp()
@@ -1,14 +1,24 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, Canvas
-from database.db_manager import DatabaseManager
-from ui.pages.article_trash_page import ArticleTrashPage
+from ui.components.loading import LoadingIndicator
+from ui.components.tree_loader import TreeLoader
+from ui.components.tree_diff import restripe, remove_rows, upsert_row
+from ui.components.page import PageLifecycle
+from utils.db_executor import get_executor
+
+# Délai d'attente après la dernière frappe avant de lancer la recherche (ms)
+DELAI_RECHERCHE_MS = 150
+
+class ArticlePage(ctk.CTkFrame, PageLifecycle):
+    tables = frozenset({"article", "prix_article", "unite", "entrepot"})
 
-class ArticlePage(ctk.CTkFrame):
     def __init__(self, parent, db):
         super().__init__(parent, corner_radius=0, fg_color="transparent")
 
-        self.db = DatabaseManager()
+        self.db = db
         self.selected_article_id = None
+        self._ordre_articles = []  # iids de tous les articles, dans l'ordre d'affichage
+        self._recherche_after = None
         self.setup_ui()
         self.load_articles()
         self.unite_vars = {}  # Stocker les variables pour chaque unité
@@ -96,28 +106,39 @@ class ArticlePage(ctk.CTkFrame):
         self.setup_articles_table(list_frame)
 
     def filter_articles(self, *args):
-        """Filtre les articles en fonction du texte de recherche"""
-        search_text = self.search_var.get().lower()
-        
-        # Si le treeview existe
-        if hasattr(self, 'tree_articles'):
-            if not search_text:  # Si le champ de recherche est vide
-                # Recharger tous les articles
-                self.load_articles()
-                return
-                
-            # Pour chaque article dans le tableau
-            for item in self.tree_articles.get_children():
-                # Récupérer les valeurs de l'élément
-                values = self.tree_articles.item(item)['values']
-                # Convertir toutes les valeurs en chaînes de caractères et les joindre
-                item_text = ' '.join(str(value).lower() for value in values if value is not None)
-                
-                # Si le texte de recherche est dans l'élément
-                if search_text in item_text:
-                    self.tree_articles.reattach(item, '', 'end')  # Montrer l'élément
-                else:
-                    self.tree_articles.detach(item)  # Cacher l'élément
+        """Relance le filtrage après une courte pause de frappe"""
+        if self._recherche_after is not None:
+            self.after_cancel(self._recherche_after)
+        self._recherche_after = self.after(DELAI_RECHERCHE_MS, self.lancer_recherche)
+
+    def lancer_recherche(self):
+        """Filtre les articles via l'index plein texte de la base"""
+        self._recherche_after = None
+        if self.loader.en_cours:
+            # La recherche sera appliquée à la fin du remplissage
+            return
+        search_text = self.search_var.get().strip()
+
+        if not search_text:  # Si le champ de recherche est vide
+            # Réafficher tous les articles déjà chargés
+            self.afficher_resultats(self._ordre_articles)
+            return
+
+        get_executor().submit(
+            self, self.db.search_articles, search_text, None,
+            on_success=lambda articles: self.afficher_resultats(
+                [str(article[0]) for article in articles]
+            ),
+            on_error=self.on_load_error,
+            key="recherche"
+        )
+
+    def afficher_resultats(self, iids):
+        """N'affiche que les lignes dont l'iid est donné, dans cet ordre"""
+        visibles = [iid for iid in iids if self.tree_articles.exists(iid)]
+        self.tree_articles.set_children('', *visibles)
+        for index, iid in enumerate(visibles):
+            self.tree_articles.item(iid, tags=('odd' if index % 2 == 0 else 'even',))
 
     def setup_articles_table(self, parent):
         table_frame = ctk.CTkFrame(parent)
@@ -168,6 +189,21 @@ class ArticlePage(ctk.CTkFrame):
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
 
+        # Configurer des tags pour l'alternance des couleurs de lignes
+        self.tree_articles.tag_configure('odd', background='#f0f0f0')
+        self.tree_articles.tag_configure('even', background='#ffffff')
+
+        # Remplissage progressif du tableau
+        self.loader = TreeLoader(
+            self.tree_articles,
+            values_of=self.valeurs_article,
+            iid_of=lambda article: str(article['id']),
+            on_done=self.on_articles_affiches
+        )
+
+        # Indicateur de chargement
+        self.loading = LoadingIndicator(table_frame)
+
         # Liaison des événements
         self.tree_articles.bind("<Double-1>", self.on_article_double_click)
 
@@ -204,14 +240,10 @@ class ArticlePage(ctk.CTkFrame):
 
         # Ligne 3 : Entrepôt
         ctk.CTkLabel(form_frame, text="Entrepôt :").grid(row=3, column=0, sticky="w", pady=5, padx=15)
-        self.entrepots = self.db.get_all_entrepots()
-        self.entrepot_names = [e[1] for e in self.entrepots]
-        self.entrepot_id_map = {e[1]: e[0] for e in self.entrepots}
         self.entrepot_var = ctk.StringVar()
-        self.option_entrepot = ctk.CTkOptionMenu(form_frame, variable=self.entrepot_var, values=self.entrepot_names, width=300)
+        self.option_entrepot = ctk.CTkOptionMenu(form_frame, variable=self.entrepot_var, values=[], width=300)
         self.option_entrepot.grid(row=3, column=1, sticky="ew", pady=5, padx=(0, 15))
-        if self.entrepot_names:
-            self.entrepot_var.set(self.entrepot_names[0])
+        self.charger_entrepots()
 
         # Frame pour Unités & Prix avec fond légèrement différent
         unite_frame_bg = ctk.CTkFrame(
@@ -313,6 +345,22 @@ class ArticlePage(ctk.CTkFrame):
 
         # Ajouter après la configuration du frame_unites:
         self.unite_widgets = {}  # Pour stocker les références aux widgets des unités
+        self.construire_unites()
+
+    def charger_entrepots(self):
+        """Remplit la liste des entrepôts du formulaire"""
+        self.entrepots = self.db.get_all_entrepots()
+        self.entrepot_names = [e[1] for e in self.entrepots]
+        self.entrepot_id_map = {e[1]: e[0] for e in self.entrepots}
+        self.option_entrepot.configure(values=self.entrepot_names)
+        if self.entrepot_var.get() not in self.entrepot_id_map:
+            self.entrepot_var.set(self.entrepot_names[0] if self.entrepot_names else "")
+
+    def construire_unites(self):
+        """Crée une ligne case à cocher + prix pour chaque unité"""
+        for unite_info in self.unite_widgets.values():
+            unite_info['row'].destroy()
+        self.unite_widgets = {}
         
         # Récupérer toutes les unités disponibles
         unites = self.get_unites()
@@ -415,44 +463,125 @@ class ArticlePage(ctk.CTkFrame):
             return []
 
     def load_articles(self):
-        try:
-            # Vider le tableau
-            for item in self.tree_articles.get_children():
-                self.tree_articles.delete(item)
+        """Charge le catalogue en arrière-plan puis remplit le tableau"""
+        self.loading.show()
+        get_executor().submit(
+            self, self.db.load_catalog,
+            on_success=self.afficher_articles,
+            on_error=self.on_load_error,
+            key="articles"
+        )
 
-            # Récupérer tous les articles
-            articles = self.db.get_all_articles()
-            
-            # Trier les articles par nom
-            articles_tries = sorted(articles, key=lambda x: x[1])
+    def on_load_error(self, e):
+        self.loading.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
+
+    def afficher_articles(self, articles):
+        self.loading.hide()
+        # Supprimer aussi les lignes masquées par la recherche (détachées)
+        if self._ordre_articles:
+            self.tree_articles.delete(*[iid for iid in self._ordre_articles
+                                        if self.tree_articles.exists(iid)])
+        self._ordre_articles = [str(article['id']) for article in articles]
+        self.loader.load(articles)
+
+    def valeurs_article(self, article):
+        """Valeurs affichées pour un article du catalogue"""
+        # Formater les unités et prix de manière plus lisible
+        unites_prix_details = []
+        for unite in article['unites']:
+            unites_prix_details.append(f"{unite[2]} : {unite[3]} Ar")
+        
+        # Formater la chaîne des unités et prix
+        unites_prix_str = " | ".join(unites_prix_details) if unites_prix_details else "Aucune unité"
+        
+        return (
+            article['id'],         # ID
+            article['nom'],        # Nom
+            article['reference'],  # Référence
+            unites_prix_str        # Unités et Prix
+        )
 
-            # Parcourir les articles triés
-            for article in articles_tries:
-                # Récupérer les unités et prix pour cet article
-                unites_prix = self.db.get_unites_by_article(article[0])
-                
-                # Formater les unités et prix de manière plus lisible
-                unites_prix_details = []
-                for unite in unites_prix:
-                    unites_prix_details.append(f"{unite[2]} : {unite[3]} Ar")
-                
-                # Formater la chaîne des unités et prix
-                unites_prix_str = " | ".join(unites_prix_details) if unites_prix_details else "Aucune unité"
-                
-                # Insérer l'article avec ses unités et prix
-                self.tree_articles.insert("", "end", values=(
-                    article[0],      # ID
-                    article[1],      # Nom
-                    article[2],      # Référence
-                    unites_prix_str  # Unités et Prix
-                ), tags=('odd' if len(self.tree_articles.get_children()) % 2 == 0 else 'even',))
-            
-            # Configurer des tags pour l'alternance des couleurs de lignes
-            self.tree_articles.tag_configure('odd', background='#f0f0f0')
-            self.tree_articles.tag_configure('even', background='#ffffff')
+    def rafraichir_articles(self, *article_ids):
+        """Recharge uniquement les lignes des articles donnés après une modification"""
+        if self.loader.en_cours:
+            # Remplissage initial pas encore terminé : tout recharger
+            self.load_articles()
+            return
+        get_executor().submit(
+            self, self.db.load_catalog, article_ids,
+            on_success=lambda articles: self.appliquer_articles(article_ids, articles),
+            on_error=self.on_load_error
+        )
 
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
+    def appliquer_articles(self, article_ids, articles):
+        """Insère, met à jour ou retire les lignes des articles modifiés"""
+        trouves = {str(article['id']): article for article in articles}
+        filtre_actif = bool(self.search_var.get().strip())
+        positions_touchees = []
+
+        for article_id in article_ids:
+            iid = str(article_id)
+            if iid in self._ordre_articles:
+                ancienne_position = self._ordre_articles.index(iid)
+                del self._ordre_articles[ancienne_position]
+            else:
+                ancienne_position = None
+            article = trouves.get(iid)
+
+            if article is None:
+                # Article désactivé ou supprimé
+                remove_rows(self.tree_articles, iid)
+                if ancienne_position is not None:
+                    positions_touchees.append(ancienne_position)
+                continue
+
+            upsert_row(self.tree_articles, iid, self.valeurs_article(article))
+
+            # Position selon le nom (même ordre que load_catalog)
+            position = self.position_article(article['nom'])
+            self._ordre_articles.insert(position, iid)
+            if position != ancienne_position:
+                if not filtre_actif:
+                    self.tree_articles.move(iid, "", position)
+                positions_touchees.append(position)
+                if ancienne_position is not None:
+                    positions_touchees.append(ancienne_position)
+
+        if filtre_actif:
+            # Recherche en cours : elle remet elle-même les lignes dans l'ordre
+            self.lancer_recherche()
+        elif positions_touchees:
+            restripe(self.tree_articles, min(positions_touchees))
+
+    def position_article(self, nom):
+        """Rang d'insertion d'un nom dans _ordre_articles (recherche dichotomique)"""
+        debut, fin = 0, len(self._ordre_articles)
+        while debut < fin:
+            milieu = (debut + fin) // 2
+            if self.tree_articles.set(self._ordre_articles[milieu], "Nom") <= nom:
+                debut = milieu + 1
+            else:
+                fin = milieu
+        return debut
+
+    def refresh(self, tables):
+        """Recharge ce qui a changé pendant que la page était masquée"""
+        if "entrepot" in tables:
+            self.charger_entrepots()
+        if "unite" in tables:
+            if self.selected_article_id is None:
+                # Formulaire vide : les cases d'unités peuvent être reconstruites
+                self.construire_unites()
+            else:
+                # Modification en cours : reconstruire au prochain affichage
+                self.mark_dirty({"unite"})
+        self.load_articles()
+
+    def on_articles_affiches(self):
+        """Fin du remplissage : réappliquer la recherche en cours"""
+        if self.search_var.get().strip():
+            self.lancer_recherche()
 
     def ajouter_article(self):
         try:
@@ -494,7 +623,7 @@ class ArticlePage(ctk.CTkFrame):
             for unite_id, unite_label, prix in unites_selectionnees:
                 self.db.add_prix_article(article_id, unite_id, prix)
 
-            self.load_articles()  # Rafraîchir la liste des articles
+            self.rafraichir_articles(article_id)  # Ajouter la ligne du nouvel article
             self.annuler_modification()
             messagebox.showinfo("Succès", f"Article '{nom}' ajouté avec succès avec {len(unites_selectionnees)} unité(s)!")
 
@@ -645,11 +774,7 @@ class ArticlePage(ctk.CTkFrame):
             self.db.update_article(self.selected_article_id, nom, reference, entrepot_id)
 
             # Supprimer TOUS les anciens prix de cet article
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM prix_article WHERE article_id = ?", (self.selected_article_id,))
-            conn.commit()
-            conn.close()
+            self.db.delete_all_prix_article(self.selected_article_id)
 
             # Ajouter les nouveaux prix
             unites_selectionnees = []
@@ -677,7 +802,7 @@ class ArticlePage(ctk.CTkFrame):
             for unite_id, unite_label, prix in unites_selectionnees:
                 self.db.create_prix(self.selected_article_id, unite_id, prix)
 
-            self.load_articles()  # Rafraîchir la liste des articles
+            self.rafraichir_articles(self.selected_article_id)  # Mettre à jour la ligne de l'article
             self.annuler_modification()
             messagebox.showinfo("Succès", f"Article '{nom}' mis à jour avec succès avec {len(unites_selectionnees)} unité(s)!")
 
@@ -722,8 +847,8 @@ class ArticlePage(ctk.CTkFrame):
             resultat = self.db.delete_article(article_id)
             
             if resultat:
-                # Rafraîchir la liste des articles
-                self.load_articles()
+                # Retirer l'article de la liste
+                self.rafraichir_articles(article_id)
                 
                 # Réinitialiser le formulaire
                 self.annuler_modification()
@@ -788,6 +913,8 @@ class ArticlePage(ctk.CTkFrame):
             self.btn_supprimer.configure(state="normal")
 
     def open_trash_page(self):
+        from ui.pages.article_trash_page import ArticleTrashPage
+
         trash_window = ctk.CTkToplevel(self)
         trash_window.title("Corbeille des Articles")
         trash_window.geometry("800x600")
@@ -1,6 +1,8 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox, Menu
-from database.db_manager import DatabaseManager
+from ui.components.loading import LoadingIndicator
+from ui.components.tree_loader import TreeLoader
+from utils.db_executor import get_executor
 
 class ArticleTrashPage(ctk.CTkFrame):
     def __init__(self, parent, db, load_articles_callback=None):
@@ -87,6 +89,21 @@ class ArticleTrashPage(ctk.CTkFrame):
         table_frame.grid_rowconfigure(0, weight=1)
         table_frame.grid_columnconfigure(0, weight=1)
 
+        # Indicateur de chargement
+        self.loading = LoadingIndicator(table_frame)
+
+        # Couleurs alternées et remplissage progressif du tableau
+        self.tree_articles_inactifs.tag_configure('odd', background='#f0f0f0')
+        self.tree_articles_inactifs.tag_configure('even', background='#ffffff')
+        self.loader = TreeLoader(
+            self.tree_articles_inactifs,
+            values_of=lambda article: (
+                article[0],  # ID
+                article[1],  # Nom
+                article[2]   # Référence
+            )
+        )
+
         # Menu contextuel
         self.create_context_menu()
         
@@ -113,21 +130,21 @@ class ArticleTrashPage(ctk.CTkFrame):
             self.context_menu.post(event.x_root, event.y_root)
 
     def load_articles_inactifs(self):
-        for item in self.tree_articles_inactifs.get_children():
-            self.tree_articles_inactifs.delete(item)
+        self.loading.show()
+        get_executor().submit(
+            self, self.db.get_all_articles_inactifs,
+            on_success=self.afficher_articles_inactifs,
+            on_error=self.on_load_error,
+            key="articles_inactifs"
+        )
 
-        articles = self.db.get_all_articles_inactifs()
-        
-        for article in articles:
-            # Insérer l'article dans le tableau
-            item = self.tree_articles_inactifs.insert("", "end", values=(
-                article[0],  # ID
-                article[1],  # Nom
-                article[2]   # Référence
-            ), tags=('odd' if len(self.tree_articles_inactifs.get_children()) % 2 == 0 else 'even',))
+    def on_load_error(self, e):
+        self.loading.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
 
-        self.tree_articles_inactifs.tag_configure('odd', background='#f0f0f0')
-        self.tree_articles_inactifs.tag_configure('even', background='#ffffff')
+    def afficher_articles_inactifs(self, articles):
+        self.loading.hide()
+        self.loader.load(articles)
 
     def get_selected_article(self):
         selected_items = self.tree_articles_inactifs.selection()
@@ -2,6 +2,10 @@ import customtkinter as ctk
 import tkinter.messagebox as messagebox
 import tkinter.ttk as ttk
 import tkinter as tk
+from ui.components.loading import LoadingIndicator
+from utils.db_executor import get_executor
+from ui.components.tree_diff import sync_rows
+from ui.components.page import PageLifecycle
 
 class EntrepotDetailsWindow(ctk.CTkToplevel):
     def __init__(self, master, db, entrepot):
@@ -27,9 +31,6 @@ class EntrepotDetailsWindow(ctk.CTkToplevel):
         )
         titre.pack(pady=(20, 10))
         
-        # Récupérer les statistiques
-        stats = self.db.get_entrepot_stats(entrepot[0])
-        
         # Frame Articles
         articles_frame = ctk.CTkFrame(main_frame, fg_color="#f9f9fc", corner_radius=10)
         articles_frame.grid(row=0, column=0, padx=(0, 10), pady=10, sticky="nsew")
@@ -45,31 +46,24 @@ class EntrepotDetailsWindow(ctk.CTkToplevel):
         articles_details = ctk.CTkFrame(articles_frame, fg_color="transparent")
         articles_details.pack(fill="x", padx=20, pady=10)
         
-        # Total articles et pourcentage
-        ctk.CTkLabel(
+        # Total articles et pourcentage (rempli après chargement)
+        self.label_articles = ctk.CTkLabel(
             articles_details, 
-            text=f"Total Articles: {stats['total_articles']}\n"
-                 f"Pourcentage du Stock: {stats['pourcentage_articles']}%", 
+            text="⏳ Chargement...", 
             font=ctk.CTkFont(size=12)
-        ).pack(pady=5)
+        )
+        self.label_articles.pack(pady=5)
         
         # Répartition par unité
-        unite_frame = ctk.CTkFrame(articles_frame, fg_color="transparent")
-        unite_frame.pack(fill="x", padx=20, pady=10)
+        self.unite_frame = ctk.CTkFrame(articles_frame, fg_color="transparent")
+        self.unite_frame.pack(fill="x", padx=20, pady=10)
         
         ctk.CTkLabel(
-            unite_frame, 
+            self.unite_frame, 
             text="Répartition par Unité:", 
             font=ctk.CTkFont(size=12, weight="bold")
         ).pack(anchor="w", pady=(0, 5))
         
-        for unite in stats['repartition_unites']:
-            ctk.CTkLabel(
-                unite_frame, 
-                text=f"{unite[0]}: {unite[1]} articles ({unite[2]}%)", 
-                font=ctk.CTkFont(size=12)
-            ).pack(anchor="w")
-        
         # Frame Ventes
         ventes_frame = ctk.CTkFrame(main_frame, fg_color="#f0f0f0", corner_radius=10)
         ventes_frame.grid(row=0, column=1, padx=(10, 0), pady=10, sticky="nsew")
@@ -85,12 +79,12 @@ class EntrepotDetailsWindow(ctk.CTkToplevel):
         ventes_details = ctk.CTkFrame(ventes_frame, fg_color="transparent")
         ventes_details.pack(fill="x", padx=20, pady=10)
         
-        ctk.CTkLabel(
+        self.label_ventes = ctk.CTkLabel(
             ventes_details, 
-            text=f"Quantité Totale Vendue: {stats['total_quantite_vendue']:.2f}\n"
-                 f"Total des Ventes: {stats['total_ventes']:,.2f} Ar", 
+            text="⏳ Chargement...", 
             font=ctk.CTkFont(size=12)
-        ).pack(pady=5)
+        )
+        self.label_ventes.pack(pady=5)
         
         # Frame pour le tableau des articles
         articles_table_frame = ctk.CTkFrame(main_frame, fg_color="#ffffff", corner_radius=10)
@@ -125,30 +119,59 @@ class EntrepotDetailsWindow(ctk.CTkToplevel):
         scrollbar.pack(side="right", fill="y")
         self.tree_articles.configure(yscrollcommand=scrollbar.set)
         
-        # Charger les articles de l'entrepôt
+        # Indicateur de chargement
+        self.loading = LoadingIndicator(articles_table_frame)
+        
+        # Charger les statistiques et les articles de l'entrepôt en arrière-plan
+        self.charger_stats()
         self.charger_articles_entrepot()
     
+    def charger_stats(self):
+        get_executor().submit(
+            self, self.db.get_entrepot_stats, self.entrepot[0],
+            on_success=self.afficher_stats,
+            on_error=self.on_load_error,
+            key="stats"
+        )
+    
+    def afficher_stats(self, stats):
+        self.label_articles.configure(
+            text=f"Total Articles: {stats['total_articles']}\n"
+                 f"Pourcentage du Stock: {stats['pourcentage_articles']}%"
+        )
+        
+        for unite in stats['repartition_unites']:
+            ctk.CTkLabel(
+                self.unite_frame, 
+                text=f"{unite[0]}: {unite[1]} articles ({unite[2]}%)", 
+                font=ctk.CTkFont(size=12)
+            ).pack(anchor="w")
+        
+        self.label_ventes.configure(
+            text=f"Quantité Totale Vendue: {stats['total_quantite_vendue']:.2f}\n"
+                 f"Total des Ventes: {stats['total_ventes']:,.2f} Ar"
+        )
+    
+    def on_load_error(self, e):
+        self.loading.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement de l'entrepôt: {e}", parent=self)
+    
     def charger_articles_entrepot(self):
+        self.loading.show()
+        get_executor().submit(
+            self, self.db.get_articles_entrepot, self.entrepot[0],
+            on_success=self.afficher_articles_entrepot,
+            on_error=self.on_load_error,
+            key="articles"
+        )
+    
+    def afficher_articles_entrepot(self, articles):
+        self.loading.hide()
+        
         # Vider le treeview
         for i in self.tree_articles.get_children():
             self.tree_articles.delete(i)
         
-        # Récupérer les articles de l'entrepôt
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT a.id, a.nom, a.reference, 
-                   GROUP_CONCAT(u.libelle || ' (' || pa.prix_unitaire || ' Ar)') as unites
-            FROM article a
-            LEFT JOIN prix_article pa ON a.id = pa.article_id
-            LEFT JOIN unite u ON pa.unite_id = u.id
-            WHERE a.entrepot_id = ? AND a.actif = 1
-            GROUP BY a.id, a.nom, a.reference
-        """, (self.entrepot[0],))
-        
-        articles = cursor.fetchall()
-        conn.close()
-        
         # Ajouter les articles au treeview
         for article in articles:
             self.tree_articles.insert("", "end", values=(
@@ -157,7 +180,10 @@ class EntrepotDetailsWindow(ctk.CTkToplevel):
                 article[3] or "Aucune unité"  # Unités
             ))
 
-class EntrepotPage(ctk.CTkFrame):
+class EntrepotPage(ctk.CTkFrame, PageLifecycle):
+    # entrepot_stats est tenue à jour par triggers lors des écritures sur les articles et ventes
+    tables = frozenset({"entrepot", "entrepot_stats"})
+
     def __init__(self, master, db):
         super().__init__(master)
         self.db = db
@@ -270,9 +296,24 @@ class EntrepotPage(ctk.CTkFrame):
         )
         liste_titre.pack(pady=(15, 10))
         
+        # Choix entre la liste et la vue d'ensemble de tous les entrepôts
+        self.mode_affichage = ctk.CTkSegmentedButton(
+            liste_frame,
+            values=["Liste", "Vue d'ensemble"],
+            command=self.changer_mode
+        )
+        self.mode_affichage.set("Liste")
+        self.mode_affichage.pack(pady=(0, 5))
+        
+        # Conteneur commun aux deux vues
+        vues_frame = ctk.CTkFrame(liste_frame, fg_color="transparent")
+        vues_frame.pack(fill="both", expand=True)
+        
         # Treeview pour la liste des entrepôts
+        self.liste_vue = ctk.CTkFrame(vues_frame, fg_color="transparent")
+        self.liste_vue.pack(fill="both", expand=True)
         self.tree_entrepots = ttk.Treeview(
-            liste_frame, 
+            self.liste_vue, 
             columns=("Nom", "Localisation"), 
             show="headings"
         )
@@ -281,10 +322,28 @@ class EntrepotPage(ctk.CTkFrame):
         self.tree_entrepots.pack(fill="both", expand=True, padx=10, pady=10)
         
         # Scrollbar
-        scrollbar = ttk.Scrollbar(liste_frame, orient="vertical", command=self.tree_entrepots.yview)
+        scrollbar = ttk.Scrollbar(self.liste_vue, orient="vertical", command=self.tree_entrepots.yview)
         scrollbar.pack(side="right", fill="y")
         self.tree_entrepots.configure(yscrollcommand=scrollbar.set)
         
+        # Vue d'ensemble : une ligne de statistiques par entrepôt
+        self.overview_vue = ctk.CTkFrame(vues_frame, fg_color="transparent")
+        colonnes_overview = ("Nom", "Articles", "Part (%)", "Quantité vendue", "Total des ventes")
+        self.tree_overview = ttk.Treeview(
+            self.overview_vue,
+            columns=colonnes_overview,
+            show="headings"
+        )
+        for col in colonnes_overview:
+            self.tree_overview.heading(col, text=col)
+            self.tree_overview.column(col, width=90, anchor="w" if col == "Nom" else "e")
+        scrollbar_overview = ttk.Scrollbar(self.overview_vue, orient="vertical", command=self.tree_overview.yview)
+        scrollbar_overview.pack(side="right", fill="y")
+        self.tree_overview.configure(yscrollcommand=scrollbar_overview.set)
+        self.tree_overview.pack(fill="both", expand=True, padx=10, pady=10)
+        self.tree_overview.bind("<Double-1>", self.voir_details_overview)
+        self.loading_overview = LoadingIndicator(self.overview_vue)
+        
         # Événements
         self.tree_entrepots.bind("<Double-1>", self.voir_details_entrepot)
         self.tree_entrepots.bind("<Button-3>", self.show_context_menu)
@@ -405,20 +464,69 @@ class EntrepotPage(ctk.CTkFrame):
         self.selected_entrepot_id = None
     
     def charger_entrepots(self):
-        # Vider le treeview
-        for i in self.tree_entrepots.get_children():
-            self.tree_entrepots.delete(i)
-        
         # Récupérer les entrepôts
         entrepots = self.db.get_all_entrepots()
         
-        # Ajouter les entrepôts au treeview
-        for entrepot in entrepots:
-            self.tree_entrepots.insert(
-                "", 
-                "end", 
-                values=(entrepot[1], entrepot[2] or "Non spécifiée", entrepot[0])
+        # Mettre à jour le treeview ligne par ligne (iid = id de l'entrepôt)
+        sync_rows(
+            self.tree_entrepots, entrepots,
+            iid_of=lambda entrepot: str(entrepot[0]),
+            values_of=lambda entrepot: (entrepot[1], entrepot[2] or "Non spécifiée", entrepot[0])
+        )
+        
+        # Rafraîchir la vue d'ensemble si elle est affichée
+        if self.mode_affichage.get() == "Vue d'ensemble":
+            self.charger_overview()
+    
+    def changer_mode(self, mode):
+        """Bascule entre la liste des entrepôts et la vue d'ensemble"""
+        if mode == "Vue d'ensemble":
+            self.liste_vue.pack_forget()
+            self.overview_vue.pack(fill="both", expand=True)
+            self.charger_overview()
+        else:
+            self.overview_vue.pack_forget()
+            self.liste_vue.pack(fill="both", expand=True)
+    
+    def charger_overview(self):
+        """Charge les statistiques de tous les entrepôts (une requête groupée, mise en cache)"""
+        self.loading_overview.show()
+        get_executor().submit(
+            self, self.db.catalog.entrepots_overview,
+            on_success=self.afficher_overview,
+            on_error=self.on_overview_error,
+            key="overview"
+        )
+    
+    def on_overview_error(self, e):
+        self.loading_overview.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement des statistiques: {e}", parent=self)
+    
+    def afficher_overview(self, entrepots):
+        self.loading_overview.hide()
+        
+        sync_rows(
+            self.tree_overview, entrepots,
+            iid_of=lambda entrepot: str(entrepot[0]),
+            values_of=lambda entrepot: (
+                entrepot[1],                 # Nom
+                entrepot[3],                 # Nombre d'articles
+                f"{entrepot[4]:.2f}",        # Part des articles actifs
+                f"{entrepot[5]:.2f}",        # Quantité vendue
+                f"{entrepot[6]:,.2f} Ar"     # Total des ventes
             )
+        )
+    
+    def voir_details_overview(self, event=None):
+        selected_item = self.tree_overview.selection()
+        if not selected_item:
+            return
+        entrepot = self.db.catalog.entrepot(selected_item[0])
+        if entrepot:
+            EntrepotDetailsWindow(self, self.db, entrepot)
+    
+    def refresh(self, tables):
+        self.charger_entrepots()
     
     def show_context_menu(self, event):
         # Sélectionner la ligne sur laquelle on a cliqué
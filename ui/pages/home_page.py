@@ -1,24 +1,27 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from database.db_manager import DatabaseManager
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.pdfgen import canvas
-import tempfile
 import os
-import subprocess
-import platform
 import tkinter as tk
+from utils.db_executor import get_executor
+from utils.print_queue import get_print_queue
+from utils.escpos import imprimer_ticket, lignes_panier
+from ui.components.page import PageLifecycle
+from utils.scanner import resoudre_scan, ScanError
+from models.panier import Panier
+
+# Délai d'attente après la dernière frappe avant de lancer la recherche (ms)
+DELAI_RECHERCHE_MS = 150
+
+class HomePage(ctk.CTkFrame, PageLifecycle):
+    tables = frozenset({"article", "prix_article", "unite"})
 
-class HomePage(ctk.CTkFrame):
     def __init__(self, parent, db):
         super().__init__(parent, corner_radius=0, fg_color="transparent")
-        self.db = DatabaseManager()
-        self.panier = []  # Liste pour stocker les articles du panier
+        self.db = db
+        self.panier = Panier()  # Lignes fusionnées par (article, unité)
+        self.panier.add_listener(self.on_panier_change)
+        self._recherche_after = None
         self.setup_ui()
 
     def setup_ui(self):
@@ -112,8 +115,6 @@ class HomePage(ctk.CTkFrame):
         self.liste_suggestions.grid(row=1, column=0, sticky="ew", padx=0, pady=(2,0))
         self.liste_suggestions.bind('<<ListboxSelect>>', self.selectionner_article)
 
-        # Initialiser la liste complète des articles
-        self.tous_articles = self.get_articles()
         self.liste_suggestions.grid_remove()  # Cacher initialement
 
         # Unité
@@ -145,22 +146,34 @@ class HomePage(ctk.CTkFrame):
         self.btn_ajouter.grid(row=8, column=0, columnspan=2, padx=20, pady=20, sticky="ew")
 
     def filtrer_articles(self, event):
-        """Filtre et affiche les articles correspondant à la recherche"""
+        """Relance la recherche d'articles après une courte pause de frappe"""
+        if self._recherche_after is not None:
+            self.after_cancel(self._recherche_after)
+        self._recherche_after = self.after(DELAI_RECHERCHE_MS, self.lancer_recherche_articles)
+
+    def lancer_recherche_articles(self):
+        """Recherche plein texte des articles correspondant à la saisie"""
+        self._recherche_after = None
+        recherche = self.entry_article.get().strip()
+        if not recherche:
+            self.afficher_suggestions([])
+            return
+        get_executor().submit(
+            self, self.db.search_articles, recherche, 5,
+            on_success=self.afficher_suggestions,
+            on_error=lambda e: messagebox.showerror("Erreur", f"Erreur lors de la recherche: {e}"),
+            key="suggestions"
+        )
+
+    def afficher_suggestions(self, resultats):
+        """Affiche les articles trouvés dans la liste de suggestions"""
         # Vider la liste précédente
         self.liste_suggestions.delete(0, tk.END)
         
-        recherche = self.entry_article.get().lower()
-        
-        # Filtrer les articles
-        resultats = [
-            article for article in self.tous_articles 
-            if recherche.lower() in article.lower()
-        ]
-        
         # Afficher ou masquer la liste de suggestions
-        if recherche and resultats:
-            for article in resultats[:5]:  # Limiter à 5 suggestions
-                self.liste_suggestions.insert(tk.END, article)
+        if resultats:
+            for article in resultats:  # Déjà limité à 5 suggestions
+                self.liste_suggestions.insert(tk.END, f"{article[0]} - {article[1]}")
             
             # Ajuster la hauteur dynamiquement
             hauteur = min(len(resultats), 5)
@@ -205,13 +218,30 @@ class HomePage(ctk.CTkFrame):
         panier_frame.grid_columnconfigure(0, weight=1)
         panier_frame.grid_rowconfigure(1, weight=1)
 
-        # Titre du panier
+        # En-tête : titre et saisie par scan
+        header_frame = ctk.CTkFrame(panier_frame, fg_color="transparent")
+        header_frame.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="ew")
+        header_frame.grid_columnconfigure(1, weight=1)
+
         panier_title = ctk.CTkLabel(
-            panier_frame, 
+            header_frame, 
             text="🛒 Panier", 
             font=ctk.CTkFont(size=18, weight="bold")
         )
-        panier_title.grid(row=0, column=0, padx=20, pady=(20, 10), sticky="w")
+        panier_title.grid(row=0, column=0, sticky="w")
+
+        # Douchette (émulation clavier) : "[qté*]REFERENCE[/UNITE]" puis Entrée
+        self.entry_scan = ctk.CTkEntry(
+            header_frame,
+            placeholder_text="📷 Scanner : [qté*]référence[/unité]",
+            width=260
+        )
+        self.entry_scan.grid(row=0, column=1, padx=(20, 0), sticky="e")
+        self.entry_scan.bind('<Return>', self.scanner_article)
+        self.entry_scan.bind('<KP_Enter>', self.scanner_article)
+
+        self.label_scan = ctk.CTkLabel(header_frame, text="", font=ctk.CTkFont(size=12))
+        self.label_scan.grid(row=1, column=1, padx=(20, 0), sticky="e")
 
         # Tableau du panier
         self.setup_panier_table(panier_frame)
@@ -255,7 +285,26 @@ class HomePage(ctk.CTkFrame):
             text="Imprimer la facture (PDF)",
             variable=self.imprimer_var
         )
-        self.checkbox_imprimer.grid(row=1, column=0, columnspan=2, padx=20, pady=10, sticky="w")
+        self.checkbox_imprimer.grid(row=1, column=0, padx=20, pady=10, sticky="w")
+
+        # Ticket de caisse sur l'imprimante thermique (conservé d'une vente à l'autre)
+        self.ticket_var = ctk.BooleanVar()
+        self.checkbox_ticket = ctk.CTkCheckBox(
+            actions_frame,
+            text="Ticket de caisse",
+            variable=self.ticket_var
+        )
+        self.checkbox_ticket.grid(row=1, column=1, padx=20, pady=10, sticky="w")
+
+        # État de la dernière facture envoyée à la file d'impression
+        self.label_impression = ctk.CTkLabel(actions_frame, text="", font=ctk.CTkFont(size=12))
+        self.label_impression.grid(row=2, column=0, columnspan=2, padx=20, sticky="w")
+
+        # Confirmation de la dernière vente enregistrée
+        self.label_vente = ctk.CTkLabel(
+            actions_frame, text="", text_color="#2e7d32", font=ctk.CTkFont(size=13, weight="bold")
+        )
+        self.label_vente.grid(row=3, column=0, columnspan=2, padx=20, sticky="w")
 
     def setup_panier_table(self, parent):
         # Frame pour le tableau
@@ -289,15 +338,6 @@ class HomePage(ctk.CTkFrame):
         # Bind double-click pour supprimer
         self.tree_panier.bind("<Double-1>", self.supprimer_du_panier)
 
-    def get_articles(self):
-        """Récupère la liste des articles"""
-        try:
-            articles = self.db.get_all_articles()
-            return [f"{article[0]} - {article[1]}" for article in articles]
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
-            return []
-
     def on_article_change(self, choice):
         """Callback quand l'article change"""
         if choice and choice != "":
@@ -307,10 +347,23 @@ class HomePage(ctk.CTkFrame):
             self.combo_unite.set("")
             self.label_prix.configure(text="0 Ar")
 
+    def refresh(self, tables):
+        """Catalogue modifié : remettre à jour les unités et le prix affichés (le panier est conservé)"""
+        article = self.entry_article.get()
+        if " - " not in article:
+            return
+        unites = self.get_unites_by_article(article.split(" - ")[0])
+        self.combo_unite.configure(values=unites)
+        if self.combo_unite.get() in unites:
+            self.on_unite_change(self.combo_unite.get())
+        else:
+            self.combo_unite.set("")
+            self.label_prix.configure(text="0 Ar")
+
     def get_unites_by_article(self, article_id):
         """Récupère les unités disponibles pour un article"""
         try:
-            unites = self.db.get_unites_by_article(article_id)
+            unites = self.db.catalog.unites_article(article_id)
             return [f"{unite[0]} - {unite[1]}" for unite in unites]
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors du chargement des unités: {e}")
@@ -327,7 +380,7 @@ class HomePage(ctk.CTkFrame):
     def get_prix_article_unite(self, article_id, unite_id):
         """Récupère le prix pour un article et une unité"""
         try:
-            prix = self.db.get_prix_article_unite(article_id, unite_id)
+            prix = self.db.catalog.prix(article_id, unite_id)
             return prix if prix else 0
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors du chargement du prix: {e}")
@@ -355,22 +408,12 @@ class HomePage(ctk.CTkFrame):
             quantite = float(self.entry_quantite.get())
             prix_unitaire = float(self.label_prix.cget("text").replace(" Ar", "").replace(",", ""))
             
-            # Calcul du total
-            prix_total = quantite * prix_unitaire
-            
-            # Ajout au panier
-            item = {
-                "article_id": article_info[0],
-                "article_nom": article_info[1],
-                "unite_id": unite_info[0],
-                "unite_nom": unite_info[1],
-                "quantite": quantite,
-                "prix_unitaire": prix_unitaire,
-                "prix_total": prix_total
-            }
-            
-            self.panier.append(item)
-            self.refresh_panier()
+            # Ajout au panier (cumulé si l'article est déjà présent dans cette unité)
+            self.panier.ajouter(
+                article_info[0], article_info[1],
+                unite_info[0], unite_info[1],
+                quantite, prix_unitaire
+            )
             
             # Reset des champs
             self.entry_quantite.delete(0, "end")
@@ -382,44 +425,67 @@ class HomePage(ctk.CTkFrame):
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de l'ajout: {e}")
 
-    def refresh_panier(self):
-        """Rafraîchit l'affichage du panier"""
-        # Vider le tableau
-        for item in self.tree_panier.get_children():
-            self.tree_panier.delete(item)
-        
-        # Ajouter les items
-        total_general = 0
-        for i, item in enumerate(self.panier):
-            self.tree_panier.insert("", "end", values=(
-                item["article_nom"],
-                item["unite_nom"],
-                f"{item['quantite']:.2f}",
-                f"{item['prix_unitaire']:,.0f} Ar",
-                f"{item['prix_total']:,.0f} Ar",
-                "❌"
-            ))
-            total_general += item["prix_total"]
-        
-        # Mettre à jour le total
-        self.label_total.configure(text=f"Total: {total_general:,.0f} Ar")
+    def scanner_article(self, event=None):
+        """Ajoute au panier, sans dialogue, l'article correspondant au code scanné"""
+        texte = self.entry_scan.get()
+        self.entry_scan.delete(0, "end")
+        if not texte.strip():
+            return "break"
+
+        try:
+            article, unite, quantite = resoudre_scan(self.db.catalog, texte)
+        except ScanError as e:
+            self.label_scan.configure(text=f"⚠️ {e}", text_color="#d32f2f")
+            self.bell()
+            return "break"
+
+        unite_id, code, libelle, prix_unitaire = unite
+        self.panier.ajouter(article['id'], article['nom'], unite_id, code, quantite, prix_unitaire)
+        self.label_scan.configure(
+            text=f"✔ {quantite:g} × {article['nom']} ({libelle})", text_color="#2e7d32"
+        )
+        return "break"
+
+    def on_panier_change(self, evenement, cle, ligne):
+        """Répercute un changement du panier sur la seule ligne concernée du tableau"""
+        if evenement == "vidage":
+            self.tree_panier.delete(*self.tree_panier.get_children())
+        else:
+            iid = "%d:%d" % cle
+            if evenement == "ajout":
+                self.tree_panier.insert("", "end", iid=iid, values=self.valeurs_ligne(ligne))
+                self.tree_panier.see(iid)
+            elif evenement == "modification":
+                self.tree_panier.item(iid, values=self.valeurs_ligne(ligne))
+                self.tree_panier.see(iid)
+            elif evenement == "suppression":
+                self.tree_panier.delete(iid)
+        self.label_total.configure(text=f"Total: {self.panier.total:,.0f} Ar")
+
+    def valeurs_ligne(self, item):
+        return (
+            item["article_nom"],
+            item["unite_nom"],
+            f"{item['quantite']:.2f}",
+            f"{item['prix_unitaire']:,.0f} Ar",
+            f"{item['prix_total']:,.0f} Ar",
+            "❌"
+        )
 
     def supprimer_du_panier(self, event):
         """Supprime un item du panier"""
         selection = self.tree_panier.selection()
         if selection:
-            item = self.tree_panier.item(selection[0])
-            index = self.tree_panier.index(selection[0])
+            cle = tuple(int(part) for part in selection[0].split(":"))
+            ligne = self.panier.ligne(cle)
             
-            if messagebox.askyesno("Confirmation", f"Supprimer {item['values'][0]} du panier ?"):
-                self.panier.pop(index)
-                self.refresh_panier()
+            if ligne and messagebox.askyesno("Confirmation", f"Supprimer {ligne['article_nom']} du panier ?"):
+                self.panier.retirer(cle)
 
     def vider_panier(self):
         """Vide complètement le panier"""
         if self.panier and messagebox.askyesno("Confirmation", "Vider complètement le panier ?"):
-            self.panier.clear()
-            self.refresh_panier()
+            self.panier.vider()
 
     def enregistrer_vente(self):
         """Enregistre la vente dans la base de données"""
@@ -433,169 +499,77 @@ class HomePage(ctk.CTkFrame):
                 messagebox.showwarning("Attention", "Le panier est vide")
                 return
             
-            # Calcul du total
-            total = sum(item["prix_total"] for item in self.panier)
-            
-            # Enregistrement de la facture
-            facture_id = self.db.create_facture(
+            # Enregistrement de la facture et de ses lignes en une seule transaction
+            facture_id = self.db.record_sale(
                 self.entry_client.get(),
                 self.entry_date.get(),
-                total
+                [
+                    (item["article_id"], item["unite_id"], item["quantite"], item["prix_unitaire"])
+                    for item in self.panier
+                ]
             )
             
-            # Enregistrement des détails
-            for item in self.panier:
-                self.db.add_facture_detail(
-                    facture_id,
-                    item["article_id"],
-                    item["unite_id"],
-                    item["quantite"],
-                    item["prix_unitaire"],
-                    item["prix_total"]
-                )
-            
-            messagebox.showinfo("Succès", f"Vente enregistrée avec succès !\nFacture N°{facture_id}")
-            
-            # Imprimer la facture si l'utilisateur le souhaite
+            # Imprimer la facture si l'utilisateur le souhaite (rendu en arrière-plan)
             if self.imprimer_var.get():
                 self.generer_pdf_facture(facture_id)
-
-            # Reset du formulaire
+            if self.ticket_var.get():
+                self.imprimer_ticket_caisse(facture_id)
+            
+            # Confirmation non bloquante : la caisse est aussitôt prête pour le client suivant
+            self.label_vente.configure(text=f"✔ Vente enregistrée — Facture N°{facture_id}")
             self.reset_formulaire()
+            self.entry_scan.focus_set()
 
         except Exception as e:
             messagebox.showerror("Erreur", f"Erreur lors de l'enregistrement: {e}")
 
     def generer_pdf_facture(self, facture_id):
-        """Génère et ouvre une facture PDF professionnelle"""
+        """Lit la facture hors du thread Tk puis la met dans la file d'impression"""
+        self.label_impression.configure(text=f"🖨️ Facture N°{facture_id} en préparation...")
+        # Owner : la fenêtre principale, la facture part même si l'on quitte la page
+        get_executor().submit(
+            self.winfo_toplevel(), self.db.get_facture_complete, facture_id,
+            on_success=self.mettre_facture_en_file,
+            on_error=self.erreur_impression
+        )
+
+    def mettre_facture_en_file(self, facture):
+        """Rendu du PDF dans le processus d'impression"""
+        facture_info, details = facture
         try:
-            # Récupérer les détails de la facture
-            details = self.db.get_facture_details(facture_id)
-            facture_info = self.db.get_facture_by_id(facture_id)
-            
-            if not details or not facture_info:
-                messagebox.showerror("Erreur", "Données de facture introuvables.")
-                return
-            
-            # Créer le fichier PDF temporaire
-            temp_dir = tempfile.gettempdir()
-            pdf_path = os.path.join(temp_dir, f"Facture_{facture_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-            
-            # Créer le document PDF
-            doc = SimpleDocTemplate(pdf_path, pagesize=A4, 
-                                  rightMargin=72, leftMargin=72, 
-                                  topMargin=72, bottomMargin=72)
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'TitleStyle',
-                parent=styles['Heading1'],
-                fontSize=20,
-                spaceAfter=30,
-                alignment=1,  # Centré
-                textColor=colors.darkblue
+            get_print_queue().submit_facture(
+                self, facture_info, details,
+                on_done=self.facture_imprimee,
+                on_error=self.erreur_impression
             )
-            
-            normal_style = styles['Normal']
-            
-            # Contenu du PDF
-            story = []
-            
-            # Titre
-            story.append(Paragraph(f"<b>FACTURE N° {facture_id}</b>", title_style))
-            story.append(Spacer(1, 20))
-            
-            # Informations client et date
-            client_info = f"""
-            <b>Client:</b> {facture_info[1]}<br/>
-            <b>Date:</b> {facture_info[2]}<br/>
-            <b>Date d'impression:</b> {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-            """
-            story.append(Paragraph(client_info, normal_style))
-            story.append(Spacer(1, 20))
-            
-            # Tableau des articles
-            table_data = [['Article', 'Unité', 'Quantité', 'Prix Unitaire', 'Total', 'Entrepôt']]
-            
-            total_facture = 0
-            for detail in details:
-                article_nom = detail[7]
-                unite_libelle = detail[8]
-                quantite = detail[4]
-                prix_unitaire = detail[5]
-                prix_total = detail[6]
-                entrepot_nom = detail[9] or "Non spécifié"
-                total_facture += prix_total
-                
-                table_data.append([
-                    article_nom,
-                    unite_libelle,
-                    f"{quantite:.2f}",
-                    f"{prix_unitaire:,.0f} Ar",
-                    f"{prix_total:,.0f} Ar",
-                    entrepot_nom
-                ])
-            
-            # Ajouter ligne de total
-            table_data.append(['', '', '', '', 'TOTAL A PAYER : ', f'{total_facture:,.0f} Ar'])
-            
-            # Créer le tableau
-            table = Table(table_data, colWidths=[2*inch, 1*inch, 1*inch, 1.25*inch, 1.25*inch, 1.5*inch])
-            table.setStyle(TableStyle([
-                # En-tête
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                
-                # Corps du tableau
-                ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -2), 10),
-                ('GRID', (0, 0), (-1, -2), 1, colors.black),
-                
-                # Ligne de total
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 12),
-                ('ALIGN', (4, -1), (-1, -1), 'RIGHT'),
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 30))
-            
-            # Pied de page
-            footer_text = """
-            <b><center>"Ho tahiana ianao raha miditra, Ho tahiana ianao raha mivoaka"</center></b><br/><br/>
-            
-            """
-            story.append(Paragraph(footer_text, normal_style))
-            
-            # Construire le PDF
-            doc.build(story)
-            
-            # Ouvrir le fichier PDF
-            self.ouvrir_pdf(pdf_path)
-            
-            messagebox.showinfo("Succès", f"Facture PDF générée avec succès !\nFichier: {os.path.basename(pdf_path)}")
-            
-        except ImportError:
-            messagebox.showerror("Erreur", "La bibliothèque ReportLab n'est pas installée.\nInstallez-la avec: pip install reportlab")
         except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors de la génération du PDF: {e}")
+            self.erreur_impression(e)
+
+    def imprimer_ticket_caisse(self, facture_id):
+        """Envoie le ticket ESC/POS de la vente à l'imprimante thermique (hors du thread Tk)"""
+        # Owner : la fenêtre principale, le ticket part même si l'on quitte la page
+        get_executor().submit(
+            self.winfo_toplevel(), imprimer_ticket,
+            facture_id, self.entry_client.get(), self.entry_date.get(), lignes_panier(self.panier),
+            on_success=lambda sortie: self.label_impression.configure(
+                text=f"🧾 Ticket N°{facture_id} envoyé ({sortie})"
+            ),
+            on_error=self.erreur_ticket
+        )
 
-    def ouvrir_pdf(self, pdf_path):
-        """Ouvre le fichier PDF selon le système d'exploitation"""
-        try:
-            if platform.system() == "Windows":
-                os.startfile(pdf_path)
-            elif platform.system() == "Darwin":  # macOS
-                subprocess.run(["open", pdf_path])
-            else:  # Linux
-                subprocess.run(["xdg-open", pdf_path])
-        except Exception as e:
-            messagebox.showwarning("Attention", f"Impossible d'ouvrir automatiquement le PDF.\nFichier sauvegardé: {pdf_path}")
+    def erreur_ticket(self, erreur):
+        messagebox.showerror("Erreur", f"Impossible d'imprimer le ticket de caisse: {erreur}")
+
+    def facture_imprimee(self, pdf_path):
+        """PDF prêt et ouvert par le processus d'impression"""
+        self.label_impression.configure(text=f"✔ {os.path.basename(pdf_path)}")
+
+    def erreur_impression(self, erreur):
+        self.label_impression.configure(text="")
+        if isinstance(erreur, ImportError):
+            messagebox.showerror("Erreur", "La bibliothèque ReportLab n'est pas installée.\nInstallez-la avec: pip install reportlab")
+        else:
+            messagebox.showerror("Erreur", f"Erreur lors de la génération du PDF: {erreur}")
 
     def reset_formulaire(self):
         """Réinitialise le formulaire"""
@@ -606,6 +580,7 @@ class HomePage(ctk.CTkFrame):
         self.combo_unite.set("Sélectionnez d'abord un article")
         self.label_prix.configure(text="0 Ar")
         self.entry_quantite.delete(0, "end")
-        self.panier.clear()
-        self.refresh_panier()
+        self.entry_scan.delete(0, "end")
+        self.label_scan.configure(text="")
+        self.panier.vider()
         self.imprimer_var.set(False)  # Réinitialiser la case à cocher
\ No newline at end of file
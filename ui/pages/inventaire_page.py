@@ -1,17 +1,15 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from datetime import datetime
 import os
-import tempfile
-import platform
-import subprocess
+from ui.components.loading import LoadingIndicator
+from ui.components.tree_loader import TreeLoader
+from ui.components.page import PageLifecycle
+from utils.db_executor import get_executor
+from utils.print_queue import get_print_queue
+
+class InventairePage(ctk.CTkFrame, PageLifecycle):
+    tables = frozenset({"article", "prix_article", "unite", "entrepot"})
 
-class InventairePage(ctk.CTkFrame):
     def __init__(self, parent, db):
         super().__init__(parent, corner_radius=0, fg_color="transparent")
         self.db = db
@@ -31,15 +29,29 @@ class InventairePage(ctk.CTkFrame):
         )
         title.grid(row=0, column=0, padx=20, pady=20, sticky="w")
 
-        # Bouton d'impression
-        btn_imprimer = ctk.CTkButton(
-            self,
+        # Impression : options et bouton
+        impression_frame = ctk.CTkFrame(self, fg_color="transparent")
+        impression_frame.grid(row=0, column=0, padx=20, pady=20, sticky="e")
+
+        self.label_impression = ctk.CTkLabel(impression_frame, text="", font=ctk.CTkFont(size=12))
+        self.label_impression.grid(row=0, column=0, padx=(0, 10))
+
+        self.par_entrepot_var = ctk.BooleanVar()
+        checkbox_par_entrepot = ctk.CTkCheckBox(
+            impression_frame,
+            text="Grouper par entrepôt",
+            variable=self.par_entrepot_var
+        )
+        checkbox_par_entrepot.grid(row=0, column=1, padx=(0, 10))
+
+        self.btn_imprimer = ctk.CTkButton(
+            impression_frame,
             text="🖨️ Imprimer l'Inventaire",
             command=self.imprimer_inventaire,
             fg_color="#2e7d32",
             hover_color="#1b5e20"
         )
-        btn_imprimer.grid(row=0, column=0, padx=20, pady=20, sticky="e")
+        self.btn_imprimer.grid(row=0, column=2)
 
         # Frame pour le tableau
         table_frame = ctk.CTkFrame(self)
@@ -76,171 +88,82 @@ class InventairePage(ctk.CTkFrame):
         scrollbar_vertical.grid(row=0, column=1, sticky="ns")
         scrollbar_horizontal.grid(row=1, column=0, sticky="ew")
 
+        # Indicateur de chargement
+        self.loading = LoadingIndicator(table_frame)
+
+        # Remplissage progressif du tableau
+        self.loader = TreeLoader(
+            self.tree_inventaire,
+            values_of=self.valeurs_article,
+            iid_of=lambda article: str(article['id']),
+            striped=False
+        )
+
+    def refresh(self, tables):
+        self.load_articles()
+
     def load_articles(self):
-        """Charge tous les articles avec leurs unités et prix"""
-        try:
-            # Vider le tableau
-            for item in self.tree_inventaire.get_children():
-                self.tree_inventaire.delete(item)
-
-            # Récupérer tous les articles
-            articles = self.db.get_all_articles()
-            
-            # Parcourir les articles
-            for article in articles:
-                # Récupérer les unités et prix pour cet article
-                unites_prix = self.db.get_unites_by_article(article[0])
-                
-                # Formater les unités et prix de manière lisible
-                unites_prix_details = []
-                for unite in unites_prix:
-                    unites_prix_details.append(f"{unite[2]} : {unite[3]} Ar")
-                
-                # Formater la chaîne des unités et prix
-                unites_prix_str = " | ".join(unites_prix_details) if unites_prix_details else "Aucune unité"
-                
-                # Récupérer le nom de l'entrepôt
-                entrepot_nom = "Non assigné"
-                if article[5]:  # Si un entrepôt est assigné
-                    entrepot = self.db.get_entrepot_by_id(article[5])
-                    if entrepot:
-                        entrepot_nom = entrepot[1]
-                
-                # Insérer l'article
-                self.tree_inventaire.insert("", "end", values=(
-                    article[0],      # ID
-                    article[1],      # Nom
-                    article[2],      # Référence
-                    unites_prix_str, # Unités et Prix
-                    entrepot_nom     # Entrepôt
-                ))
+        """Charge tous les articles avec leurs unités et prix (en arrière-plan)"""
+        self.loading.show()
+        get_executor().submit(
+            self, self.db.load_catalog,
+            on_success=self.afficher_articles,
+            on_error=self.on_load_error,
+            key="articles"
+        )
 
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
+    def on_load_error(self, e):
+        self.loading.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement des articles: {e}")
+
+    def afficher_articles(self, articles):
+        """Remplit le tableau avec les articles chargés"""
+        self.loading.hide()
+        self.loader.load(articles)
+
+    def valeurs_article(self, article):
+        """Valeurs affichées pour un article de l'inventaire"""
+        # Formater les unités et prix de manière lisible
+        unites_prix_details = []
+        for unite in article['unites']:
+            unites_prix_details.append(f"{unite[2]} : {unite[3]} Ar")
+        
+        # Formater la chaîne des unités et prix
+        unites_prix_str = " | ".join(unites_prix_details) if unites_prix_details else "Aucune unité"
+        
+        # Nom de l'entrepôt
+        entrepot_nom = article['entrepot_nom'] or "Non assigné"
+        
+        return (
+            article['id'],         # ID
+            article['nom'],        # Nom
+            article['reference'],  # Référence
+            unites_prix_str,       # Unités et Prix
+            entrepot_nom           # Entrepôt
+        )
 
     def imprimer_inventaire(self):
-        """Génère un PDF de l'inventaire avec un style élégant"""
+        """Génère le PDF de l'inventaire dans le processus d'impression et l'ouvre"""
+        self.btn_imprimer.configure(state="disabled")
+        self.label_impression.configure(text="⏳ Génération de l'inventaire...")
         try:
-            # Créer le fichier PDF temporaire
-            temp_dir = tempfile.gettempdir()
-            pdf_path = os.path.join(temp_dir, f"Inventaire_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-            
-            # Créer le document PDF
-            doc = SimpleDocTemplate(pdf_path, pagesize=A4, 
-                                  rightMargin=72, leftMargin=72, 
-                                  topMargin=72, bottomMargin=72)
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            
-            # Styles personnalisés
-            title_style = ParagraphStyle(
-                'TitleStyle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#2c3e50'),
-                spaceAfter=20,
-                alignment=1  # Centré
+            get_print_queue().submit_inventaire(
+                self, self.db, self.par_entrepot_var.get(),
+                on_done=self.inventaire_imprime,
+                on_error=self.erreur_impression
             )
-            
-            subtitle_style = ParagraphStyle(
-                'SubtitleStyle',
-                parent=styles['Normal'],
-                fontSize=12,
-                textColor=colors.HexColor('#7f8c8d'),
-                spaceAfter=20,
-                alignment=1  # Centré
-            )
-            
-            header_style = ParagraphStyle(
-                'HeaderStyle',
-                parent=styles['Normal'],
-                fontSize=14,
-                textColor=colors.HexColor('#2980b9'),
-                spaceAfter=10
-            )
-            
-            # Contenu du PDF
-            story = []
-            
-            # Logo ou en-tête (si possible)
-            story.append(Paragraph("<b>INVENTAIRE DES ARTICLES</b>", title_style))
-            story.append(Paragraph(f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}", subtitle_style))
-            story.append(Spacer(1, 20))
-            
-            # Préparer les données du tableau
-            table_data = [['ID', 'Nom', 'Entrepôt']]
-            
-            # Récupérer tous les articles
-            articles = self.db.get_all_articles()
-            
-            for article in articles:
-                # Récupérer le nom de l'entrepôt
-                entrepot_nom = "Non assigné"
-                if article[5]:  # Si un entrepôt est assigné
-                    entrepot = self.db.get_entrepot_by_id(article[5])
-                    if entrepot:
-                        entrepot_nom = entrepot[1]
-                
-                # Ajouter à la liste des données
-                table_data.append([
-                    str(article[0]),
-                    article[1],
-                    entrepot_nom
-                ])
-            
-            # Créer le tableau
-            table = Table(table_data, colWidths=[1*inch, 3*inch, 2*inch])
-            table.setStyle(TableStyle([
-                # En-tête
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                
-                # Corps du tableau
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 10),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
-                
-                # Alternance de couleurs
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
-                ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 30))
-            
-            # Pied de page
-            footer_style = ParagraphStyle(
-                'FooterStyle',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor=colors.HexColor('#95a5a6'),
-                alignment=1  # Centré
-            )
-            story.append(Paragraph("Inventaire généré automatiquement", footer_style))
-            
-            # Construire le PDF
-            doc.build(story)
-            
-            # Ouvrir le fichier PDF
-            self.ouvrir_pdf(pdf_path)
-            
-            messagebox.showinfo("Succès", f"Inventaire PDF généré avec succès !\nFichier: {os.path.basename(pdf_path)}")
-            
         except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors de la génération du PDF: {e}")
+            self.erreur_impression(e)
 
-    def ouvrir_pdf(self, pdf_path):
-        """Ouvre le fichier PDF selon le système d'exploitation"""
-        try:
-            if platform.system() == "Windows":
-                os.startfile(pdf_path)
-            elif platform.system() == "Darwin":  # macOS
-                subprocess.run(["open", pdf_path])
-            else:  # Linux
-                subprocess.run(["xdg-open", pdf_path])
-        except Exception as e:
-            messagebox.showwarning("Attention", f"Impossible d'ouvrir automatiquement le PDF.\nFichier sauvegardé: {pdf_path}")
+    def inventaire_imprime(self, pdf_path):
+        """PDF prêt et ouvert par le processus d'impression"""
+        self.btn_imprimer.configure(state="normal")
+        self.label_impression.configure(text=f"✔ {os.path.basename(pdf_path)}")
+
+    def erreur_impression(self, erreur):
+        self.btn_imprimer.configure(state="normal")
+        self.label_impression.configure(text="")
+        if isinstance(erreur, ImportError):
+            messagebox.showerror("Erreur", "La bibliothèque ReportLab n'est pas installée.\nInstallez-la avec: pip install reportlab")
+        else:
+            messagebox.showerror("Erreur", f"Erreur lors de la génération du PDF: {erreur}")
@@ -1,13 +1,28 @@
 # ui/pages/rapport_page.py
 import customtkinter as ctk
-from tkinter import ttk, messagebox, Menu
-from datetime import datetime, date
+from tkinter import ttk, messagebox, filedialog, Menu
+from datetime import datetime, date, timedelta
+from functools import partial
 import os
+from ui.components.loading import LoadingIndicator
+from ui.components.virtual_tree import KeysetTreeview
+from utils.db_executor import get_executor
+from ui.components.page import PageLifecycle
+
+# Tris proposés par clic sur un titre de colonne : (tri au premier clic, tri au clic suivant)
+TRIS_COLONNES = {
+    "Client": ("client", "client"),
+    "Date": ("date_desc", "date_asc"),
+    "Montant Total": ("montant_desc", "montant_asc"),
+}
+
+class RapportPage(ctk.CTkFrame, PageLifecycle):
+    tables = frozenset({"facture", "facture_detail"})
 
-class RapportPage(ctk.CTkFrame):
     def __init__(self, parent, db):
         super().__init__(parent, corner_radius=0, fg_color="transparent")
         self.db = db
+        self.tri = 'date_desc'
         
         # Configuration de la grille
         self.grid_columnconfigure(0, weight=1)
@@ -53,10 +68,22 @@ class RapportPage(ctk.CTkFrame):
         self.date_picker = ctk.CTkSegmentedButton(
             filter_frame, 
             values=["Aujourd'hui", "Cette semaine", "Ce mois", "Personnalisé"],
-            width=300
+            width=300,
+            command=self.on_periode_change
         )
         self.date_picker.grid(row=0, column=3, padx=5, pady=5)
         
+        # Dates de la période personnalisée (affichées à la demande)
+        self.custom_frame = ctk.CTkFrame(filter_frame, fg_color="transparent")
+        self.custom_frame.grid(row=1, column=0, columnspan=6, sticky="w", padx=0, pady=(0, 5))
+        ctk.CTkLabel(self.custom_frame, text="Du:").grid(row=0, column=0, padx=5)
+        self.entry_date_debut = ctk.CTkEntry(self.custom_frame, placeholder_text="AAAA-MM-JJ", width=120)
+        self.entry_date_debut.grid(row=0, column=1, padx=5)
+        ctk.CTkLabel(self.custom_frame, text="Au:").grid(row=0, column=2, padx=5)
+        self.entry_date_fin = ctk.CTkEntry(self.custom_frame, placeholder_text="AAAA-MM-JJ", width=120)
+        self.entry_date_fin.grid(row=0, column=3, padx=5)
+        self.custom_frame.grid_remove()
+        
         # Bouton de filtrage
         btn_filtrer = ctk.CTkButton(
             filter_frame, 
@@ -67,9 +94,29 @@ class RapportPage(ctk.CTkFrame):
         )
         btn_filtrer.grid(row=0, column=5, padx=5, pady=5)
         
+        # Export PDF des factures affichées (ou des lignes sélectionnées)
+        self.btn_exporter = ctk.CTkButton(
+            filter_frame, 
+            text="📦 Exporter PDF", 
+            command=self.exporter_factures,
+            fg_color="#2e7d32",
+            hover_color="#1b5e20"
+        )
+        self.btn_exporter.grid(row=0, column=6, padx=5, pady=5)
+        
         # Tableau des ventes
         self.setup_ventes_table(main_frame)
         
+        # Résumé de la période (lu dans ventes_journalieres)
+        self.label_resume = ctk.CTkLabel(
+            main_frame,
+            text="",
+            font=ctk.CTkFont(size=13, weight="bold"),
+            anchor="w",
+            justify="left"
+        )
+        self.label_resume.grid(row=2, column=0, sticky="ew", padx=5, pady=(10, 0))
+        
         # Créer le menu contextuel
         self.create_context_menu()
         
@@ -103,9 +150,11 @@ class RapportPage(ctk.CTkFrame):
         self.tree_ventes.column("Date", width=100, anchor="center", stretch=False)
         self.tree_ventes.column("Montant Total", width=100, anchor="e", stretch=False)
         
-        # Titres des colonnes
+        # Titres des colonnes (clic pour trier)
         for col in columns:
             self.tree_ventes.heading(col, text=col, anchor="center")
+            if col in TRIS_COLONNES:
+                self.tree_ventes.heading(col, command=partial(self.trier_ventes, col))
         
         # Scrollbars
         scrollbar_vertical = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree_ventes.yview)
@@ -123,6 +172,27 @@ class RapportPage(ctk.CTkFrame):
         
         # Bind pour le clic droit
         self.tree_ventes.bind("<Button-3>", self.show_context_menu)
+        
+        # Configuration des tags pour l'alternance des couleurs
+        self.tree_ventes.tag_configure('odd', background='#f0f0f0')
+        self.tree_ventes.tag_configure('even', background='#ffffff')
+        
+        # Seule une fenêtre de lignes est matérialisée, paginée sur (colonne triée, id)
+        self.vue_ventes = KeysetTreeview(
+            self, self.tree_ventes, scrollbar_vertical,
+            key_of=lambda facture: self.db.cle_facture(facture, self.tri),
+            values_of=lambda facture: (
+                facture[0],      # ID
+                facture[1],      # Nom Client
+                facture[2],      # Date
+                f"{facture[3]} Ar",  # Montant Total
+            ),
+            on_page=lambda sens, factures: self.loading.hide(),
+            on_error=self.on_load_error
+        )
+        
+        # Indicateur de chargement
+        self.loading = LoadingIndicator(table_frame)
     
     def create_context_menu(self):
         """Créer le menu contextuel"""
@@ -136,6 +206,10 @@ class RapportPage(ctk.CTkFrame):
             label="🖨️ Générer Facture", 
             command=self.generer_facture_selectionnee
         )
+        self.context_menu.add_command(
+            label="🧾 Réimprimer le Ticket", 
+            command=self.reimprimer_ticket_selectionne
+        )
     
     def show_context_menu(self, event):
         """Afficher le menu contextuel"""
@@ -173,81 +247,197 @@ class RapportPage(ctk.CTkFrame):
         if vente:
             self.generer_facture(vente['id'])
     
+    def reimprimer_ticket_selectionne(self):
+        """Réimprimer le ticket de caisse de la vente sélectionnée"""
+        vente = self.get_selected_vente()
+        if vente:
+            self.reimprimer_ticket(vente['id'])
+    
+    def exporter_factures(self):
+        """Exporte en PDF les lignes sélectionnées (si plusieurs) ou toute la recherche affichée"""
+        selection = self.tree_ventes.selection()
+        if len(selection) > 1:
+            ids = [self.tree_ventes.item(item, 'values')[0] for item in selection]
+            selection_texte = f"les {len(ids)} factures sélectionnées"
+        else:
+            ids = None
+            selection_texte = "toutes les factures de la recherche affichée"
+        
+        fusion = messagebox.askyesnocancel(
+            "Exporter en PDF",
+            f"Exporter {selection_texte}.\n\n"
+            "Oui : un seul PDF contenant toutes les factures\n"
+            "Non : un fichier PDF par facture"
+        )
+        if fusion is None:
+            return
+        if fusion:
+            cible = filedialog.asksaveasfilename(
+                title="Enregistrer les factures",
+                defaultextension=".pdf",
+                filetypes=[("PDF", "*.pdf")],
+                initialfile=f"Factures_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+            )
+        else:
+            cible = filedialog.askdirectory(title="Dossier des factures")
+        if not cible:
+            return
+        
+        criteres = dict(self.criteres)
+        
+        def exporter():
+            from utils.export_factures import exporter_factures
+            factures = self.db.get_factures_export(ids, **({} if ids else criteres))
+            fichiers = exporter_factures(
+                factures,
+                dossier=None if fusion else cible,
+                fusion=cible if fusion else None
+            )
+            return len(factures), fichiers
+        
+        self.btn_exporter.configure(state="disabled", text="⏳ Export en cours...")
+        # Owner : la fenêtre principale, l'export continue si l'on quitte la page
+        get_executor().submit(
+            self.winfo_toplevel(), exporter,
+            on_success=self.export_termine,
+            on_error=self.erreur_export,
+            key="export"
+        )
+    
+    def export_termine(self, resultat):
+        nb_factures, fichiers = resultat
+        self.btn_exporter.configure(state="normal", text="📦 Exporter PDF")
+        if not nb_factures:
+            messagebox.showinfo("Export", "Aucune facture à exporter.")
+            return
+        cible = fichiers[0] if len(fichiers) == 1 else os.path.dirname(fichiers[0])
+        messagebox.showinfo("Export terminé", f"{nb_factures} facture(s) exportée(s) :\n{cible}")
+    
+    def erreur_export(self, e):
+        self.btn_exporter.configure(state="normal", text="📦 Exporter PDF")
+        messagebox.showerror("Erreur", f"Erreur lors de l'export des factures: {e}")
+    
+    def on_periode_change(self, periode):
+        """Affiche les champs de dates pour la période personnalisée"""
+        if periode == "Personnalisé":
+            self.custom_frame.grid()
+        else:
+            self.custom_frame.grid_remove()
+    
+    def refresh(self, tables):
+        """Nouvelles ventes : relancer la recherche avec les filtres affichés"""
+        self.filtrer_ventes()
+    
     def load_ventes(self, filtres=None):
-        # Vider le tableau
-        for item in self.tree_ventes.get_children():
-            self.tree_ventes.delete(item)
-        
-        # Récupérer les factures
-        factures = self.db.get_all_factures()
-        
-        # Appliquer les filtres
-        if filtres:
-            factures = self.appliquer_filtres(factures, filtres)
-        
-        # Trier par date décroissante
-        factures_triees = sorted(factures, key=lambda x: x[2], reverse=True)
-        
-        # Remplir le tableau
-        for facture in factures_triees:
-            # Insérer la facture
-            self.tree_ventes.insert("", "end", values=(
-                facture[0],      # ID
-                facture[1],      # Nom Client
-                facture[2],      # Date
-                f"{facture[3]} Ar",  # Montant Total
-            ), tags=('odd' if len(self.tree_ventes.get_children()) % 2 == 0 else 'even',))
-        
-        # Configuration des tags pour l'alternance des couleurs
-        self.tree_ventes.tag_configure('odd', background='#f0f0f0')
-        self.tree_ventes.tag_configure('even', background='#ffffff')
+        try:
+            criteres = self.construire_criteres(filtres)
+        except ValueError:
+            messagebox.showerror("Erreur", "Veuillez saisir un montant valide.")
+            return
+        
+        # Les pages de factures filtrées sont lues à la demande pendant le défilement
+        self.criteres = criteres
+        self.afficher_ventes()
+        self.load_resume(criteres)
+    
+    def afficher_ventes(self):
+        """Relit les factures depuis le début avec les filtres et le tri courants"""
+        self.loading.show()
+        self.vue_ventes.reset(
+            partial(self.db.search_factures_page, order_by=self.tri, **self.criteres),
+            count=partial(self.db.count_factures, **self.criteres)
+        )
+    
+    def trier_ventes(self, colonne):
+        """Trie sur la colonne cliquée ; un second clic inverse le sens"""
+        premier, suivant = TRIS_COLONNES[colonne]
+        self.tri = suivant if self.tri == premier else premier
+        for col, tris in TRIS_COLONNES.items():
+            fleche = ""
+            if self.tri in tris:
+                fleche = " ▲" if self.tri in ("client", "date_asc", "montant_asc") else " ▼"
+            self.tree_ventes.heading(col, text=col + fleche)
+        self.afficher_ventes()
+    
+    def load_resume(self, criteres):
+        """Charge les totaux de la période depuis l'agrégat journalier"""
+        if set(criteres) - {'date_from', 'date_to'}:
+            # Les filtres client/montant portent sur les factures, pas sur l'agrégat
+            self.label_resume.configure(text="")
+            return
+        
+        def resume():
+            return (
+                self.db.get_totaux_periode(criteres.get('date_from'), criteres.get('date_to')),
+                self.db.get_meilleures_ventes(criteres.get('date_from'), criteres.get('date_to'), limit=1),
+                self.db.get_ventes_par_entrepot(criteres.get('date_from'), criteres.get('date_to'))
+            )
+        
+        get_executor().submit(
+            self, resume,
+            on_success=self.afficher_resume,
+            on_error=self.on_load_error,
+            key="resume"
+        )
+    
+    def afficher_resume(self, resultat):
+        totaux, meilleures, par_entrepot = resultat
+        texte = (
+            f"Chiffre d'affaires : {totaux['chiffre_affaires']} Ar   •   "
+            f"Quantité vendue : {totaux['quantite']}   •   "
+            f"Lignes vendues : {totaux['nb_lignes']}"
+        )
+        if meilleures:
+            texte += f"   •   Meilleure vente : {meilleures[0][1]} ({meilleures[0][4]} Ar)"
+        if par_entrepot:
+            texte += "\nPar entrepôt : " + "   •   ".join(
+                f"{nom} {chiffre_affaires} Ar" for _, nom, _, chiffre_affaires in par_entrepot
+            )
+        self.label_resume.configure(text=texte)
+    
+    def on_load_error(self, e):
+        self.loading.hide()
+        messagebox.showerror("Erreur", f"Erreur lors du chargement des ventes: {e}")
     
-    def appliquer_filtres(self, factures, filtres):
-        """Filtrer les factures selon différents critères"""
+    def construire_criteres(self, filtres):
+        """Traduit les filtres de l'interface en critères pour search_factures_page"""
+        criteres = {}
+        if not filtres:
+            return criteres
+        
         type_recherche = filtres.get('type_recherche', 'Tous')
-        terme_recherche = filtres.get('terme_recherche', '').lower().strip()
+        terme_recherche = filtres.get('terme_recherche', '').strip()
         
         # Filtrage par période
         periode = filtres.get('periode', 'Tous')
         today = date.today()
         
-        # Filtres de date
-        date_debut = None
-        date_fin = None
         if periode == "Aujourd'hui":
-            date_debut = date_fin = today.strftime("%Y-%m-%d")
+            criteres['date_from'] = criteres['date_to'] = today.strftime("%Y-%m-%d")
         elif periode == "Cette semaine":
-            date_debut = (today - datetime.timedelta(days=today.weekday())).strftime("%Y-%m-%d")
-            date_fin = today.strftime("%Y-%m-%d")
+            criteres['date_from'] = (today - timedelta(days=today.weekday())).strftime("%Y-%m-%d")
+            criteres['date_to'] = today.strftime("%Y-%m-%d")
         elif periode == "Ce mois":
-            date_debut = today.replace(day=1).strftime("%Y-%m-%d")
-            date_fin = today.strftime("%Y-%m-%d")
+            criteres['date_from'] = today.replace(day=1).strftime("%Y-%m-%d")
+            criteres['date_to'] = today.strftime("%Y-%m-%d")
         elif periode == "Personnalisé":
-            # Vous pouvez ajouter une logique pour sélectionner des dates personnalisées
-            pass
-        
-        # Filtrer les factures
-        resultats_filtres = []
-        for facture in factures:
-            # Filtres de date
-            if date_debut and date_fin:
-                if not (date_debut <= facture[2] <= date_fin):
-                    continue
-            
-            # Filtres de recherche
+            criteres['date_from'] = filtres.get('date_debut') or None
+            criteres['date_to'] = filtres.get('date_fin') or None
+        
+        # Filtres de recherche
+        if terme_recherche:
             if type_recherche == "Nom Client":
-                if terme_recherche and terme_recherche not in facture[1].lower():
-                    continue
+                criteres['client_like'] = terme_recherche
+            elif type_recherche == "Date":
+                # Préfixe de date : "2025", "2025-08" ou "2025-08-09"
+                # ('~' est classé après les chiffres et le tiret)
+                criteres['date_from'] = max(criteres.get('date_from') or '', terme_recherche)
+                criteres['date_to'] = min(criteres.get('date_to') or '~', terme_recherche + '~')
             elif type_recherche == "Montant":
-                try:
-                    if terme_recherche and float(terme_recherche) != float(facture[3]):
-                        continue
-                except ValueError:
-                    continue
-            
-            resultats_filtres.append(facture)
+                montant = float(terme_recherche)
+                criteres['montant_min'] = criteres['montant_max'] = montant
         
-        return resultats_filtres
+        return criteres
     
     def filtrer_ventes(self):
         # Préparer les filtres
@@ -257,6 +447,18 @@ class RapportPage(ctk.CTkFrame):
             'periode': self.date_picker.get()
         }
         
+        # Période personnalisée : valider les dates saisies
+        if filtres['periode'] == "Personnalisé":
+            for cle, entry in (('date_debut', self.entry_date_debut), ('date_fin', self.entry_date_fin)):
+                valeur = entry.get().strip()
+                if valeur:
+                    try:
+                        datetime.strptime(valeur, "%Y-%m-%d")
+                    except ValueError:
+                        messagebox.showerror("Erreur", f"Date invalide : {valeur}\nFormat attendu : AAAA-MM-JJ")
+                        return
+                filtres[cle] = valeur
+        
         # Charger les ventes filtrées
         self.load_ventes(filtres)
     
@@ -308,40 +510,34 @@ class RapportPage(ctk.CTkFrame):
         tree_details.pack(padx=20, pady=(0, 20), fill="both", expand=True)
     
     def generer_facture(self, facture_id):
-        # Récupérer les détails de la facture
-        facture = self.db.get_facture_by_id(facture_id)
-        details = self.db.get_facture_details(facture_id)
+        """Ouvre la facture PDF (servie depuis le cache si elle a déjà été générée)"""
+        get_executor().submit(
+            self.winfo_toplevel(), self.db.get_facture_complete, facture_id,
+            on_success=self.ouvrir_facture,
+            on_error=lambda e: messagebox.showerror("Erreur", f"Erreur lors de la génération de la facture: {e}")
+        )
+    
+    def ouvrir_facture(self, facture):
+        """Facture lue : rendu et ouverture par le processus d'impression"""
+        from utils.print_queue import get_print_queue
+        facture_info, details = facture
+        try:
+            get_print_queue().submit_facture(
+                self, facture_info, details,
+                on_error=lambda e: messagebox.showerror("Erreur", f"Erreur lors de la génération du PDF: {e}")
+            )
+        except Exception as e:
+            messagebox.showerror("Erreur", f"Erreur lors de la génération de la facture: {e}")
+    
+    def reimprimer_ticket(self, facture_id):
+        """Renvoie le ticket ESC/POS d'une vente enregistrée à l'imprimante thermique"""
+        from utils.escpos import imprimer_ticket, lignes_details
         
-        # Créer un dossier pour les factures si inexistant
-        os.makedirs('factures', exist_ok=True)
-        
-        # Nom du fichier de facture
-        nom_fichier = f'factures/facture_{facture_id}_{facture[1]}_{facture[2]}.txt'
-        
-        # Générer la facture
-        with open(nom_fichier, 'w', encoding='utf-8') as f:
-            f.write("===== FACTURE =====\n")
-            f.write(f"Numéro : {facture_id}\n")
-            f.write(f"Client : {facture[1]}\n")
-            f.write(f"Date : {facture[2]}\n\n")
-            f.write("Détails des Articles :\n")
-            f.write("-" * 50 + "\n")
-            f.write(f"{'Article':<20} {'Unité':<10} {'Qté':<5} {'P.U.':<10} {'Total':<10}\n")
-            f.write("-" * 50 + "\n")
-            
-            total_facture = 0
-            for detail in details:
-                article_nom = detail[7]
-                unite_libelle = detail[8]
-                quantite = detail[4]
-                prix_unitaire = detail[5]
-                prix_total = detail[6]
-                
-                total_facture += prix_total
-                
-                f.write(f"{article_nom:<20} {unite_libelle:<10} {quantite:<5} {prix_unitaire:<10} Ar {prix_total:<10} Ar\n")
-            
-            f.write("-" * 50 + "\n")
-            f.write(f"{'TOTAL':<40} {total_facture} Ar")
+        def imprimer():
+            facture_info, details = self.db.get_facture_complete(facture_id)
+            return imprimer_ticket(facture_info[0], facture_info[1], facture_info[2], lignes_details(details))
         
-        messagebox.showinfo("Facture Générée", f"Facture sauvegardée : {nom_fichier}")
\ No newline at end of file
+        get_executor().submit(
+            self.winfo_toplevel(), imprimer,
+            on_error=lambda e: messagebox.showerror("Erreur", f"Impossible d'imprimer le ticket de caisse: {e}")
+        )
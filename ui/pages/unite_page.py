@@ -1,12 +1,15 @@
 import customtkinter as ctk
 from tkinter import ttk, messagebox
-from database.db_manager import DatabaseManager
+from ui.components.tree_diff import sync_rows
+from ui.components.page import PageLifecycle
+
+class UnitePage(ctk.CTkFrame, PageLifecycle):
+    tables = frozenset({"unite"})
 
-class UnitePage(ctk.CTkFrame):
     def __init__(self, parent,db):
         super().__init__(parent, corner_radius=0, fg_color="transparent")
         
-        self.db = DatabaseManager()
+        self.db = db
         self.selected_unite_id = None
         self.setup_ui()
         self.load_unites()
@@ -205,22 +208,25 @@ class UnitePage(ctk.CTkFrame):
         )
         self.label_stats.grid(row=2, column=0, padx=20, pady=10, sticky="w")
         
+    def refresh(self, tables):
+        self.load_unites()
+        
     def load_unites(self):
         """Charge les unités depuis la base de données"""
         try:
-            # Vider le tableau
-            for item in self.tree_unites.get_children():
-                self.tree_unites.delete(item)
-            
             # Charger les unités
             unites = self.db.get_all_unites()
             
-            for unite in unites:
-                self.tree_unites.insert("", "end", values=(
+            # Seules les lignes ajoutées, modifiées ou supprimées sont touchées
+            sync_rows(
+                self.tree_unites, unites,
+                iid_of=lambda unite: str(unite[0]),
+                values_of=lambda unite: (
                     unite[0],  # ID
                     unite[1],  # Code
                     unite[2]   # Libellé
-                ))
+                )
+            )
             
             # Mettre à jour les statistiques
             self.label_stats.configure(text=f"📊 Total: {len(unites)} unité(s)")
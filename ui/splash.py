@@ -0,0 +1,85 @@
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+# Intervalle de vérification de la fin du préchargement (ms)
+POLL_MS = 50
+
+
+class SplashScreen(tk.Tk):
+    """Écran de démarrage affiché pendant le préchargement.
+
+    En tkinter pur (sans customtkinter) pour apparaître le plus tôt possible ;
+    il est détruit avant la création de la fenêtre principale.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.overrideredirect(True)
+        self.configure(bg="#ffffff")
+
+        largeur, hauteur = 380, 170
+        x = (self.winfo_screenwidth() - largeur) // 2
+        y = (self.winfo_screenheight() - hauteur) // 2
+        self.geometry(f"{largeur}x{hauteur}+{x}+{y}")
+
+        cadre = tk.Frame(self, bg="#ffffff", highlightthickness=1, highlightbackground="#e9ecef")
+        cadre.pack(fill="both", expand=True)
+
+        tk.Label(
+            cadre, text="🏪 Gestion de Vente",
+            font=("Segoe UI", 18, "bold"), fg="#0f3a61", bg="#ffffff"
+        ).pack(pady=(30, 10))
+
+        self.message = tk.StringVar(value="Démarrage...")
+        tk.Label(
+            cadre, textvariable=self.message,
+            font=("Segoe UI", 10), fg="#6c757d", bg="#ffffff"
+        ).pack()
+
+        self.progression = ttk.Progressbar(cadre, mode="indeterminate", length=280)
+        self.progression.pack(pady=15)
+        self.progression.start(15)
+
+        # Dessiner l'écran tout de suite, avant les imports et le préchargement
+        self.update()
+
+        self._message_suivant = None
+
+    def set_message(self, message):
+        """Change le texte affiché (appelable depuis n'importe quel thread)"""
+        self._message_suivant = message
+
+    def run(self, fonction, *args, **kwargs):
+        """Exécute fonction(*args, **kwargs) dans un thread en gardant l'écran vivant.
+
+        Retourne le résultat de la fonction ou relance son exception. L'écran
+        n'est pas détruit : l'appelant peut encore l'utiliser comme parent.
+        """
+        resultat = {}
+
+        def travail():
+            try:
+                resultat['valeur'] = fonction(*args, **kwargs)
+            except BaseException as e:
+                resultat['erreur'] = e
+
+        thread = threading.Thread(target=travail, name="warmup", daemon=True)
+        thread.start()
+
+        def verifier():
+            if self._message_suivant is not None:
+                self.message.set(self._message_suivant)
+                self._message_suivant = None
+            if thread.is_alive():
+                self.after(POLL_MS, verifier)
+            else:
+                self.quit()
+
+        self.after(POLL_MS, verifier)
+        self.mainloop()
+        thread.join()
+
+        if 'erreur' in resultat:
+            raise resultat['erreur']
+        return resultat['valeur']
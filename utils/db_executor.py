@@ -0,0 +1,129 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# Délai entre deux relèves des résultats par le thread Tk (millisecondes)
+POLL_MS = 15
+
+
+class DBExecutor:
+    """Exécute les accès base dans un pool de threads.
+
+    Les résultats sont livrés au thread Tk via after() : les callbacks
+    peuvent donc manipuler les widgets sans précaution particulière.
+    """
+
+    def __init__(self, max_workers=2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._results = queue.SimpleQueue()
+        self._tasks = {}        # owner -> {key: future}
+        self._root = None
+        self._polling = False
+
+    def submit(self, owner, fn, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """Soumet fn(*args, **kwargs) et retourne le Future.
+
+        `owner` est le widget demandeur : ses tâches sont annulées par
+        cancel(owner) et ses callbacks ignorés s'il a été détruit. Une tâche
+        avec la même clé qu'une tâche en cours du même owner remplace celle-ci.
+        À appeler depuis le thread Tk.
+        """
+        if self._root is None:
+            self._root = owner.nametowidget(".")
+
+        taches = self._tasks.setdefault(owner, {})
+        key = key if key is not None else object()
+        ancienne = taches.pop(key, None)
+        if ancienne is not None:
+            ancienne.cancel()
+
+        future = self._pool.submit(fn, *args, **kwargs)
+        taches[key] = future
+        future.add_done_callback(
+            lambda f: self._results.put((owner, key, f, on_success, on_error))
+        )
+        self._schedule_poll()
+        return future
+
+    def cancel(self, owner):
+        """Annule les tâches d'un owner ; leurs résultats ne seront pas livrés.
+
+        Retourne True si des tâches étaient en cours.
+        """
+        taches = self._tasks.pop(owner, {})
+        for future in taches.values():
+            future.cancel()
+        return bool(taches)
+
+    def cancel_all(self):
+        for owner in list(self._tasks):
+            self.cancel(owner)
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self._root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                owner, key, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            taches = self._tasks.get(owner)
+            if taches is None or taches.get(key) is not future:
+                # Tâche annulée ou remplacée entre-temps
+                continue
+            del taches[key]
+            if not taches:
+                del self._tasks[owner]
+
+            if not self._widget_exists(owner):
+                continue
+            self._deliver(future, on_success, on_error)
+
+        if self._tasks:
+            self._root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _widget_exists(widget):
+        try:
+            return bool(widget.winfo_exists())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _deliver(future, on_success, on_error):
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                traceback.print_exception(type(e), e, e.__traceback__)
+            return
+        if on_success:
+            on_success(result)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Retourne l'exécuteur partagé par toute l'application"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DBExecutor()
+        return _executor
@@ -0,0 +1,109 @@
+import glob
+import hashlib
+import os
+import tempfile
+import time
+
+# Dossier des documents générés (relatif au répertoire de l'application, comme la base)
+CACHE_DIR = os.path.join('cache', 'factures')
+
+# Taille maximale du cache ; les documents les moins récemment servis sont supprimés
+TAILLE_MAX = 50 * 1024 * 1024
+
+# À incrémenter quand la mise en page des factures change (invalide le cache)
+VERSION_DOCUMENT = 2
+
+# Anciens PDF temporaires (avant le cache) et fichiers partiels à récupérer
+MOTIFS_TEMPORAIRES = ("Facture_*.pdf", "Inventaire_*.pdf")
+AGE_MAX_TEMPORAIRES = 24 * 3600
+
+
+def empreinte(facture_info, details):
+    """Empreinte du contenu d'une facture : en-tête et lignes"""
+    contenu = repr((VERSION_DOCUMENT, tuple(facture_info), [tuple(detail) for detail in details]))
+    return hashlib.sha256(contenu.encode("utf-8")).hexdigest()[:20]
+
+
+class DocumentCache:
+    """Cache disque des factures PDF, adressé par leur contenu.
+
+    Une facture enregistrée ne change plus : le document est identifié par
+    son numéro et l'empreinte de ses lignes, et resservi tel quel tant que
+    celles-ci sont identiques. La taille totale est bornée (éviction LRU
+    d'après la date de dernier accès, tenue à jour dans mtime).
+    """
+
+    def __init__(self, dossier=CACHE_DIR, taille_max=TAILLE_MAX):
+        # Chemin absolu : le cache est aussi utilisé par le processus d'impression
+        self.dossier = os.path.abspath(dossier)
+        self.taille_max = taille_max
+
+    def chemin(self, facture_info, details):
+        return os.path.join(
+            self.dossier, f"Facture_{facture_info[0]}_{empreinte(facture_info, details)}.pdf"
+        )
+
+    def trouver(self, facture_info, details):
+        """Chemin du document s'il est en cache (marqué comme récemment utilisé), sinon None"""
+        chemin = self.chemin(facture_info, details)
+        try:
+            os.utime(chemin)
+        except OSError:
+            return None
+        return chemin
+
+    def obtenir(self, facture_info, details, generer):
+        """Chemin du document, généré par generer(facture_info, details, chemin) si absent"""
+        chemin = self.trouver(facture_info, details)
+        if chemin is not None:
+            return chemin
+
+        chemin = self.chemin(facture_info, details)
+        os.makedirs(self.dossier, exist_ok=True)
+        # Écriture dans un fichier partiel puis renommage atomique : un
+        # document présent dans le cache est toujours complet
+        partiel = f"{chemin}.{os.getpid()}.tmp"
+        try:
+            generer(facture_info, details, partiel)
+            os.replace(partiel, chemin)
+        finally:
+            if os.path.exists(partiel):
+                os.remove(partiel)
+        self.reduire()
+        return chemin
+
+    def reduire(self):
+        """Supprime les documents les moins récemment utilisés au-delà de taille_max"""
+        fichiers = []
+        for chemin in glob.glob(os.path.join(self.dossier, "*.pdf")):
+            try:
+                stat = os.stat(chemin)
+            except OSError:
+                continue
+            fichiers.append((stat.st_mtime, stat.st_size, chemin))
+
+        total = sum(taille for _, taille, _ in fichiers)
+        for _, taille, chemin in sorted(fichiers):
+            if total <= self.taille_max:
+                break
+            try:
+                os.remove(chemin)
+                total -= taille
+            except OSError:
+                pass
+
+    def nettoyer(self, age_max=AGE_MAX_TEMPORAIRES):
+        """Récupère les fichiers partiels abandonnés et les anciens PDF temporaires"""
+        limite = time.time() - age_max
+        candidats = glob.glob(os.path.join(self.dossier, "*.tmp"))
+        for motif in MOTIFS_TEMPORAIRES:
+            candidats.extend(glob.glob(os.path.join(tempfile.gettempdir(), motif)))
+        supprimes = 0
+        for chemin in candidats:
+            try:
+                if os.path.getmtime(chemin) < limite:
+                    os.remove(chemin)
+                    supprimes += 1
+            except OSError:
+                pass
+        return supprimes
@@ -0,0 +1,187 @@
+"""
+Tickets de caisse ESC/POS pour imprimantes thermiques 80 mm
+
+Le ticket est formaté directement en commandes ESC/POS (aucun PDF) puis
+envoyé tel quel à l'imprimante. La destination est donnée par la variable
+d'environnement GESTIONVENTE_TICKET :
+
+    /dev/usb/lp0            périphérique (Linux)
+    \\\\.\\COM3 ou \\\\PC\\Ticket  port série ou imprimante partagée (Windows)
+    tcp://192.168.1.50:9100 imprimante réseau (port RAW)
+    tickets.prn             fichier, les tickets y sont ajoutés à la suite
+
+Sans configuration, les tickets sont ajoutés au fichier TICKETS_FICHIER, qui
+tient lieu d'imprimante pour les essais.
+"""
+
+import os
+import socket
+import textwrap
+
+# Destination par défaut : fichier tenant lieu d'imprimante
+TICKETS_FICHIER = os.path.join('cache', 'tickets.prn')
+
+# Caractères par ligne (police A sur papier 80 mm)
+LARGEUR = 48
+
+# Table de caractères WPC1252 (ESC t 16 sur les imprimantes Epson et compatibles)
+PAGE_CODE = 16
+ENCODAGE = "cp1252"
+
+PORT_RAW = 9100
+DELAI_RESEAU = 5  # secondes
+
+PIED_TICKET = "Ho tahiana ianao raha miditra, Ho tahiana ianao raha mivoaka"
+
+# Commandes ESC/POS
+ESC = b"\x1b"
+GS = b"\x1d"
+INITIALISER = ESC + b"@"
+GAUCHE, CENTRE, DROITE = 0, 1, 2
+NORMAL = 0x00
+DOUBLE_HAUTEUR = 0x01
+DOUBLE = 0x11  # hauteur et largeur doublées (LARGEUR / 2 caractères par ligne)
+
+
+def aligner(alignement):
+    return ESC + b"a" + bytes([alignement])
+
+
+def gras(actif):
+    return ESC + b"E" + bytes([1 if actif else 0])
+
+
+def taille(mode):
+    return GS + b"!" + bytes([mode])
+
+
+def avancer(lignes):
+    return ESC + b"d" + bytes([lignes])
+
+
+def couper():
+    """Avance jusqu'au couteau puis coupe partiellement le papier"""
+    return GS + b"V" + bytes([66, 0])
+
+
+# =============== FORMATAGE ===============
+
+def lignes_panier(panier):
+    """Lignes du ticket (article, unité, quantité, prix unitaire, total) depuis un Panier"""
+    return [
+        (item["article_nom"], item["unite_nom"], item["quantite"], item["prix_unitaire"], item["prix_total"])
+        for item in panier
+    ]
+
+
+def lignes_details(details):
+    """Lignes du ticket depuis DatabaseManager.get_facture_details"""
+    return [(detail[7], detail[8], detail[4], detail[5], detail[6]) for detail in details]
+
+
+def _montant(valeur):
+    return f"{valeur:,.0f} Ar"
+
+
+def _quantite(valeur):
+    return f"{valeur:.2f}".rstrip("0").rstrip(".")
+
+
+def _colonnes(gauche, droite, largeur=LARGEUR):
+    """Texte à gauche et montant aligné à droite sur une ligne (gauche tronqué si besoin)"""
+    place = largeur - len(droite) - 1
+    return f"{gauche[:place]:<{place}} {droite}"
+
+
+def formater_ticket(numero, client, date, lignes, largeur=LARGEUR):
+    """Octets ESC/POS du ticket de caisse.
+
+    `lignes` contient des tuples (article, unité, quantité, prix unitaire,
+    total), voir lignes_panier et lignes_details.
+    """
+    texte = []
+    total = 0
+
+    def ecrire(ligne=""):
+        texte.append(ligne.encode(ENCODAGE, "replace") + b"\n")
+
+    texte.append(INITIALISER + ESC + b"t" + bytes([PAGE_CODE]))
+    texte.append(aligner(CENTRE) + taille(DOUBLE) + gras(True))
+    ecrire(f"FACTURE N° {numero}")
+    texte.append(taille(NORMAL) + gras(False) + aligner(GAUCHE))
+    ecrire()
+    ecrire(f"Client : {client}"[:largeur])
+    ecrire(f"Date   : {date}")
+    ecrire("-" * largeur)
+
+    for article, unite, quantite, prix_unitaire, prix_total in lignes:
+        total += prix_total
+        ecrire(str(article)[:largeur])
+        ecrire(_colonnes(f"  {_quantite(quantite)} {unite} x {_montant(prix_unitaire)}",
+                         _montant(prix_total), largeur))
+
+    ecrire("-" * largeur)
+    texte.append(taille(DOUBLE_HAUTEUR) + gras(True))
+    ecrire(_colonnes("TOTAL A PAYER", _montant(total), largeur))
+    texte.append(taille(NORMAL) + gras(False) + aligner(CENTRE))
+    ecrire()
+    for ligne in textwrap.wrap(PIED_TICKET, largeur):
+        ecrire(ligne)
+    texte.append(avancer(4) + couper())
+    return b"".join(texte)
+
+
+# =============== SORTIES ===============
+
+class SortieFichier:
+    """Périphérique ou fichier ; `ajout` écrit les tickets à la suite (fichier d'essai)"""
+
+    def __init__(self, chemin, ajout=False):
+        self.chemin = chemin
+        self.ajout = ajout
+
+    def envoyer(self, donnees):
+        dossier = os.path.dirname(self.chemin)
+        if self.ajout and dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with open(self.chemin, "ab" if self.ajout else "wb") as f:
+            f.write(donnees)
+
+    def __str__(self):
+        return self.chemin
+
+
+class SortieReseau:
+    """Imprimante réseau : octets envoyés bruts sur une connexion TCP"""
+
+    def __init__(self, hote, port=PORT_RAW, delai=DELAI_RESEAU):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+
+    def envoyer(self, donnees):
+        with socket.create_connection((self.hote, self.port), timeout=self.delai) as connexion:
+            connexion.sendall(donnees)
+
+    def __str__(self):
+        return f"tcp://{self.hote}:{self.port}"
+
+
+def ouvrir_sortie(adresse=None):
+    """Sortie correspondant à `adresse` (par défaut GESTIONVENTE_TICKET, sinon le fichier d'essai)"""
+    adresse = adresse or os.environ.get("GESTIONVENTE_TICKET")
+    if not adresse:
+        return SortieFichier(TICKETS_FICHIER, ajout=True)
+    if adresse.startswith("tcp://"):
+        hote, _, port = adresse[len("tcp://"):].partition(":")
+        return SortieReseau(hote, int(port) if port else PORT_RAW)
+    # Périphériques : une écriture par ticket ; autres chemins : fichier cumulatif
+    peripherique = adresse.startswith(("/dev/", "\\\\"))
+    return SortieFichier(adresse, ajout=not peripherique)
+
+
+def imprimer_ticket(numero, client, date, lignes, sortie=None):
+    """Formate et envoie le ticket ; retourne la sortie utilisée"""
+    sortie = sortie or ouvrir_sortie()
+    sortie.envoyer(formater_ticket(numero, client, date, lignes))
+    return sortie
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Export par lot des factures PDF
+
+Le rendu est réparti sur tous les cœurs (ProcessPoolExecutor) :
+
+    python -m utils.export_factures --du 2024-01-01 --au 2024-01-31 --dossier export
+    python -m utils.export_factures --ids 12 15 18 --fusion factures.pdf
+
+Avec --fusion, chaque processus produit une partie du document et les
+parties sont réunies avec pypdf (requirements.txt) ; s'il manque, le
+document fusionné est rendu par un seul processus.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Lancement direct du script : rendre les paquets du projet importables
+# (y compris dans les processus de rendu)
+if __name__ in ("__main__", "__mp_main__"):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Factures rendues par tâche (amortit l'envoi des données aux processus)
+TAILLE_LOT = 50
+
+
+def nom_fichier(facture_info):
+    """Nom du PDF d'une facture : Facture_<id>_<client>_<date>.pdf"""
+    client = re.sub(r'[^\w-]+', '_', str(facture_info[1])).strip('_') or "client"
+    return f"Facture_{facture_info[0]}_{client}_{facture_info[2]}.pdf"
+
+
+def _rendre_fichiers(factures, dossier):
+    """Exécuté dans un processus : un PDF par facture, retourne les chemins"""
+    from utils.pdf_generator import generer_facture
+    chemins = []
+    for facture_info, details in factures:
+        chemin = os.path.join(dossier, nom_fichier(facture_info))
+        generer_facture(facture_info, details, chemin)
+        chemins.append(chemin)
+    return chemins
+
+
+def _rendre_partie(factures, chemin):
+    """Exécuté dans un processus : un PDF pour toutes les factures reçues"""
+    from utils.pdf_generator import generer_factures
+    generer_factures(factures, chemin)
+    return chemin
+
+
+def _pool(max_workers):
+    # "spawn" partout : l'export peut être lancé depuis un thread de l'interface
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _lots(factures, taille):
+    return [factures[i:i + taille] for i in range(0, len(factures), taille)]
+
+
+def _pypdf_disponible():
+    try:
+        import pypdf  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def exporter_factures(factures, dossier=None, fusion=None, max_workers=None, on_progress=None):
+    """Génère les PDF d'une liste de factures (facture_info, details).
+
+    Avec `dossier`, un fichier par facture dans ce dossier ; avec `fusion`,
+    un seul PDF à ce chemin. on_progress(faites, total) est appelé depuis le
+    thread appelant au fil des lots. Retourne la liste des fichiers créés.
+    """
+    if (dossier is None) == (fusion is None):
+        raise ValueError("Indiquer un dossier ou un fichier de fusion")
+    if not factures:
+        return []
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if fusion is not None:
+        return _exporter_fusion(factures, fusion, max_workers, on_progress)
+
+    os.makedirs(dossier, exist_ok=True)
+    chemins = []
+    with _pool(max_workers) as pool:
+        futures = {
+            pool.submit(_rendre_fichiers, lot, dossier): len(lot)
+            for lot in _lots(factures, TAILLE_LOT)
+        }
+        faites = 0
+        for future in as_completed(futures):
+            chemins.extend(future.result())
+            faites += futures[future]
+            if on_progress:
+                on_progress(faites, len(factures))
+    return chemins
+
+
+def _exporter_fusion(factures, fusion, max_workers, on_progress):
+    dossier_fusion = os.path.dirname(os.path.abspath(fusion))
+    os.makedirs(dossier_fusion, exist_ok=True)
+
+    # Une partie contiguë par processus ; sans pypdf, une seule partie
+    nb_parties = min(max_workers, -(-len(factures) // TAILLE_LOT))
+    if nb_parties <= 1 or not _pypdf_disponible():
+        with _pool(1) as pool:
+            pool.submit(_rendre_partie, factures, fusion).result()
+        if on_progress:
+            on_progress(len(factures), len(factures))
+        return [fusion]
+
+    from pypdf import PdfWriter
+
+    taille = -(-len(factures) // nb_parties)
+    parties = _lots(factures, taille)
+    temporaire = tempfile.mkdtemp(prefix="export_factures_", dir=dossier_fusion)
+    try:
+        with _pool(max_workers) as pool:
+            futures = [
+                pool.submit(_rendre_partie, partie, os.path.join(temporaire, f"partie_{i:04d}.pdf"))
+                for i, partie in enumerate(parties)
+            ]
+            faites = 0
+            for future, partie in zip(futures, parties):
+                future.result()
+                faites += len(partie)
+                if on_progress:
+                    on_progress(faites, len(factures))
+
+        writer = PdfWriter()
+        for future in futures:
+            writer.append(future.result())
+        with open(fusion, "wb") as f:
+            writer.write(f)
+    finally:
+        shutil.rmtree(temporaire, ignore_errors=True)
+    return [fusion]
+
+
+def main():
+    from database.db_manager import DatabaseManager
+    from database.init_db import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Export par lot des factures PDF")
+    parser.add_argument("--db", default=DB_PATH, help="Chemin de la base de données")
+    parser.add_argument("--du", dest="date_from", help="Date de début incluse (AAAA-MM-JJ)")
+    parser.add_argument("--au", dest="date_to", help="Date de fin incluse (AAAA-MM-JJ)")
+    parser.add_argument("--ids", type=int, nargs="+", help="Numéros de factures à exporter")
+    parser.add_argument("--client", help="Nom du client (recherche partielle)")
+    sortie = parser.add_mutually_exclusive_group()
+    sortie.add_argument("--dossier", default="factures", help="Un PDF par facture dans ce dossier")
+    sortie.add_argument("--fusion", help="Un seul PDF contenant toutes les factures")
+    parser.add_argument("--processus", type=int, help="Nombre de processus (par défaut : tous les cœurs)")
+    args = parser.parse_args()
+
+    db = DatabaseManager(args.db)
+    try:
+        if args.ids:
+            factures = db.get_factures_export(args.ids)
+        else:
+            factures = db.get_factures_export(
+                date_from=args.date_from, date_to=args.date_to, client_like=args.client
+            )
+    finally:
+        db.close()
+
+    if not factures:
+        print("Aucune facture à exporter")
+        return
+
+    def progression(faites, total):
+        print(f"\r📄 {faites}/{total} factures", end="", flush=True)
+
+    fichiers = exporter_factures(
+        factures,
+        dossier=None if args.fusion else args.dossier,
+        fusion=args.fusion,
+        max_workers=args.processus,
+        on_progress=progression
+    )
+    print()
+    cible = args.fusion or args.dossier
+    print(f"✅ {len(factures)} factures exportées ({len(fichiers)} fichier(s)) : {cible}")
+
+
+if __name__ == "__main__":
+    main()
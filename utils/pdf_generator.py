@@ -1 +1,478 @@
- 
+import io
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.rl_accel import escapePDF
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Frame, LongTable, Paragraph, Spacer, Table, TableStyle
+
+# Styles et modèles de tableaux construits une seule fois par processus
+
+MARGE = 72
+HAUTEUR_LIGNE = 18  # Hauteur d'une ligne de tableau (police 10-12, marges de cellule 3)
+
+_styles = getSampleStyleSheet()
+STYLE_NORMAL = _styles['Normal']
+
+STYLE_TITRE_FACTURE = ParagraphStyle(
+    'TitleStyle',
+    parent=_styles['Heading1'],
+    fontSize=20,
+    spaceAfter=30,
+    alignment=1,  # Centré
+    textColor=colors.darkblue
+)
+
+STYLE_TITRE_INVENTAIRE = ParagraphStyle(
+    'InventaireTitleStyle',
+    parent=_styles['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2c3e50'),
+    spaceAfter=20,
+    alignment=1  # Centré
+)
+
+STYLE_SOUS_TITRE = ParagraphStyle(
+    'SubtitleStyle',
+    parent=_styles['Normal'],
+    fontSize=12,
+    textColor=colors.HexColor('#7f8c8d'),
+    spaceAfter=20,
+    alignment=1  # Centré
+)
+
+STYLE_PIED = ParagraphStyle(
+    'FooterStyle',
+    parent=_styles['Normal'],
+    fontSize=10,
+    textColor=colors.HexColor('#95a5a6'),
+    alignment=1  # Centré
+)
+
+COLONNES_FACTURE = [2*inch, 1*inch, 1*inch, 1.25*inch, 1.25*inch, 1.5*inch]
+ENTETE_FACTURE = ['Article', 'Unité', 'Quantité', 'Prix Unitaire', 'Total', 'Entrepôt']
+
+TABLE_FACTURE = TableStyle([
+    # En-tête
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+
+    # Corps du tableau
+    ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -2), 10),
+    ('GRID', (0, 0), (-1, -2), 1, colors.black),
+
+    # Ligne de total
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, -1), (-1, -1), 12),
+    ('ALIGN', (4, -1), (-1, -1), 'RIGHT'),
+])
+
+COLONNES_INVENTAIRE = [1*inch, 3*inch, 2*inch]
+
+TABLE_INVENTAIRE = TableStyle([
+    # En-tête
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498db')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+
+    # Corps du tableau
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#bdc3c7')),
+
+    # Alternance de couleurs
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+])
+
+ENTETE_INVENTAIRE = ['ID', 'Nom', 'Entrepôt']
+ENTETE_INVENTAIRE_ENTREPOT = ['ID', 'Nom', 'Référence']
+
+
+def _ligne_pleine(i, alignement, police):
+    return [
+        ('SPAN', (0, i), (-1, i)),
+        ('ALIGN', (0, i), (-1, i), alignement),
+        ('FONTNAME', (0, i), (-1, i), police),
+    ]
+
+
+# Commandes de style des lignes particulières de l'inventaire, par genre de ligne
+STYLE_LIGNES_INVENTAIRE = {
+    'groupe': lambda i: _ligne_pleine(i, 'LEFT', 'Helvetica-Bold') + [
+        ('BACKGROUND', (0, i), (-1, i), colors.HexColor('#d6eaf8')),
+    ],
+    'sous_total': lambda i: _ligne_pleine(i, 'RIGHT', 'Helvetica-Oblique'),
+    'total': lambda i: _ligne_pleine(i, 'RIGHT', 'Helvetica-Bold') + [
+        ('BACKGROUND', (0, i), (-1, i), colors.HexColor('#bdc3c7')),
+    ],
+}
+
+PIED_INVENTAIRE = "Inventaire généré automatiquement"
+
+PIED_FACTURE = '"Ho tahiana ianao raha miditra, Ho tahiana ianao raha mivoaka"'
+
+
+def _sortie(destination):
+    """Retourne (cible ReportLab, tampon) ; tampon est un BytesIO si destination vaut None"""
+    if destination is None:
+        tampon = io.BytesIO()
+        return tampon, tampon
+    return destination, None
+
+
+def _resultat(destination, tampon):
+    return tampon.getvalue() if tampon is not None else destination
+
+
+# =============== FACTURES ===============
+
+def lignes_facture(details):
+    """Lignes du tableau (textes déjà formatés) et total de la facture"""
+    lignes = []
+    total_facture = 0
+    for detail in details:
+        quantite, prix_unitaire, prix_total = detail[4], detail[5], detail[6]
+        total_facture += prix_total
+        lignes.append([
+            detail[7],
+            detail[8],
+            f"{quantite:.2f}",
+            f"{prix_unitaire:,.0f} Ar",
+            f"{prix_total:,.0f} Ar",
+            detail[9] or "Non spécifié"
+        ])
+    return lignes, total_facture
+
+
+def generer_facture(facture_info, details, destination=None):
+    """Génère le PDF d'une facture.
+
+    `facture_info` est la ligne de la table facture et `details` les lignes
+    de DatabaseManager.get_facture_details. `destination` est un chemin ou un
+    fichier binaire ouvert ; avec None, le PDF est retourné en bytes.
+
+    Les factures qui tiennent sur une page sont dessinées directement sur le
+    canvas ; les autres passent par platypus pour la pagination.
+    """
+    return generer_factures([(facture_info, details)], destination)
+
+
+def generer_factures(factures, destination=None):
+    """Génère un seul PDF pour plusieurs factures (facture_info, details).
+
+    Chaque facture commence sur une nouvelle page ; `destination` comme pour
+    generer_facture.
+    """
+    cible, tampon = _sortie(destination)
+    # Flux de page non compressé : compression et ASCII85 coûtent plus que
+    # le dessin pour une facture de quelques Ko. Document invariant (sans
+    # date de création ni heure d'impression) : il ne dépend que de la
+    # facture et peut être resservi tel quel depuis le cache
+    c = canvas.Canvas(cible, pagesize=A4, pageCompression=0, invariant=1)
+    if len(factures) == 1:
+        c.setTitle(f"Facture N° {factures[0][0][0]}")
+    else:
+        c.setTitle("Factures")
+
+    for facture_info, details in factures:
+        lignes, total_facture = lignes_facture(details)
+        if len(lignes) <= _lignes_max_page_facture():
+            _dessiner_facture(c, facture_info, lignes, total_facture)
+        else:
+            _construire_facture(c, facture_info, lignes, total_facture)
+
+    c.save()
+    return _resultat(destination, tampon)
+
+
+def _infos_client(facture_info):
+    return [
+        ("Client:", str(facture_info[1])),
+        ("Date:", str(facture_info[2])),
+    ]
+
+
+# Position verticale du haut du tableau sur la page (titre, espacements et
+# deux lignes d'informations client au-dessus)
+_HAUT_TABLEAU_FACTURE = A4[1] - MARGE - (22 + 30) - 20 - 24 - 20
+
+
+def _lignes_max_page_facture():
+    """Nombre de lignes d'articles dessinables sur une seule page"""
+    hauteur_pied = 30 + 24
+    disponible = _HAUT_TABLEAU_FACTURE - MARGE - hauteur_pied
+    # En-tête et ligne de total en plus des articles
+    return int(disponible // HAUTEUR_LIGNE) - 2
+
+
+def _dessiner_facture(c, facture_info, lignes, total_facture):
+    """Chemin rapide : facture d'une page dessinée directement sur le canvas"""
+    largeur_page, hauteur_page = A4
+
+    # Titre
+    y = hauteur_page - MARGE - 20
+    c.setFont("Helvetica-Bold", 20)
+    c.setFillColor(colors.darkblue)
+    c.drawCentredString(largeur_page / 2, y, f"FACTURE N° {facture_info[0]}")
+
+    # Informations client et date
+    c.setFillColor(colors.black)
+    y = hauteur_page - MARGE - (22 + 30) - 20 - 10
+    for libelle, valeur in _infos_client(facture_info):
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(MARGE, y, libelle)
+        c.setFont("Helvetica", 10)
+        c.drawString(MARGE + c.stringWidth(libelle + " ", "Helvetica-Bold", 10), y, valeur)
+        y -= 12
+
+    # Tableau (centré comme le ferait platypus)
+    largeur_tableau = sum(COLONNES_FACTURE)
+    x0 = (largeur_page - largeur_tableau) / 2
+    bords = [x0]
+    for largeur in COLONNES_FACTURE:
+        bords.append(bords[-1] + largeur)
+    centres = [(g + d) / 2 for g, d in zip(bords, bords[1:])]
+
+    haut = _HAUT_TABLEAU_FACTURE
+    n_grille = len(lignes) + 1
+    bas_grille = haut - n_grille * HAUTEUR_LIGNE
+
+    # Fonds de l'en-tête et de la ligne de total
+    c.setFillColor(colors.grey)
+    c.rect(x0, haut - HAUTEUR_LIGNE, largeur_tableau, HAUTEUR_LIGNE, stroke=0, fill=1)
+    c.setFillColor(colors.lightgrey)
+    c.rect(x0, bas_grille - HAUTEUR_LIGNE, largeur_tableau, HAUTEUR_LIGNE, stroke=0, fill=1)
+
+    # Grille (en-tête et articles)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+    c.grid(bords, [haut - i * HAUTEUR_LIGNE for i in range(n_grille + 1)])
+
+    # Textes du tableau : un seul bloc BT/ET par style, opérateurs écrits
+    # directement (largeurs et chaînes échappées mémorisées par processus)
+    base = haut - HAUTEUR_LIGNE + 5
+    c.setFillColor(colors.whitesmoke)
+    c.addLiteral(_bloc_texte(c, "Helvetica-Bold", 12, [
+        (centre, base, texte, 0.5) for centre, texte in zip(centres, ENTETE_FACTURE)
+    ]))
+
+    cellules = []
+    for ligne in lignes:
+        base -= HAUTEUR_LIGNE
+        cellules.extend((centre, base, texte, 0.5) for centre, texte in zip(centres, ligne))
+    c.setFillColor(colors.black)
+    c.addLiteral(_bloc_texte(c, "Helvetica", 10, cellules))
+
+    base -= HAUTEUR_LIGNE
+    c.addLiteral(_bloc_texte(c, "Helvetica-Bold", 12, [
+        (bords[5] - 6, base, 'TOTAL A PAYER : ', 1),
+        (bords[6] - 6, base, f'{total_facture:,.0f} Ar', 1),
+    ]))
+
+    # Pied de page
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(MARGE, bas_grille - HAUTEUR_LIGNE - 30 - 10, PIED_FACTURE)
+
+    c.showPage()
+
+
+@lru_cache(maxsize=8192)
+def _texte_pdf(texte, police, taille):
+    """Largeur et chaîne PDF échappée (polices standard, WinAnsi) d'un texte"""
+    return stringWidth(texte, police, taille), escapePDF(texte.encode("cp1252", "replace"))
+
+
+def _bloc_texte(c, police, taille, cellules):
+    """Bloc de texte PDF pour des cellules (x, y, texte, ancrage).
+
+    ancrage vaut 0 pour un texte aligné à gauche de x, 0.5 centré sur x et
+    1 aligné à droite de x.
+    """
+    operations = ["BT %s %d Tf" % (c._doc.getInternalFontName(police), taille)]
+    for x, y, texte, ancrage in cellules:
+        largeur, echappe = _texte_pdf(str(texte), police, taille)
+        operations.append("1 0 0 1 %.2f %.2f Tm (%s) Tj" % (x - largeur * ancrage, y, echappe))
+    operations.append("ET")
+    return "\n".join(operations)
+
+
+def _construire_facture(c, facture_info, lignes, total_facture):
+    """Factures de plusieurs pages : mise en page platypus sur le canvas"""
+    _couler(c, _story_facture(facture_info, lignes, total_facture))
+
+
+def _story_facture(facture_info, lignes, total_facture):
+    client_info = "<br/>".join(
+        f"<b>{libelle}</b> {valeur}" for libelle, valeur in _infos_client(facture_info)
+    )
+    table = Table(
+        [ENTETE_FACTURE] + lignes + [['', '', '', '', 'TOTAL A PAYER : ', f'{total_facture:,.0f} Ar']],
+        colWidths=COLONNES_FACTURE,
+        repeatRows=1,
+        style=TABLE_FACTURE
+    )
+    return [
+        Paragraph(f"<b>FACTURE N° {facture_info[0]}</b>", STYLE_TITRE_FACTURE),
+        Spacer(1, 20),
+        Paragraph(client_info, STYLE_NORMAL),
+        Spacer(1, 20),
+        table,
+        Spacer(1, 30),
+        Paragraph(f"<b>{PIED_FACTURE}</b>", STYLE_NORMAL),
+    ]
+
+
+def _couler(c, story):
+    """Place les flowables page après page sur le canvas (comme SimpleDocTemplate).
+
+    Les tableaux trop longs sont découpés ; chaque page se termine par showPage().
+    """
+    story = list(story)
+    while story:
+        frame = Frame(MARGE, MARGE, A4[0] - 2 * MARGE, A4[1] - 2 * MARGE)
+        place = False
+        while story:
+            if frame.add(story[0], c):
+                story.pop(0)
+                place = True
+                continue
+            # Découper l'élément : la première partie remplit la fin de la page
+            morceaux = frame.split(story[0], c)
+            if not morceaux or not frame.add(morceaux[0], c):
+                break
+            story[0:1] = morceaux[1:]
+            place = True
+        if not place:
+            raise ValueError("Élément trop grand pour une page")
+        c.showPage()
+
+
+# =============== INVENTAIRE ===============
+
+def generer_inventaire(articles, destination=None, par_entrepot=False):
+    """Génère le PDF de l'inventaire page par page.
+
+    `articles` est un itérable de tuples (id, nom, reference, entrepot_id,
+    entrepot_nom) trié comme DatabaseManager.iter_inventaire(par_entrepot) :
+    il est consommé au fil des pages et seule la page en cours est en
+    mémoire. Avec `par_entrepot`, les articles sont regroupés par entrepôt
+    avec un sous-total par entrepôt. `destination` comme pour generer_facture.
+    """
+    cible, tampon = _sortie(destination)
+    c = canvas.Canvas(cible, pagesize=A4)
+    c.setTitle("Inventaire des articles")
+    entete = ENTETE_INVENTAIRE_ENTREPOT if par_entrepot else ENTETE_INVENTAIRE
+    lignes = _lignes_inventaire(articles, par_entrepot)
+
+    page = 1
+    groupe = None  # entrepôt en cours à la fin de la page précédente
+    while True:
+        haut = A4[1] - MARGE
+        if page == 1:
+            haut = _dessiner_titre_inventaire(c, haut)
+        # En-tête du tableau puis autant de lignes que la place le permet ;
+        # un entrepôt commencé sur la page précédente voit son titre répété
+        capacite = int((haut - MARGE) // HAUTEUR_LIGNE) - 1 - (groupe is not None)
+        morceau = list(islice(lignes, capacite))
+        if not morceau and page > 1:
+            break
+        complete = len(morceau) == capacite
+
+        if groupe is not None:
+            morceau.insert(0, ([f"{groupe} (suite)", '', ''], 'groupe'))
+        for cellules, genre in morceau:
+            if genre == 'groupe':
+                groupe = cellules[0]
+            elif genre == 'sous_total':
+                groupe = None
+
+        _dessiner_tableau_inventaire(c, haut, entete, morceau)
+        pied = Paragraph(f"{PIED_INVENTAIRE} — Page {page}", STYLE_PIED)
+        pied.wrapOn(c, A4[0] - 2 * MARGE, MARGE)
+        pied.drawOn(c, MARGE, MARGE / 2)
+        c.showPage()
+
+        if not complete:
+            break
+        page += 1
+
+    c.save()
+    return _resultat(destination, tampon)
+
+
+def _lignes_inventaire(articles, par_entrepot):
+    """Lignes du tableau d'inventaire : (cellules, genre).
+
+    genre vaut None pour un article, 'groupe' pour le titre d'un entrepôt,
+    'sous_total' pour le nombre d'articles d'un entrepôt et 'total' pour la
+    dernière ligne.
+    """
+    total = 0
+    if not par_entrepot:
+        for article_id, nom, _reference, _entrepot_id, entrepot_nom in articles:
+            total += 1
+            yield [str(article_id), nom, entrepot_nom or "Non assigné"], None
+    else:
+        courant = nombre = None
+        for article_id, nom, reference, entrepot_id, entrepot_nom in articles:
+            if nombre is None or entrepot_id != courant:
+                if nombre is not None:
+                    yield _sous_total_inventaire(libelle, nombre), 'sous_total'
+                courant, nombre = entrepot_id, 0
+                libelle = entrepot_nom or "Non assigné"
+                yield [libelle, '', ''], 'groupe'
+            nombre += 1
+            total += 1
+            yield [str(article_id), nom, reference or ''], None
+        if nombre is not None:
+            yield _sous_total_inventaire(libelle, nombre), 'sous_total'
+    yield [f"Total : {total} article(s)", '', ''], 'total'
+
+
+def _sous_total_inventaire(libelle, nombre):
+    return [f"Sous-total {libelle} : {nombre} article(s)", '', '']
+
+
+def _dessiner_titre_inventaire(c, haut):
+    """Titre et date de la première page ; retourne la position du haut du tableau"""
+    largeur = A4[0] - 2 * MARGE
+    for paragraphe in (
+        Paragraph("<b>INVENTAIRE DES ARTICLES</b>", STYLE_TITRE_INVENTAIRE),
+        Paragraph(f"Généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}", STYLE_SOUS_TITRE),
+    ):
+        _, hauteur = paragraphe.wrapOn(c, largeur, haut)
+        paragraphe.drawOn(c, MARGE, haut - hauteur)
+        haut -= hauteur + paragraphe.style.spaceAfter
+    return haut - 20
+
+
+def _dessiner_tableau_inventaire(c, haut, entete, morceau):
+    """Dessine le tableau d'une page (centré), son haut à la position `haut`"""
+    commandes = []
+    for i, (_, genre) in enumerate(morceau, start=1):
+        if genre is not None:
+            commandes.extend(STYLE_LIGNES_INVENTAIRE[genre](i))
+    table = LongTable(
+        [entete] + [cellules for cellules, _ in morceau],
+        colWidths=COLONNES_INVENTAIRE,
+        repeatRows=1,
+        style=TABLE_INVENTAIRE
+    )
+    if commandes:
+        table.setStyle(commandes)
+    largeur, hauteur = table.wrapOn(c, A4[0] - 2 * MARGE, haut - MARGE)
+    table.drawOn(c, (A4[0] - largeur) / 2, haut - hauteur)
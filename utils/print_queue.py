@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import tempfile
+import threading
+import traceback
+from datetime import datetime
+from concurrent.futures import Future, ProcessPoolExecutor, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from utils.document_cache import DocumentCache
+
+# Délai entre deux relèves des impressions terminées par le thread Tk (millisecondes)
+POLL_MS = 50
+
+# Que faire du PDF une fois généré
+OUVRIR = "ouvrir"
+IMPRIMER = "imprimer"
+AUCUNE = None
+
+
+def ouvrir_fichier(chemin):
+    """Ouvre le fichier avec la visionneuse du système sans attendre sa fermeture"""
+    if platform.system() == "Windows":
+        os.startfile(chemin)
+    elif platform.system() == "Darwin":  # macOS
+        subprocess.Popen(["open", chemin])
+    else:  # Linux
+        subprocess.Popen(["xdg-open", chemin])
+
+
+def imprimer_fichier(chemin):
+    """Envoie le fichier à l'imprimante par défaut sans attendre la fin du spool"""
+    if platform.system() == "Windows":
+        os.startfile(chemin, "print")
+    else:
+        subprocess.Popen(["lp", chemin])
+
+
+def _livrer(chemin, action):
+    """Ouvre ou imprime le document selon l'action demandée"""
+    if action == OUVRIR:
+        ouvrir_fichier(chemin)
+    elif action == IMPRIMER:
+        imprimer_fichier(chemin)
+
+
+def _prechauffer(cache):
+    """Charge ReportLab dans le processus d'impression et récupère les fichiers abandonnés"""
+    import utils.pdf_generator  # noqa: F401
+    cache.nettoyer()
+
+
+def _rendre_facture(cache, facture_info, details, action):
+    """Exécuté dans le processus d'impression : génère (dans le cache) puis ouvre ou imprime"""
+    from utils.pdf_generator import generer_facture
+    chemin = cache.obtenir(facture_info, details, generer_facture)
+    _livrer(chemin, action)
+    return chemin
+
+
+def _rendre_inventaire(db_path, par_entrepot, chemin, action):
+    """Exécuté dans le processus d'impression : lit le catalogue au fil des pages"""
+    from database.db_manager import DatabaseManager
+    from utils.pdf_generator import generer_inventaire
+    db = DatabaseManager(db_path)
+    try:
+        generer_inventaire(db.iter_inventaire(par_entrepot), chemin, par_entrepot)
+    finally:
+        db.close()
+    _livrer(chemin, action)
+    return chemin
+
+
+class PrintQueue:
+    """File d'impression des factures et de l'inventaire.
+
+    Le rendu PDF et l'ouverture (ou l'envoi à l'imprimante) se font dans un
+    processus séparé : le thread Tk est libre dès la soumission. Les
+    documents déjà générés sont resservis depuis le cache sans nouveau
+    rendu. Les callbacks sont appelés depuis le thread Tk via after().
+    """
+
+    def __init__(self, max_workers=1, cache=None):
+        self.max_workers = max_workers
+        self.cache = cache or DocumentCache()
+        self._pool = None
+        self._lock = threading.Lock()
+        self._results = queue.SimpleQueue()
+        self._en_attente = 0
+        self._root = None
+        self._polling = False
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # "spawn" : ne pas forker le processus Tk et ses threads
+                # (exécuteur, démarrage, connexions SQLite)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def demarrer(self):
+        """Lance le processus d'impression à l'avance (ReportLab chargé avant la première facture)"""
+        self._get_pool().submit(_prechauffer, self.cache)
+
+    def submit_facture(self, owner, facture_info, details, action=OUVRIR, on_done=None, on_error=None):
+        """Met en file le PDF de la facture et retourne le Future.
+
+        `facture_info` et `details` sont lus au préalable hors du thread Tk
+        (DatabaseManager.get_facture_complete via l'exécuteur base).
+        on_done(chemin) ou on_error(exception) sont appelés depuis le thread
+        Tk, sauf si `owner` a été détruit entre-temps. À appeler depuis le
+        thread Tk.
+        """
+        if self._root is None:
+            self._root = owner.nametowidget(".")
+
+        chemin = self.cache.trouver(facture_info, details)
+        if chemin is not None:
+            # Réimpression : document déjà en cache, aucun rendu
+            future = Future()
+            try:
+                _livrer(chemin, action)
+                future.set_result(chemin)
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self._soumettre(_rendre_facture, self.cache, facture_info, details, action)
+        return self._suivre(owner, future, on_done, on_error)
+
+    def submit_inventaire(self, owner, db, par_entrepot=False, action=OUVRIR, on_done=None, on_error=None):
+        """Met en file le PDF de l'inventaire et retourne le Future.
+
+        Le processus d'impression lit lui-même les articles dans la base de
+        `db` : le catalogue ne transite pas par le thread Tk. Callbacks comme
+        pour submit_facture.
+        """
+        if self._root is None:
+            self._root = owner.nametowidget(".")
+
+        chemin = os.path.join(
+            tempfile.gettempdir(), f"Inventaire_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        )
+        future = self._soumettre(
+            _rendre_inventaire, os.path.abspath(db.db_path), par_entrepot, chemin, action
+        )
+        return self._suivre(owner, future, on_done, on_error)
+
+    def _suivre(self, owner, future, on_done, on_error):
+        """Fait remonter la fin du Future au thread Tk"""
+        self._en_attente += 1
+        future.add_done_callback(
+            lambda f: self._results.put((owner, f, on_done, on_error))
+        )
+        self._schedule_poll()
+        return future
+
+    def _soumettre(self, fn, *args):
+        try:
+            return self._get_pool().submit(fn, *args)
+        except BrokenProcessPool:
+            # Processus d'impression mort : en relancer un
+            with self._lock:
+                self._pool = None
+            return self._get_pool().submit(fn, *args)
+
+    def shutdown(self, wait=True):
+        """Arrête le processus d'impression (les factures en cours sont terminées)"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self._root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                owner, future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._en_attente -= 1
+            if self._widget_exists(owner):
+                self._deliver(future, on_done, on_error)
+
+        if self._en_attente:
+            self._root.after(POLL_MS, self._poll)
+        else:
+            self._polling = False
+
+    @staticmethod
+    def _widget_exists(widget):
+        try:
+            return bool(widget.winfo_exists())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _deliver(future, on_done, on_error):
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            else:
+                traceback.print_exception(type(e), e, e.__traceback__)
+            return
+        if on_done:
+            on_done(result)
+
+
+_print_queue = None
+_print_queue_lock = threading.Lock()
+
+
+def get_print_queue():
+    """Retourne la file d'impression partagée par toute l'application"""
+    global _print_queue
+    with _print_queue_lock:
+        if _print_queue is None:
+            _print_queue = PrintQueue()
+        return _print_queue
@@ -0,0 +1,74 @@
+import re
+
+# Multiplicateur saisi avant ou après le code : "3*REF" ou "REF*3"
+_PREFIXE_QUANTITE = re.compile(r"^(\d+(?:[.,]\d+)?)\s*\*\s*(.+)$")
+_SUFFIXE_QUANTITE = re.compile(r"^(.+?)\s*\*\s*(\d+(?:[.,]\d+)?)$")
+
+# Séparateur entre la référence et le code d'unité : "REF/CTN"
+SEPARATEUR_UNITE = "/"
+
+
+class ScanError(ValueError):
+    """Code scanné invalide ou inconnu du catalogue"""
+
+
+def parse_scan(texte):
+    """Découpe un code scanné en (référence, code_unite, quantité).
+
+    Format accepté : [quantité*]REFERENCE[/CODE_UNITE][*quantité].
+    code_unite vaut None s'il n'est pas précisé, la quantité 1 par défaut.
+    """
+    texte = texte.strip()
+    quantite = 1.0
+
+    correspondance = _PREFIXE_QUANTITE.match(texte) or _SUFFIXE_QUANTITE.match(texte)
+    if correspondance:
+        if correspondance.re is _PREFIXE_QUANTITE:
+            nombre, texte = correspondance.groups()
+        else:
+            texte, nombre = correspondance.groups()
+        quantite = float(nombre.replace(",", "."))
+        if quantite <= 0:
+            raise ScanError("La quantité doit être positive")
+
+    reference, code_unite = texte.strip(), None
+    if SEPARATEUR_UNITE in reference:
+        reference, code_unite = (part.strip() for part in reference.rsplit(SEPARATEUR_UNITE, 1))
+
+    if not reference:
+        raise ScanError("Code vide")
+    return reference, code_unite or None, quantite
+
+
+def resoudre_scan(catalog, texte):
+    """Résout un code scanné via les index mémoire du catalogue.
+
+    Retourne (article, unite, quantité) où `unite` est le tuple
+    (unite_id, code, libelle, prix_unitaire) de l'article. Sans code
+    d'unité, l'unité vendue la moins chère (l'unité de base) est retenue.
+    Lève ScanError si l'article ou l'unité est introuvable.
+    """
+    reference, code_unite, quantite = parse_scan(texte)
+
+    article = catalog.article_par_reference(reference)
+    if article is None and code_unite is not None:
+        # Référence contenant elle-même le séparateur
+        article = catalog.article_par_reference(f"{reference}{SEPARATEUR_UNITE}{code_unite}")
+        if article is not None:
+            code_unite = None
+    if article is None:
+        raise ScanError(f"Référence inconnue : {reference}")
+
+    unites = article['unites']
+    if not unites:
+        raise ScanError(f"Aucun prix défini pour {article['nom']}")
+
+    if code_unite is None:
+        return article, min(unites, key=lambda u: u[3]), quantite
+
+    unite = catalog.unite_par_code(code_unite)
+    if unite is not None:
+        for unite_article in unites:
+            if unite_article[0] == unite[0]:
+                return article, unite_article, quantite
+    raise ScanError(f"Unité {code_unite} non vendue pour {article['nom']}")
@@ -0,0 +1,49 @@
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Mesure la durée de chaque phase du démarrage (option --startup-profile)"""
+
+    def __init__(self):
+        self.enabled = False
+        self.debut = time.perf_counter()
+        # (nom, durée) pour une phase, (nom, None) pour un instant repère
+        self.phases = []
+        self.instants = {}
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def phase(self, nom):
+        """Chronomètre le bloc sous le nom donné"""
+        if not self.enabled:
+            yield
+            return
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((nom, time.perf_counter() - debut))
+
+    def mark(self, nom):
+        """Note un instant repère (mesuré depuis le lancement du processus)"""
+        if self.enabled:
+            self.phases.append((nom, None))
+            self.instants[nom] = time.perf_counter() - self.debut
+
+    def report(self):
+        """Affiche le détail des phases"""
+        if not self.enabled:
+            return
+        print("⏱️ Profil de démarrage :")
+        for nom, duree in self.phases:
+            if duree is None:
+                print(f"   ● {nom:<32} à {self.instants[nom] * 1000:8.1f} ms")
+            else:
+                print(f"   - {nom:<32} {duree * 1000:8.1f} ms")
+
+
+# Profil partagé par main.py et MainApp
+profiler = StartupProfiler()